@@ -1,26 +1,46 @@
-from slack_bolt import App
-from slack_bolt.adapter.flask import SlackRequestHandler
 from flask import Flask, request
-from openai import OpenAI
+import atexit
+import gc
 import logging
+import os
+import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Dict, List
-from collections import deque
+from typing import Callable, Dict, List
 from . import classifier
+from .cache import TTLCache, approximate_size
 from .config import Config
+from . import images, metrics, prefilter, ratelimit
+from .directory import SlackDirectory
 from .images import download_slack_images as _download_slack_images
-from .matching import match_keywords
+from .matching import get_matcher, match_keywords
+from .state import SQLiteStore
+from .workers import EventQueue, install_sigterm_drain
+
+def _state_store(table: str, ttl: float):
+    """In-process by default; STATE_BACKEND=sqlite shares state between gunicorn workers."""
+    if Config.STATE_BACKEND == 'sqlite':
+        return SQLiteStore(Config.STATE_SQLITE_PATH, table, Config.DEDUP_SIZE, ttl)
+    if Config.STATE_BACKEND != 'memory':
+        logging.warning(f"Unknown STATE_BACKEND {Config.STATE_BACKEND!r}, keeping state in memory")
+    return TTLCache(
+        Config.DEDUP_SIZE, ttl, max_bytes=Config.DEDUP_MAX_BYTES, sizeof=approximate_size, key_sizeof=approximate_size,
+    )
 
 # Track processed messages to handle Slack retries
-processed_messages = deque(maxlen=1000)
+processed_messages = _state_store('processed_messages', Config.DEDUP_TTL)
 
 # Track evaluated messages: (channel_id, ts) -> set of matched keywords (used to suppress duplicate edit logs)
-evaluated_messages = {}
-
-# Channel name cache: id -> "#name"
-_channel_name_cache: Dict[str, str] = {}
+evaluated_messages = _state_store('evaluated_messages', Config.EVALUATED_TTL)
 
+# Slack user and channel names for log lines
+directory = SlackDirectory(
+    maxsize=Config.SLACK_DIRECTORY_SIZE,
+    ttl=Config.SLACK_DIRECTORY_TTL,
+    refresh_interval=Config.SLACK_DIRECTORY_REFRESH_INTERVAL,
+    snapshot_path=Config.SLACK_DIRECTORY_SNAPSHOT_PATH,
+    max_bytes=Config.SLACK_DIRECTORY_MAX_BYTES,
+)
 
 class SlackEventsAccessLogFilter(logging.Filter):
     def filter(self, record):
@@ -40,28 +60,10 @@ def _install_access_log_filters():
 
 
 def _channel_name(channel_id: str) -> str:
-    if channel_id not in _channel_name_cache:
-        try:
-            slack_app, _, _ = ensure_initialized()
-            result = slack_app.client.conversations_info(channel=channel_id)
-            _channel_name_cache[channel_id] = '#' + result['channel']['name']
-        except Exception:
-            _channel_name_cache[channel_id] = channel_id
-    return _channel_name_cache[channel_id]
-
-_user_name_cache: Dict[str, str] = {}
+    return directory.channel_name(channel_id)
 
 def _user_name(user_id: str) -> str:
-    if user_id not in _user_name_cache:
-        try:
-            slack_app, _, _ = ensure_initialized()
-            result = slack_app.client.users_info(user=user_id)
-            profile = result['user']['profile']
-            name = profile.get('display_name') or profile.get('real_name') or user_id
-            _user_name_cache[user_id] = '@' + name
-        except Exception:
-            _user_name_cache[user_id] = '@' + user_id
-    return _user_name_cache[user_id]
+    return directory.user_name(user_id)
 
 def _fmt_ts(ts: str) -> str:
     try:
@@ -81,7 +83,12 @@ flask_app.logger.disabled = True
 app = None
 client = None
 handler = None
+event_queue = None
+http_session = None
 _logging_configured = False
+# Pid of the process whose worker threads are running, and how long warmup() took
+_background_pid = None
+_warmup_seconds = None
 
 def configure_logging():
     global _logging_configured
@@ -102,59 +109,185 @@ def configure_logging():
     logging.getLogger('httpx').setLevel(logging.WARNING)
     _logging_configured = True
 
-configure_logging()
+def initialize(slack_app=None, openai_client=None, validate_config=True, start_background=True):
+    """Initialize external clients and register Slack handlers.
 
-def initialize(slack_app=None, openai_client=None, validate_config=True):
-    """Initialize external clients and register Slack handlers."""
-    global app, client, handler
+    With `start_background=False` no threads are started, so the process can
+    safely fork; call `_start_background` in each child.
+    """
+    global app, client, handler, http_session
 
+    configure_logging()
     if validate_config and not Config.validate():
         raise RuntimeError("One or more environment variables are missing")
 
     Config.load_keywords()
-    app = slack_app or App(
-        token=Config.SLACK_BOT_TOKEN,
-        signing_secret=Config.SLACK_SIGNING_SECRET,
-        token_verification_enabled=Config.SLACK_TOKEN_VERIFICATION_ENABLED,
+    classifier.load_result_cache()
+    images.configure_image_cache(Config.IMAGE_CACHE_MAX_BYTES, Config.IMAGE_CACHE_TTL, Config.IMAGE_PHASH_MAX_DISTANCE)
+    images.configure_transcoding(
+        Config.IMAGE_TRANSCODE_WORKERS, Config.IMAGE_TRANSCODE_TIMEOUT,
+        Config.IMAGE_MAX_SOURCE_BYTES, Config.IMAGE_MAX_PIXELS, Config.IMAGE_INLINE_MAX_BYTES,
     )
-    client = openai_client or OpenAI(api_key=Config.OPENAI_API_KEY)
+    if prefilter.model is None and Config.PREFILTER_MODEL_PATH:
+        prefilter.load_model(Config.PREFILTER_MODEL_PATH)
+    # slack_bolt and openai take most of the import time, so they are only loaded here
+    from slack_bolt.adapter.flask import SlackRequestHandler
+
+    if slack_app is not None:
+        app = slack_app
+    else:
+        from slack_bolt import App
+
+        app = App(
+            token=Config.SLACK_BOT_TOKEN,
+            signing_secret=Config.SLACK_SIGNING_SECRET,
+            token_verification_enabled=Config.SLACK_TOKEN_VERIFICATION_ENABLED,
+        )
+    if openai_client is not None:
+        client = openai_client
+    else:
+        from openai import OpenAI
+
+        client = OpenAI(api_key=Config.OPENAI_API_KEY)
     handler = SlackRequestHandler(app)
+    if http_session is None:
+        http_session = images.create_http_session(
+            Config.IMAGE_HTTP_POOL_SIZE, Config.IMAGE_HTTP_RETRIES, Config.IMAGE_HTTP_BACKOFF,
+        )
     register_handlers(app)
+    if start_background:
+        _start_background(app.client if slack_app is None else None)
+    return flask_app
+
+def _start_background(slack_client=None):
+    """Start this process's threads: event queue workers and, given a Slack client, the name refresher."""
+    global _background_pid
+
+    if _background_pid == os.getpid():
+        return
+    _background_pid = os.getpid()
+    if slack_client is not None:
+        _start_directory(slack_client)
+    _start_event_queue()
+
+def warmup(slack_app=None, openai_client=None, start_background=True):
+    """Do the one-off setup the first Slack event would otherwise wait for.
+
+    Builds the clients, compiles the keyword matcher, registers image codecs and
+    loads Slack names. Nothing here opens a connection or starts a thread when
+    `start_background` is False, so it can run in a gunicorn master before fork.
+    """
+    global _warmup_seconds
+
+    start = time.perf_counter()
+    if app is None or client is None or handler is None:
+        initialize(slack_app, openai_client, start_background=start_background)
+    elif start_background:
+        _start_background(app.client if slack_app is None else None)
+    get_matcher()
+    images.register_codecs()
+    if slack_app is None and Config.SLACK_DIRECTORY_REFRESH_INTERVAL > 0 and not directory.running:
+        try:
+            directory.prefetch(app.client)
+        except Exception as e:
+            logging.warning(f"Could not prefetch Slack names, resolving them on demand: {e}")
+    _warmup_seconds = time.perf_counter() - start
+    logging.info(f"WARMUP | done in {_warmup_seconds:.2f}s | pid={os.getpid()}")
+
+def create_app(preload: bool = False):
+    """WSGI factory that warms up before the server takes traffic.
+
+        gunicorn 'cake_radar.app:create_app()'
+        gunicorn --preload 'cake_radar.app:create_app(preload=True)'
+
+    With `preload` the warmup runs once in the gunicorn master and each forked
+    worker only starts its own threads. Everything the master built is then
+    moved out of the garbage collector's reach with `gc.freeze()`, so collections
+    in the workers do not write to, and so copy, the pages they share with it.
+    """
+    if not preload:
+        warmup()
+        return flask_app
+
+    # Collections before the freeze would leave freed gaps scattered across shared pages
+    gc.disable()
+    warmup(start_background=False)
+    parent_pid = os.getpid()
+    slack_client = app.client
+
+    def _after_fork():
+        # Only workers forked by the master, not processes forked later by a worker
+        if os.getppid() == parent_pid:
+            gc.enable()
+            _start_background(slack_client)
+
+    os.register_at_fork(after_in_child=_after_fork)
+    gc.freeze()
     return flask_app
 
+def _start_directory(slack_client):
+    """Prewarm, refresh and resolve Slack names; injected test apps resolve nothing."""
+    if directory.running:
+        return
+    directory.start(slack_client)
+    atexit.register(directory.stop)
+
+def _start_event_queue():
+    global event_queue
+
+    if event_queue is not None or Config.EVENT_QUEUE_WORKERS <= 0:
+        return
+    event_queue = EventQueue(
+        workers=Config.EVENT_QUEUE_WORKERS,
+        maxsize=Config.EVENT_QUEUE_SIZE,
+        put_timeout=Config.EVENT_QUEUE_PUT_TIMEOUT,
+    )
+    install_sigterm_drain(event_queue, Config.EVENT_QUEUE_DRAIN_TIMEOUT)
+    atexit.register(event_queue.shutdown, Config.EVENT_QUEUE_DRAIN_TIMEOUT)
+
 def ensure_initialized():
     if app is None or client is None or handler is None:
         initialize()
     return app, client, handler
 
 def register_handlers(slack_app):
-    slack_app.message()(handle_message)
-    slack_app.event("message")(handle_message_events)
+    if Config.EVENT_QUEUE_WORKERS > 0:
+        slack_app.message()(enqueue_message)
+        slack_app.event("message")(enqueue_message_events)
+    else:
+        slack_app.message()(handle_message)
+        slack_app.event("message")(handle_message_events)
 
 def _openai_operational_error_kind(error: Exception) -> str:
     return classifier.openai_operational_error_kind(error)
 
-def notify_openai_operational_error(error: Exception, context: str):
-    """Post a Slack alert for OpenAI configuration problems."""
+def _operational_alert_text(error: Exception, context: str):
+    """Return the alert text for an OpenAI configuration problem, or None if no alert is due."""
     kind = _openai_operational_error_kind(error)
     if not kind:
-        return
+        return None
 
     if kind == 'auth':
         detail = "OpenAI authentication failed."
     else:
         detail = "OpenAI quota or billing failed."
 
-    target_channel = Config.OPERATIONAL_ALERT_CHANNEL
-    if not target_channel:
+    if not Config.OPERATIONAL_ALERT_CHANNEL:
         logging.error("OpenAI operational alert suppressed: no OPERATIONAL_ALERT_CHANNEL configured")
-        return
+        return None
 
-    text = (
+    return (
         f"Hi {Config.OPERATIONAL_ALERT_SUPPORT_MENTION}, I'm broken, please check the logs!\n"
         f"{detail} Treat alerts may be missed until this is fixed. Context: `{context}`."
     )
 
+def notify_openai_operational_error(error: Exception, context: str):
+    """Post a Slack alert for OpenAI configuration problems."""
+    text = _operational_alert_text(error, context)
+    if not text:
+        return
+
+    target_channel = Config.OPERATIONAL_ALERT_CHANNEL
     try:
         slack_app, _, _ = ensure_initialized()
         slack_app.client.chat_postMessage(channel=target_channel, text=text)
@@ -162,46 +295,58 @@ def notify_openai_operational_error(error: Exception, context: str):
         logging.error(f"Failed to send operational alert: {slack_error}")
 
 def download_slack_images(files: list, max_images: int = 1) -> List[str]:
-    return _download_slack_images(files, Config.SLACK_BOT_TOKEN, max_images)
+    with metrics.STAGE_SECONDS.time(stage='image_download'):
+        return _download_slack_images(
+            files, Config.SLACK_BOT_TOKEN, max_images, Config.IMAGE_DETAIL, Config.IMAGE_MAX_DATA_URI_BYTES,
+            session=http_session,
+            timeout=(Config.IMAGE_HTTP_CONNECT_TIMEOUT, Config.IMAGE_HTTP_READ_TIMEOUT),
+        )
 
 # Function to assess certainty
 def assess_certainty(message_text: str, image_data_uris: List[str] = None) -> Dict:
     _, openai_client, _ = ensure_initialized()
-    return classifier.assess_certainty(
-        openai_client,
-        message_text,
-        notify_openai_operational_error,
-        image_data_uris,
-    )
+    with metrics.STAGE_SECONDS.time(stage='classifier'):
+        return classifier.assess_certainty(
+            openai_client,
+            message_text,
+            notify_openai_operational_error,
+            image_data_uris,
+        )
 
 def _parse_judge_response(raw_response: str) -> Dict:
     return classifier.parse_judge_response(raw_response)
 
 def judge_decision(message_text: str, classifier_reason: str, image_data_uris: List[str] = None) -> Dict:
     _, openai_client, _ = ensure_initialized()
-    return classifier.judge_decision(
-        openai_client,
-        message_text,
-        classifier_reason,
-        notify_openai_operational_error,
-        image_data_uris,
-    )
+    with metrics.STAGE_SECONDS.time(stage='judge_panel'):
+        return classifier.judge_decision(
+            openai_client,
+            message_text,
+            classifier_reason,
+            notify_openai_operational_error,
+            image_data_uris,
+        )
 
 def _format_judge_votes(votes: List[Dict]) -> str:
     return classifier.format_judge_votes(votes)
 
 
-def send_slack_alert(say, channel_id, ts, certainty, target_channel):
-    """Helper to format and send the Slack alert."""
+def _alert_text(channel_id: str, ts: str, certainty) -> str:
     message_url = f"https://slack.com/archives/{channel_id}/p{ts.replace('.', '')}"
     certainty_info = f"{certainty}% certainty"
 
     icon = ":cake-radar:"
     title = "Cake detected!"
-    full_message = f"{icon} *<{message_url}|{title}>* ({certainty_info})"
-    
+    return f"{icon} *<{message_url}|{title}>* ({certainty_info})"
+
+
+def send_slack_alert(say, channel_id, ts, certainty, target_channel):
+    """Helper to format and send the Slack alert."""
+    full_message = _alert_text(channel_id, ts, certainty)
+
     try:
-        say(channel=target_channel, text=full_message)
+        with metrics.STAGE_SECONDS.time(stage='slack_post'):
+            say(channel=target_channel, text=full_message)
     except Exception as e:
         logging.error(f"Error sending message to {target_channel}: {e}")
 
@@ -219,38 +364,89 @@ def _is_public_source_channel(payload: Dict, channel_id: str) -> bool:
     return is_public
 
 
-def evaluate_message(original_text: str, channel_id: str, ts: str, files: list, say, user_id: str = '', is_edit: bool = False):
-    """Run keyword matching, AI evaluation, logging, and forwarding for a message."""
-    text = original_text.lower()
+def _classifier_forwards(result: Dict) -> bool:
+    return result['decision'] == "yes" and result['total_certainty'] > Config.CERTAINTY_THRESHOLD
 
-    matched_keywords = match_keywords(text)
-    if not matched_keywords:
-        return
 
-    image_data_uris = download_slack_images(files)
-    result = assess_certainty(text, image_data_uris)
+def _forwards(result: Dict, judge) -> bool:
+    """Final decision: a confident classifier 'yes' that the judge panel did not overturn."""
+    return _classifier_forwards(result) and not (judge and judge['verdict'] == 'overturn')
+
+
+def _has_images(files: list) -> bool:
+    return any((f.get('mimetype') or '').startswith('image/') for f in files)
+
+
+def _image_first(text: str, files: list) -> bool:
+    """Cascade: a message that is mostly an image is classified with the image straight away."""
+    return _has_images(files) and len(text.split()) < Config.CASCADE_MIN_TEXT_WORDS
+
+
+def _text_uncertain(result: Dict) -> bool:
+    """Cascade: does a text-only decision fall inside the band where the image could change it?"""
+    if result['decision'] not in ('yes', 'no'):
+        return False
+    yes_certainty = result['total_certainty'] if result['decision'] == 'yes' else 100 - result['total_certainty']
+    return Config.CASCADE_UNCERTAIN_MIN <= yes_certainty <= Config.CASCADE_UNCERTAIN_MAX
+
+
+def _cascade_classify(text: str, files: list, fetch_images: Callable[[list], List[str]] = None):
+    """Classify on text first and only pay for images when they could change the outcome.
+
+    Returns (image_data_uris, result, path) where path is 'text', 'text+image' or 'image'.
+    """
+    fetch_images = fetch_images or download_slack_images
+    if _image_first(text, files):
+        image_data_uris = fetch_images(files)
+        return image_data_uris, assess_certainty(text, image_data_uris), 'image'
+
+    result = assess_certainty(text)
+    if _has_images(files) and _text_uncertain(result):
+        image_data_uris = fetch_images(files)
+        if image_data_uris:
+            return image_data_uris, assess_certainty(text, image_data_uris), 'text+image'
+    return [], result, 'text'
+
 
+def _prefilter_score(text: str, files: list):
+    """Return the local pre-classifier score if it would skip this message, else None.
+
+    Messages with images are never skipped: the text-only model cannot see them.
+    """
+    if prefilter.model is None or _has_images(files):
+        return None
+    score = prefilter.model.score(text)
+    return score if score < Config.PREFILTER_THRESHOLD else None
+
+
+def _log_prefiltered(score: float, original_text: str, matched_keywords: List[str], ts: str,
+                     channel_name: str, user_name: str):
+    label = "PREFILTER_SHADOW | would skip" if Config.PREFILTER_SHADOW else "PREFILTERED | NOT_FORWARDED"
+    flat_text = ' '.join(original_text.split())
+    logging.info(
+        f"{label} | local={score:.3f} | keywords={matched_keywords} | {_fmt_ts(ts)} | "
+        f'{channel_name} | {user_name} | "{flat_text}"'
+    )
+
+
+def _log_evaluation(result: Dict, judge, original_text: str, matched_keywords: List[str], ts: str,
+                    channel_name: str, user_name: str, is_edit: bool, path: str = None) -> bool:
+    """Log the EVALUATED line for a message and return whether it is forwarded."""
     decision = result['decision']
     total_certainty = result['total_certainty']
     reason = result.get('reason', '')
 
-    classifier_forwarded = decision == "yes" and total_certainty > Config.CERTAINTY_THRESHOLD
-
-    judge_verdict = None
-    judge_reason = None
-    judge_votes = []
-    if classifier_forwarded:
-        judge = judge_decision(original_text, reason, image_data_uris)
-        judge_verdict = judge['verdict']
-        judge_reason = judge['reason']
-        judge_votes = judge.get('votes', [])
+    judge_verdict = judge['verdict'] if judge else None
+    judge_reason = judge['reason'] if judge else None
+    judge_votes = judge.get('votes', []) if judge else []
 
-    forwarded = classifier_forwarded and judge_verdict != 'overturn'
+    forwarded = _forwards(result, judge)
     action = "FORWARDED" if forwarded else "NOT_FORWARDED"
     label = "EVALUATED (edit)" if is_edit else "EVALUATED"
 
     flat_text = ' '.join(original_text.split())
     reason_part = f" | reason={reason}" if reason else ""
+    path_part = f" | path={path}" if path else ""
     judge_part = ""
     if judge_verdict:
         judge_part = f" | judge_panel={judge_verdict}"
@@ -259,91 +455,256 @@ def evaluate_message(original_text: str, channel_id: str, ts: str, files: list,
         elif judge_reason:
             judge_part += f" | judge_reason={judge_reason}"
     logging.info(
-        f"{label} | {action} | AI={decision} {total_certainty}%{reason_part}{judge_part} | "
-        f"keywords={matched_keywords} | {_fmt_ts(ts)} | {_channel_name(channel_id)} | "
-        f'{_user_name(user_id)} | "{flat_text}"'
+        f"{label} | {action} | AI={decision} {total_certainty}%{reason_part}{judge_part}{path_part} | "
+        f"keywords={matched_keywords} | {_fmt_ts(ts)} | {channel_name} | "
+        f'{user_name} | "{flat_text}"'
+    )
+    return forwarded
+
+
+def decide(original_text: str, files: list, fetch_images: Callable[[list], List[str]] = None) -> Dict:
+    """Keyword match, pre-filter, classifier and judge for one message, without logging or Slack.
+
+    `fetch_images(files)` returns data URIs and defaults to downloading Slack
+    attachments. The outcome has the matched 'keywords', the last 'stage'
+    reached ('keywords', 'prefilter', 'classifier' or 'judge'), 'forwarded',
+    the 'prefilter_score' if the pre-filter would skip the message, and, once
+    the classifier ran, its 'result', the 'judge' verdict and the cascade 'path'.
+    """
+    fetch_images = fetch_images or download_slack_images
+    text = original_text.lower()
+
+    with metrics.STAGE_SECONDS.time(stage='keyword_match'):
+        outcome = {'keywords': match_keywords(text), 'forwarded': False}
+    if not outcome['keywords']:
+        return {**outcome, 'stage': 'keywords'}
+
+    with metrics.STAGE_SECONDS.time(stage='prefilter'):
+        local_score = _prefilter_score(text, files)
+    if local_score is not None:
+        outcome['prefilter_score'] = local_score
+        if not Config.PREFILTER_SHADOW:
+            return {**outcome, 'stage': 'prefilter'}
+
+    path = None
+    if Config.CASCADE_ENABLED:
+        image_data_uris, result, path = _cascade_classify(text, files, fetch_images)
+    else:
+        image_data_uris = fetch_images(files)
+        result = assess_certainty(text, image_data_uris)
+
+    judge = None
+    if _classifier_forwards(result):
+        judge = judge_decision(original_text, result.get('reason', ''), image_data_uris)
+
+    return {
+        **outcome,
+        'stage': 'judge' if judge else 'classifier',
+        'result': result,
+        'judge': judge,
+        'path': path,
+        'forwarded': _forwards(result, judge),
+    }
+
+
+def evaluate_message(original_text: str, channel_id: str, ts: str, files: list, say, user_id: str = '', is_edit: bool = False):
+    """Run keyword matching, AI evaluation, logging, and forwarding for a message."""
+    outcome = decide(original_text, files)
+    matched_keywords = outcome['keywords']
+    if not matched_keywords:
+        return
+
+    if 'prefilter_score' in outcome:
+        _log_prefiltered(
+            outcome['prefilter_score'], original_text, matched_keywords, ts, _channel_name(channel_id), _user_name(user_id),
+        )
+    if outcome['stage'] == 'prefilter':
+        evaluated_messages.put((channel_id, ts), set(matched_keywords))
+        return
+
+    result = outcome['result']
+    forwarded = _log_evaluation(
+        result, outcome['judge'], original_text, matched_keywords, ts,
+        _channel_name(channel_id), _user_name(user_id), is_edit, outcome['path'],
     )
 
-    evaluated_messages[(channel_id, ts)] = set(matched_keywords)
+    evaluated_messages.put((channel_id, ts), set(matched_keywords))
 
     if forwarded:
-        send_slack_alert(say, channel_id, ts, total_certainty, Config.ALERT_CHANNEL)
+        send_slack_alert(say, channel_id, ts, result['total_certainty'], Config.ALERT_CHANNEL)
 
 
-def handle_message(message, say):
-    original_text = message.get('text', '')
+def _should_evaluate_message(message: Dict) -> bool:
+    """Apply dedup and source filters to a new message."""
     channel_id = message['channel']
     ts = message['ts']
     thread_ts = message.get('thread_ts')
-    user_id = message.get('user', '')
 
     # Deduplicate messages to prevent handling retries
-    if (channel_id, ts) in processed_messages:
-        return
-    processed_messages.append((channel_id, ts))
+    if not processed_messages.add((channel_id, ts)):
+        return False
 
     # Exclude thread replies
     if thread_ts and thread_ts != ts:
-        return
+        return False
 
     # Exclude messages from #cake-radar itself
     if channel_id == Config.CAKE_RADAR_CHANNEL_ID:
-        return
+        return False
 
     # Only forward messages from public channels. Private channels, DMs, and group DMs
     # may contain sensitive context and should never be reposted to #cake-radar.
-    if not _is_public_source_channel(message, channel_id):
+    return _is_public_source_channel(message, channel_id)
+
+
+def _should_evaluate_edit(event: Dict) -> bool:
+    """Apply dedup and source filters to a message_changed event."""
+    updated = event.get('message', {})
+    original_text = updated.get('text', '')
+    channel_id = event.get('channel', '')
+    ts = _canonical_changed_message_ts(event)
+
+    # Re-mark the message as seen with a fresh expiry; edits themselves are filtered below
+    key = (channel_id, ts)
+    processed_messages.put(key, True)
+
+    if channel_id == Config.CAKE_RADAR_CHANNEL_ID:
+        return False
+
+    # Only forward messages from public channels. Private channels, DMs, and group DMs
+    # may contain sensitive context and should never be reposted to #cake-radar.
+    if not _is_public_source_channel(event, channel_id):
+        return False
+
+    # Exclude thread replies
+    thread_ts = updated.get('thread_ts')
+    if thread_ts and thread_ts != ts:
+        return False
+
+    # If already evaluated, only re-evaluate if the edit introduces new cake keywords
+    previous_keywords = evaluated_messages.get(key)
+    if previous_keywords is not None:
+        text_lower = original_text.lower()
+        new_keywords = set(match_keywords(text_lower))
+        if not new_keywords - set(previous_keywords):
+            return False
+
+    return True
+
+
+def handle_message(message, say):
+    if not _should_evaluate_message(message):
         return
 
-    evaluate_message(original_text, channel_id, ts, message.get('files', []), say, user_id=user_id)
+    evaluate_message(
+        message.get('text', ''), message['channel'], message['ts'], message.get('files', []), say,
+        user_id=message.get('user', ''),
+    )
 
 
 def handle_message_events(event, say):
-    subtype = event.get('subtype')
-
-    if subtype == 'message_changed':
-        updated = event.get('message', {})
-        original_text = updated.get('text', '')
-        channel_id = event.get('channel', '')
-        ts = _canonical_changed_message_ts(event)
-        user_id = updated.get('user', '')
-
-        # Remove old dedup entry so the edited version is evaluated fresh
-        key = (channel_id, ts)
-        if key in processed_messages:
-            processed_messages.remove(key)
-        processed_messages.append(key)
-
-        if channel_id == Config.CAKE_RADAR_CHANNEL_ID:
-            return
-
-        # Only forward messages from public channels. Private channels, DMs, and group DMs
-        # may contain sensitive context and should never be reposted to #cake-radar.
-        if not _is_public_source_channel(event, channel_id):
-            return
-
-        # Exclude thread replies
-        thread_ts = updated.get('thread_ts')
-        if thread_ts and thread_ts != ts:
-            return
-
-        # If already evaluated, only re-evaluate if the edit introduces new cake keywords
-        if key in evaluated_messages:
-            text_lower = original_text.lower()
-            new_keywords = set(match_keywords(text_lower))
-            if not new_keywords - evaluated_messages[key]:
-                return
-
-        evaluate_message(original_text, channel_id, ts, updated.get('files', []), say, user_id=user_id, is_edit=True)
+    if event.get('subtype') != 'message_changed' or not _should_evaluate_edit(event):
+        return
+
+    updated = event.get('message', {})
+    evaluate_message(
+        updated.get('text', ''), event.get('channel', ''), _canonical_changed_message_ts(event),
+        updated.get('files', []), say, user_id=updated.get('user', ''), is_edit=True,
+    )
+
+
+# Queued variants: Bolt acks as soon as the event is on the queue, so an event that
+# cannot be queued is lost and only shows up in the log and the rejected count
+def enqueue_message(message, say):
+    if not event_queue.submit(handle_message, message, say):
+        logging.warning(f"EVENT_DROPPED | channel={message.get('channel', '')} | ts={message.get('ts', '')}")
+
+
+def enqueue_message_events(event, say):
+    if not event_queue.submit(handle_message_events, event, say):
+        logging.warning(f"EVENT_DROPPED | channel={event.get('channel', '')} | ts={_canonical_changed_message_ts(event)}")
 
 # URL Verification route
 @flask_app.route("/slack/events", methods=["POST"])
 def slack_events():
-    if request.headers.get("X-Slack-Retry-Num"):
-        return "", 200
     _, _, slack_handler = ensure_initialized()
+    if event_queue is not None:
+        # Events are acked immediately, so Slack only retries events we shed under
+        # load; duplicate deliveries are caught by the (channel, ts) dedup.
+        if event_queue.full():
+            return "", 503
+    elif request.headers.get("X-Slack-Retry-Num"):
+        return "", 200
     return slack_handler.handle(request)
 
+@flask_app.route("/health", methods=["GET"])
+def health():
+    """200 once this process has its clients and worker threads, 503 before that.
+
+    Under the lazy `cake_radar.app:flask_app` entry point nothing is set up
+    until the first request, so the probe does the warmup itself rather than
+    waiting for Slack traffic that will not be routed before it passes.
+    """
+    if app is None or client is None or handler is None:
+        try:
+            warmup()
+        except Exception as e:
+            logging.warning(f"Health check could not warm up: {e}")
+    ready = app is not None and client is not None and handler is not None and _background_pid == os.getpid()
+    return {
+        'ready': ready,
+        'pid': os.getpid(),
+        'warmed_up': _warmup_seconds is not None,
+        'warmup_seconds': round(_warmup_seconds, 3) if _warmup_seconds is not None else None,
+    }, 200 if ready else 503
+
+def _caches() -> Dict:
+    return {
+        'processed_messages': processed_messages,
+        'evaluated_messages': evaluated_messages,
+        'result': classifier.result_cache,
+        'image': images.image_cache,
+        'slack_directory': directory.names,
+    }
+
+def _memory_stats() -> Dict:
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': metrics.process_rss_bytes(),
+        'pss_bytes': metrics.process_pss_bytes(),
+        'gc_frozen_objects': gc.get_freeze_count(),
+        'cache_bytes': {name: store.stats().get('bytes') for name, store in _caches().items()},
+    }
+
+@flask_app.route("/stats", methods=["GET"])
+def stats():
+    return {
+        'memory': _memory_stats(),
+        'event_queue': event_queue.stats() if event_queue is not None else None,
+        'processed_messages': processed_messages.stats(),
+        'evaluated_messages': evaluated_messages.stats(),
+        'result_cache': classifier.result_cache.stats(),
+        'image_cache': {**images.image_cache.stats(), 'phash_matches': images.perceptual_index.matches},
+        'image_http_pools': images.http_pool_stats(http_session) if http_session is not None else {},
+        'image_transcoder': images.transcoder.stats(),
+        'slack_directory': directory.stats(),
+        'openai_limiters': ratelimit.limiter_stats(),
+    }
+
+@flask_app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    for name, store in _caches().items():
+        metrics.set_cache_gauges(name, store.stats())
+    metrics.PROCESS_RSS.set(metrics.process_rss_bytes())
+    if event_queue is not None:
+        queue_stats = event_queue.stats()
+        metrics.QUEUE_DEPTH.set(queue_stats['depth'])
+        metrics.QUEUE_IN_FLIGHT.set(
+            queue_stats['submitted'] - queue_stats['completed'] - queue_stats['failed'] - queue_stats['depth']
+        )
+        metrics.QUEUE_REJECTED.set(queue_stats['rejected'])
+    return metrics.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
 # Start the Flask app or run in CLI mode
 def main():
     import argparse
@@ -353,10 +714,17 @@ def main():
     parser = argparse.ArgumentParser(description="Cake Radar Bot")
     parser.add_argument("--test", type=str, help="Test a single message string")
     parser.add_argument("--interactive", "-i", action="store_true", help="Run in interactive mode")
+    parser.add_argument("--batch", metavar="INPUT", help="Evaluate a JSONL file of messages offline (see cake_radar.batch)")
+    parser.add_argument("--output", help="Batch results JSONL; existing results are kept and skipped")
+    parser.add_argument("--concurrency", type=int, default=4, help="Messages evaluated in parallel in batch mode")
     args = parser.parse_args()
+    if args.batch and not args.output:
+        parser.error("--batch requires --output")
 
+    # Offline runs must not start the event queue or page the live Slack directory
+    offline = bool(args.test or args.batch or args.interactive)
     try:
-        initialize()
+        initialize(start_background=not offline)
     except RuntimeError as exc:
         logging.error(str(exc))
         sys.exit(1)
@@ -397,6 +765,14 @@ def main():
         print_assessment(args.test)
         sys.exit(0)
 
+    if args.batch:
+        import json
+        from . import batch
+
+        summary = batch.run_batch(args.batch, args.output, args.concurrency)
+        print(json.dumps(summary, indent=2))
+        sys.exit(0)
+
     if args.interactive:
         print("🍰 Cake Radar Interactive Mode")
         print("Type a message to test (or 'exit'/'quit' to stop):")
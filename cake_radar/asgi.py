@@ -0,0 +1,215 @@
+"""Async entry point: the Cake Radar pipeline on Bolt's AsyncApp.
+
+Serve with any ASGI server, e.g. `uvicorn cake_radar.asgi:api --port 3000`.
+Slack events, OpenAI calls and image downloads all run on one event loop, so a
+single process can have many evaluations in flight. The synchronous Flask app in
+`cake_radar.app` remains the entry point for the CLI and tests; dedup state,
+filters and log formatting are shared with it.
+"""
+import asyncio
+import logging
+from typing import Dict, List
+
+from openai import AsyncOpenAI
+from slack_bolt.adapter.asgi.async_handler import AsyncSlackRequestHandler
+from slack_bolt.async_app import AsyncApp
+from slack_sdk import WebClient
+
+from . import app as sync_app
+from . import classifier, images, metrics, prefilter
+from .config import Config
+from .images import async_download_slack_images
+from .matching import match_keywords
+
+app = None
+client = None
+http_client = None
+handler = None
+_background_tasks = set()
+
+
+def initialize(slack_app=None, openai_client=None, validate_config=True):
+    """Initialize async clients and register Slack handlers."""
+    global app, client, http_client, handler
+
+    sync_app.configure_logging()
+    if validate_config and not Config.validate():
+        raise RuntimeError("One or more environment variables are missing")
+
+    Config.load_keywords()
+    classifier.load_result_cache()
+    images.configure_image_cache(Config.IMAGE_CACHE_MAX_BYTES, Config.IMAGE_CACHE_TTL, Config.IMAGE_PHASH_MAX_DISTANCE)
+    images.configure_transcoding(
+        Config.IMAGE_TRANSCODE_WORKERS, Config.IMAGE_TRANSCODE_TIMEOUT,
+        Config.IMAGE_MAX_SOURCE_BYTES, Config.IMAGE_MAX_PIXELS, Config.IMAGE_INLINE_MAX_BYTES,
+    )
+    if prefilter.model is None and Config.PREFILTER_MODEL_PATH:
+        prefilter.load_model(Config.PREFILTER_MODEL_PATH)
+    app = slack_app or AsyncApp(
+        token=Config.SLACK_BOT_TOKEN,
+        signing_secret=Config.SLACK_SIGNING_SECRET,
+        token_verification_enabled=Config.SLACK_TOKEN_VERIFICATION_ENABLED,
+    )
+    client = openai_client or AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+    http_client = images.create_async_http_client(
+        Config.IMAGE_HTTP_POOL_SIZE, Config.IMAGE_HTTP_RETRIES,
+        Config.IMAGE_HTTP_CONNECT_TIMEOUT, Config.IMAGE_HTTP_READ_TIMEOUT,
+    )
+    handler = AsyncSlackRequestHandler(app)
+    if slack_app is None:
+        # The directory refreshes on its own thread, so it gets a blocking client
+        sync_app._start_directory(WebClient(token=Config.SLACK_BOT_TOKEN))
+    register_handlers(app)
+    return handler
+
+
+def ensure_initialized():
+    if app is None or client is None or handler is None:
+        initialize()
+    return app, client, handler
+
+
+def register_handlers(slack_app):
+    slack_app.message()(handle_message)
+    slack_app.event("message")(handle_message_events)
+
+
+async def api(scope, receive, send):
+    """ASGI callable; clients are created on first use inside the server's event loop."""
+    _, _, slack_handler = ensure_initialized()
+    await slack_handler(scope, receive, send)
+
+
+async def _post_operational_alert(text: str):
+    try:
+        slack_app, _, _ = ensure_initialized()
+        await slack_app.client.chat_postMessage(channel=Config.OPERATIONAL_ALERT_CHANNEL, text=text)
+    except Exception as slack_error:
+        logging.error(f"Failed to send operational alert: {slack_error}")
+
+
+def notify_openai_operational_error(error: Exception, context: str):
+    """Post a Slack alert for OpenAI configuration problems without blocking the loop."""
+    text = sync_app._operational_alert_text(error, context)
+    if not text:
+        return
+    task = asyncio.get_running_loop().create_task(_post_operational_alert(text))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def download_slack_images(files: list, max_images: int = 1) -> List[str]:
+    ensure_initialized()
+    with metrics.STAGE_SECONDS.time(stage='image_download'):
+        return await async_download_slack_images(
+            files, Config.SLACK_BOT_TOKEN, max_images, http_client,
+            Config.IMAGE_DETAIL, Config.IMAGE_MAX_DATA_URI_BYTES,
+        )
+
+
+async def assess_certainty(message_text: str, image_data_uris: List[str] = None) -> Dict:
+    _, openai_client, _ = ensure_initialized()
+    with metrics.STAGE_SECONDS.time(stage='classifier'):
+        return await classifier.async_assess_certainty(
+            openai_client,
+            message_text,
+            notify_openai_operational_error,
+            image_data_uris,
+        )
+
+
+async def judge_decision(message_text: str, classifier_reason: str, image_data_uris: List[str] = None) -> Dict:
+    _, openai_client, _ = ensure_initialized()
+    with metrics.STAGE_SECONDS.time(stage='judge_panel'):
+        return await classifier.async_judge_decision(
+            openai_client,
+            message_text,
+            classifier_reason,
+            notify_openai_operational_error,
+            image_data_uris,
+        )
+
+
+async def _cascade_classify(text: str, files: list):
+    """Async variant of `cake_radar.app._cascade_classify`."""
+    if sync_app._image_first(text, files):
+        image_data_uris = await download_slack_images(files)
+        return image_data_uris, await assess_certainty(text, image_data_uris), 'image'
+
+    result = await assess_certainty(text)
+    if sync_app._has_images(files) and sync_app._text_uncertain(result):
+        image_data_uris = await download_slack_images(files)
+        if image_data_uris:
+            return image_data_uris, await assess_certainty(text, image_data_uris), 'text+image'
+    return [], result, 'text'
+
+
+async def send_slack_alert(say, channel_id, ts, certainty, target_channel):
+    try:
+        with metrics.STAGE_SECONDS.time(stage='slack_post'):
+            await say(channel=target_channel, text=sync_app._alert_text(channel_id, ts, certainty))
+    except Exception as e:
+        logging.error(f"Error sending message to {target_channel}: {e}")
+
+
+async def evaluate_message(original_text: str, channel_id: str, ts: str, files: list, say, user_id: str = '', is_edit: bool = False):
+    """Async variant of `cake_radar.app.evaluate_message`."""
+    text = original_text.lower()
+
+    with metrics.STAGE_SECONDS.time(stage='keyword_match'):
+        matched_keywords = match_keywords(text)
+    if not matched_keywords:
+        return
+
+    with metrics.STAGE_SECONDS.time(stage='prefilter'):
+        local_score = sync_app._prefilter_score(text, files)
+    if local_score is not None:
+        sync_app._log_prefiltered(
+            local_score, original_text, matched_keywords, ts,
+            sync_app._channel_name(channel_id), sync_app._user_name(user_id),
+        )
+        if not Config.PREFILTER_SHADOW:
+            sync_app.evaluated_messages.put((channel_id, ts), set(matched_keywords))
+            return
+
+    path = None
+    if Config.CASCADE_ENABLED:
+        image_data_uris, result, path = await _cascade_classify(text, files)
+    else:
+        image_data_uris = await download_slack_images(files)
+        result = await assess_certainty(text, image_data_uris)
+
+    judge = None
+    if sync_app._classifier_forwards(result):
+        judge = await judge_decision(original_text, result.get('reason', ''), image_data_uris)
+
+    forwarded = sync_app._log_evaluation(
+        result, judge, original_text, matched_keywords, ts,
+        sync_app._channel_name(channel_id), sync_app._user_name(user_id), is_edit, path,
+    )
+
+    sync_app.evaluated_messages.put((channel_id, ts), set(matched_keywords))
+
+    if forwarded:
+        await send_slack_alert(say, channel_id, ts, result['total_certainty'], Config.ALERT_CHANNEL)
+
+
+async def handle_message(message, say):
+    if not sync_app._should_evaluate_message(message):
+        return
+
+    await evaluate_message(
+        message.get('text', ''), message['channel'], message['ts'], message.get('files', []), say,
+        user_id=message.get('user', ''),
+    )
+
+
+async def handle_message_events(event, say):
+    if event.get('subtype') != 'message_changed' or not sync_app._should_evaluate_edit(event):
+        return
+
+    updated = event.get('message', {})
+    await evaluate_message(
+        updated.get('text', ''), event.get('channel', ''), sync_app._canonical_changed_message_ts(event),
+        updated.get('files', []), say, user_id=updated.get('user', ''), is_edit=True,
+    )
@@ -0,0 +1,201 @@
+"""Offline backtesting: run archived messages through the classifier and judge panel.
+
+Input is JSONL, one message per line:
+
+    {"channel": "C123", "ts": "1700000000.000100", "text": "cake in the kitchen",
+     "images": ["exports/cake.jpg"], "label": true}
+
+`images` (paths relative to the input file) and `label` are optional. Results are
+appended to the output JSONL as each message finishes, and messages already in
+the output are skipped, so an interrupted run picks up where it stopped. When
+labels are present, precision and recall of the forwarding decision are reported.
+Messages the classifier could not evaluate (OpenAI errors, unparseable
+responses) are not written, so the next run retries them.
+"""
+import json
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from . import app as cake_radar
+from . import images
+from .classifier import is_classifier_error
+from .config import Config
+
+_TRUE_LABELS = {'1', 'true', 'yes', 'y', 'forward', 'forwarded'}
+
+
+class EvaluationFailed(Exception):
+    """The classifier returned an error instead of a decision."""
+
+
+def parse_label(value) -> Optional[bool]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value > 0
+    return str(value).strip().lower() in _TRUE_LABELS
+
+
+def _message_key(message: Dict) -> Tuple[str, str]:
+    if message.get('id') is not None:
+        return ('id', str(message['id']))
+    return (str(message.get('channel', '')), str(message.get('ts', '')))
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Skipping {path}:{line_number}: {e}")
+
+
+def _local_files(paths: List[str], base_dir: str) -> List[Dict]:
+    """Stand-ins for Slack file objects, so the pipeline sees local images as attachments."""
+    files = []
+    for path in paths:
+        full_path = os.path.join(base_dir, path)
+        extension = os.path.splitext(path)[1].lstrip('.').lower() or 'unknown'
+        files.append({'mimetype': mimetypes.guess_type(full_path)[0] or f'image/{extension}', 'path': full_path})
+    return files
+
+
+def _load_images(files: List[Dict], max_images: int = 1) -> List[str]:
+    data_uris = []
+    for f in files:
+        if len(data_uris) >= max_images:
+            break
+        uri = images.load_image_file(f['path'], Config.IMAGE_DETAIL, Config.IMAGE_MAX_DATA_URI_BYTES)
+        if uri:
+            data_uris.append(uri)
+    return data_uris
+
+
+def evaluate(message: Dict, base_dir: str = '.') -> Dict:
+    """Run one archived message through the live decision pipeline (`app.decide`), without Slack."""
+    files = _local_files(message.get('images') or [], base_dir)
+    outcome = cake_radar.decide(message.get('text', ''), files, _load_images)
+    result = {
+        'id': message.get('id'),
+        'channel': message.get('channel'),
+        'ts': message.get('ts'),
+        'label': parse_label(message.get('label')),
+        'keywords': outcome['keywords'],
+        'forwarded': outcome['forwarded'],
+        'stage': outcome['stage'],
+    }
+    if 'prefilter_score' in outcome:
+        result['prefilter_score'] = round(outcome['prefilter_score'], 4)
+    if outcome['stage'] in ('keywords', 'prefilter'):
+        return result
+
+    certainty, judge = outcome['result'], outcome['judge']
+    if is_classifier_error(certainty):
+        raise EvaluationFailed(f"classifier returned {certainty['decision']!r} ({certainty.get('reason') or 'no reason'})")
+    result.update(
+        decision=certainty['decision'],
+        certainty=certainty['total_certainty'],
+        reason=certainty.get('reason', ''),
+        judge=judge['verdict'] if judge else None,
+        judge_reason=judge['reason'] if judge else None,
+        path=outcome['path'],
+        prompt_tokens=certainty.get('prompt_tokens', 0),
+        completion_tokens=certainty.get('completion_tokens', 0),
+    )
+    return result
+
+
+def _completed_keys(output_path: str) -> Set[Tuple[str, str]]:
+    if not os.path.exists(output_path):
+        return set()
+    return {
+        _message_key(result) for result in _read_jsonl(output_path)
+        if not ('decision' in result and is_classifier_error(result))
+    }
+
+
+def _latest_results(output_path: str) -> Dict[Tuple[str, str], Dict]:
+    # A retried message is appended again, so its last row supersedes the earlier ones
+    return {_message_key(result): result for result in _read_jsonl(output_path)}
+
+
+def score(output_path: str) -> Dict:
+    """Confusion counts, precision and recall over the latest result per message in `output_path`.
+
+    Classifier errors written by older versions and not retried yet are counted apart and left out.
+    """
+    counts = {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0}
+    total = 0
+    errors = 0
+    for result in _latest_results(output_path).values():
+        total += 1
+        if 'decision' in result and is_classifier_error(result):
+            errors += 1
+            continue
+        label = result.get('label')
+        if label is None:
+            continue
+        predicted = bool(result.get('forwarded'))
+        counts[('t' if predicted == label else 'f') + ('p' if predicted else 'n')] += 1
+
+    predicted_positive = counts['tp'] + counts['fp']
+    actual_positive = counts['tp'] + counts['fn']
+    return {
+        'results': total,
+        'labelled': sum(counts.values()),
+        'errors': errors,
+        **counts,
+        'precision': round(counts['tp'] / predicted_positive, 4) if predicted_positive else None,
+        'recall': round(counts['tp'] / actual_positive, 4) if actual_positive else None,
+    }
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4) -> Dict:
+    """Evaluate every message in `input_path` not yet in `output_path`, then score the output."""
+    done = _completed_keys(output_path)
+    if done:
+        logging.info(f"Resuming: {len(done)} messages already in {output_path}")
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    write_lock = threading.Lock()
+    # Bound the number of messages read ahead of the workers
+    slots = threading.BoundedSemaphore(max(1, concurrency) * 2)
+    progress = {'evaluated': 0, 'skipped': len(done), 'failed': 0}
+
+    def _run(message: Dict, output):
+        try:
+            result = evaluate(message, base_dir)
+        except Exception as e:
+            # Not written, so the message is retried on the next run
+            logging.error(f"Batch evaluation failed for {_message_key(message)}: {e}")
+            with write_lock:
+                progress['failed'] += 1
+            return
+        finally:
+            slots.release()
+        with write_lock:
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            progress['evaluated'] += 1
+            if progress['evaluated'] % 100 == 0:
+                logging.info(f"BATCH_PROGRESS | evaluated={progress['evaluated']} | failed={progress['failed']}")
+
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='cake-radar-batch') as pool:
+        for message in _read_jsonl(input_path):
+            key = _message_key(message)
+            if key in done:
+                continue
+            done.add(key)
+            slots.acquire()
+            pool.submit(_run, message, output)
+
+    return {**progress, **score(output_path)}
@@ -0,0 +1,415 @@
+"""Replay Slack events through the pipeline against local stand-ins and time every stage.
+
+    python -m cake_radar.bench --events 500 --concurrency 8 --output bench.json
+    python -m cake_radar.bench --corpus events.jsonl --compare bench-main.json
+
+Nothing leaves the machine: OpenAI is replaced by `FakeOpenAI` with configurable
+latency and error rates, Slack by an in-process fake, and image attachments are
+served by a local HTTP server. Results are written as JSON so runs from
+different commits can be compared with `--compare`.
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from . import app as cake_radar
+from . import classifier, images, metrics
+from .config import Config
+
+_FILLER_TEXTS = [
+    "standup moved to 10:30 today",
+    "can someone review my pull request before lunch",
+    "the wifi on the fourth floor is down again",
+    "reminder to fill in your hours",
+    "who is joining the offsite next month",
+]
+_LOCATIONS = ["in the kitchen", "at the 3rd floor pantry", "by the coffee machine", "at my desk", "next to reception"]
+_TREAT_TEMPLATES = [
+    "{treat} {location}, help yourselves",
+    "I brought {treat}, they are {location}",
+    "leftover {treat} {location}",
+    "happy birthday to me! {treat} {location}",
+    "{treat} meeting at 3 to plan the party",
+]
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code: int, headers: Dict = None):
+        super().__init__(f"fake OpenAI error {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeOpenAI:
+    """Stands in for `OpenAI()`: answers classifier and judge requests after a simulated delay.
+
+    Latency is log-normal around `latency_ms`. A deterministic `positive_rate`
+    share of messages gets a classifier 'yes'; judges always uphold.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 300,
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        positive_rate: float = 0.3,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.positive_rate = positive_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model: str, messages: List[Dict], **kwargs):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            latency = self._random.lognormvariate(math.log(self.latency_ms / 1000), self.jitter) if self.latency_ms > 0 else 0
+        time.sleep(latency)
+        if roll < self.error_rate:
+            raise FakeAPIError(500)
+        if roll < self.error_rate + self.rate_limit_rate:
+            raise FakeAPIError(429, {'retry-after-ms': '100'})
+
+        content = messages[-1]['content']
+        text = content if isinstance(content, str) else content[0]['text']
+        if messages[0]['content'] == Config.SYSTEM_PROMPT and ' Messages: ' in text:
+            batch = json.loads(text.split(' Messages: ', 1)[1])
+            answer = {'results': [{'id': message['id'], **self._classify(message['text'])} for message in batch]}
+        elif messages[0]['content'] == Config.SYSTEM_PROMPT:
+            answer = self._classify(text)
+        elif messages[0]['content'].startswith(Config.JUDGE_PANEL_SYSTEM_PROMPT):
+            answer = {judge['name']: {'verdict': 'uphold', 'reason': 'food available'} for judge in Config.JUDGE_SYSTEM_PROMPTS}
+        else:
+            answer = {'verdict': 'uphold', 'reason': 'food available'}
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(answer)))],
+            usage=SimpleNamespace(prompt_tokens=len(text) // 4 + 200, completion_tokens=20),
+        )
+
+    def _classify(self, text: str) -> Dict:
+        positive = zlib.crc32(text.encode('utf-8')) % 1000 < self.positive_rate * 1000
+        return {'decision': 'yes', 'certainty': 95, 'reason': 'treat offered'} if positive else \
+            {'decision': 'no', 'certainty': 80, 'reason': 'not an offer'}
+
+
+class _FakeSlackApp:
+    def __init__(self):
+        self.client = SimpleNamespace(chat_postMessage=lambda **kwargs: None)
+
+    def message(self, *args, **kwargs):
+        return lambda func: func
+
+    def event(self, *args, **kwargs):
+        return lambda func: func
+
+
+def _photo(seed: int, size: Tuple[int, int]) -> bytes:
+    """A noisy, photo-like JPEG so decode and re-encode costs are realistic."""
+    rng = random.Random(seed)
+    img = Image.effect_noise(size, 40).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        radius = rng.randrange(50, 300)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class ImageServer:
+    """Serves a handful of generated JPEGs at http://127.0.0.1:<port>/image/<n>.jpg."""
+
+    def __init__(self, count: int = 8, size: Tuple[int, int] = (1600, 1200)):
+        self.images = [_photo(seed, size) for seed in range(count)]
+        self.size = size
+        photos = self.images
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    body = photos[int(self.path.rsplit('/', 1)[-1].split('.')[0])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='cake-radar-bench-images', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, index: int) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/image/{index % len(self.images)}.jpg"
+
+
+def synthetic_events(
+    count: int,
+    image_server: ImageServer,
+    keyword_rate: float = 0.6,
+    image_rate: float = 0.3,
+    edit_rate: float = 0.05,
+    retry_rate: float = 0.05,
+    seed: int = 0,
+) -> List[Dict]:
+    """Generate `message` and `message_changed` events like the ones Slack delivers."""
+    rng = random.Random(seed)
+    treats = [keyword for keyword in Config.KEYWORDS if ' ' not in keyword] or ['cake']
+    events, sent = [], []
+    for index in range(count):
+        roll = rng.random()
+        if sent and roll < retry_rate:
+            events.append(rng.choice(sent))
+            continue
+        if sent and roll < retry_rate + edit_rate:
+            original = rng.choice(sent)
+            events.append({
+                'type': 'message', 'subtype': 'message_changed',
+                'channel': original['channel'], 'channel_type': 'channel',
+                'message': {**original, 'text': original['text'] + f" and some {rng.choice(treats)} too"},
+                'previous_message': {'ts': original['ts']},
+            })
+            continue
+
+        if rng.random() < keyword_rate:
+            text = rng.choice(_TREAT_TEMPLATES).format(treat=rng.choice(treats), location=rng.choice(_LOCATIONS))
+        else:
+            text = rng.choice(_FILLER_TEXTS)
+        message = {
+            'type': 'message', 'channel': f"C{index % 7:03d}", 'channel_type': 'channel',
+            'user': f"U{rng.randrange(50):03d}", 'ts': f"{1700000000 + index}.{rng.randrange(10 ** 6):06d}",
+            'text': f"{text} #{index}",
+        }
+        if rng.random() < image_rate:
+            width, height = image_server.size
+            message['files'] = [{
+                'id': f"F{index:06d}", 'mimetype': 'image/jpeg', 'timestamp': 1700000000 + index,
+                'url_private': image_server.url(index), 'original_w': width, 'original_h': height,
+            }]
+        sent.append(message)
+        events.append(message)
+    return events
+
+
+def load_corpus(path: str) -> List[Dict]:
+    """Read recorded Slack events, one JSON object (bare or `event_callback` envelope) per line."""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                payload = json.loads(line)
+                events.append(payload.get('event', payload))
+    return events
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        'p50_ms': round(1000 * percentile(ordered, 0.50), 3),
+        'p95_ms': round(1000 * percentile(ordered, 0.95), 3),
+        'p99_ms': round(1000 * percentile(ordered, 0.99), 3),
+        'max_ms': round(1000 * ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def replay(events: List[Dict], concurrency: int, say_latency: float = 0.05) -> Dict:
+    """Feed `events` through the Slack handlers and collect latency samples."""
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    alerts = []
+
+    def on_stage(value, labels):
+        with lock:
+            samples[('stages', labels['stage'])].append(value)
+
+    def on_judge(value, labels):
+        with lock:
+            samples[('judges', labels['judge'])].append(value)
+
+    def say(channel, text):
+        time.sleep(say_latency)
+        alerts.append(text)
+
+    def handle(event):
+        start = time.perf_counter()
+        if event.get('subtype') == 'message_changed':
+            cake_radar.handle_message_events(event, say)
+        else:
+            cake_radar.handle_message(event, say)
+        elapsed = time.perf_counter() - start
+        with lock:
+            samples[('end_to_end', 'event')].append(elapsed)
+
+    metrics.STAGE_SECONDS.add_listener(on_stage)
+    metrics.JUDGE_SECONDS.add_listener(on_judge)
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='cake-radar-bench') as pool:
+            list(pool.map(handle, events))
+    finally:
+        metrics.STAGE_SECONDS.remove_listener(on_stage)
+        metrics.JUDGE_SECONDS.remove_listener(on_judge)
+    duration = time.perf_counter() - started
+
+    result = {
+        'events': len(events),
+        'alerts': len(alerts),
+        'duration_s': round(duration, 3),
+        'throughput_eps': round(len(events) / duration, 2) if duration else 0.0,
+        'end_to_end': summarize(samples[('end_to_end', 'event')]),
+        'stages': {},
+        'judges': {},
+    }
+    for (group, name), values in sorted(samples.items()):
+        if group != 'end_to_end':
+            result[group][name] = summarize(values)
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _config_override(assignment: str) -> Tuple[str, object]:
+    name, _, raw = assignment.partition('=')
+    if not hasattr(Config, name):
+        raise argparse.ArgumentTypeError(f"unknown setting {name!r}")
+    try:
+        return name, json.loads(raw)
+    except json.JSONDecodeError:
+        return name, raw
+
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """Human-readable p50/p95 deltas per stage between two result files."""
+    lines = [f"{'stage':<24}{'p50 ms':>18}{'p95 ms':>18}"]
+    rows = [('end_to_end', baseline.get('end_to_end'), current.get('end_to_end'))]
+    for group in ('stages', 'judges'):
+        for name, stats in current.get(group, {}).items():
+            rows.append((name, baseline.get(group, {}).get(name), stats))
+    for name, before, after in rows:
+        cells = []
+        for key in ('p50_ms', 'p95_ms'):
+            if before and before[key]:
+                change = 100 * (after[key] - before[key]) / before[key]
+                cells.append(f"{after[key]:>9.1f} ({change:+5.0f}%)")
+            else:
+                cells.append(f"{after[key]:>9.1f}        ")
+        lines.append(f"{name:<24}{cells[0]:>18}{cells[1]:>18}")
+    lines.append(f"throughput: {baseline.get('throughput_eps')} -> {current.get('throughput_eps')} events/s")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Cake Radar pipeline with stub clients")
+    parser.add_argument('--events', type=int, default=200, help="Number of synthetic events")
+    parser.add_argument('--corpus', help="JSONL of recorded Slack events instead of synthetic ones")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=300, help="Median fake OpenAI latency")
+    parser.add_argument('--jitter', type=float, default=0.5, help="Log-normal sigma of the OpenAI latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of OpenAI calls failing with a 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of OpenAI calls failing with a 429")
+    parser.add_argument('--positive-rate', type=float, default=0.3, help="Share of messages the classifier says yes to")
+    parser.add_argument('--image-rate', type=float, default=0.3)
+    parser.add_argument('--slack-latency-ms', type=float, default=50, help="Simulated chat.postMessage latency")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--set', dest='overrides', action='append', type=_config_override, default=[],
+                        metavar='SETTING=VALUE', help="Override a Config setting, e.g. --set JUDGE_EARLY_EXIT=true")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', help="Print deltas against an earlier results file")
+    args = parser.parse_args(argv)
+
+    for name, value in args.overrides:
+        setattr(Config, name, value)
+
+    fake_openai = FakeOpenAI(
+        args.latency_ms, args.jitter, args.error_rate, args.rate_limit_rate, args.positive_rate, args.seed,
+    )
+    cake_radar.initialize(slack_app=_FakeSlackApp(), openai_client=fake_openai, validate_config=False)
+    for store in (cake_radar.processed_messages, cake_radar.evaluated_messages, classifier.result_cache, images.image_cache):
+        store.clear()
+
+    # Keep per-message INFO lines out of the timings and the output
+    root_logger = logging.getLogger()
+    log_level = root_logger.level
+    root_logger.setLevel(logging.WARNING)
+    try:
+        with ImageServer() as image_server:
+            if args.corpus:
+                events = load_corpus(args.corpus)
+            else:
+                events = synthetic_events(args.events, image_server, image_rate=args.image_rate, seed=args.seed)
+            result = replay(events, args.concurrency, args.slack_latency_ms / 1000)
+    finally:
+        root_logger.setLevel(log_level)
+
+    result = {
+        'git_commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'openai_calls': fake_openai.calls,
+        **result,
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            print('\n'.join(compare(json.load(f), result)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
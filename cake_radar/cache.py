@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def approximate_size(obj: Any) -> int:
+    """Rough bytes held by `obj`, following tuples, lists, sets and dicts."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key) + approximate_size(value) for key, value in obj.items())
+    elif isinstance(obj, (tuple, list, set, frozenset)):
+        size += sum(approximate_size(item) for item in obj)
+    return size
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Expiry uses wall-clock time so that entries saved with `save` keep their
+    remaining lifetime when loaded again after a restart. With `max_bytes` set,
+    least recently used entries are also evicted once the summed `sizeof` of
+    the values, plus `key_sizeof` of the keys if given, exceeds it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.time,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] = None,
+        key_sizeof: Callable[[Hashable], int] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._key_sizeof = key_sizeof or (lambda key: 0)
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether `key` holds an unexpired entry; does not count as a lookup."""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(key, self._clock() + self.ttl, value)
+            self._evictions += self._shrink()
+
+    def add(self, key: Hashable, value: Any = True) -> bool:
+        """Insert `key` unless it already holds an unexpired entry, as one atomic step.
+
+        Returns True if the key was inserted. A key that is already present counts
+        as a hit and keeps its original expiry.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            now = self._clock()
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                return False
+            if entry is not None:
+                self._expirations += 1
+            self._misses += 1
+            if self.maxsize > 0:
+                self._store(key, now + self.ttl, value)
+                self._evictions += self._shrink()
+            return True
+
+    def _remove(self, key: Hashable):
+        _, value = self._data.pop(key)
+        self._bytes -= self._sizeof(value) + self._key_sizeof(key)
+
+    def _store(self, key: Hashable, expires_at: float, value: Any):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (expires_at, value)
+        self._bytes += self._sizeof(value) + self._key_sizeof(key)
+
+    def _shrink(self) -> int:
+        evicted = 0
+        while self._data and (
+            len(self._data) > self.maxsize or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._data)))
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+    def save(self, path: str):
+        """Write unexpired entries to `path` as JSON; keys must be strings."""
+        now = self._clock()
+        with self._lock:
+            entries = [[key, expires_at, value] for key, (expires_at, value) in self._data.items() if expires_at > now]
+        # Several workers may save the same file at exit, so each writes its own temp file
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: str) -> int:
+        """Load entries written by `save`, skipping expired ones. Returns the number loaded."""
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logging.warning(f"Could not load cache from {path}: {e}")
+            return 0
+
+        now = self._clock()
+        loaded = 0
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at > now:
+                    self._store(key, expires_at, value)
+                    loaded += 1
+            self._shrink()
+        return loaded
@@ -1,8 +1,34 @@
+import asyncio
+import atexit
+import hashlib
 import json
 import logging
-from typing import Callable, Dict, List
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
 
+from . import metrics, ratelimit
+from .cache import TTLCache, approximate_size
 from .config import Config
+from .images import image_digest
+
+
+# Number of overturn votes needed to suppress a classifier 'yes'
+JUDGE_OVERTURN_QUORUM = 3
+
+_judge_executor = None
+_judge_executor_lock = threading.Lock()
+_batcher = None
+_batcher_lock = threading.Lock()
+
+# Classifier decisions and judge-panel verdicts, keyed by normalized prompt text and image digests
+result_cache = TTLCache(
+    Config.RESULT_CACHE_SIZE, Config.RESULT_CACHE_TTL,
+    max_bytes=Config.RESULT_CACHE_MAX_BYTES, sizeof=approximate_size, key_sizeof=approximate_size,
+)
+_result_cache_loaded = False
 
 
 def openai_operational_error_kind(error: Exception) -> str:
@@ -26,10 +52,97 @@ def _user_content(prompt_text: str, image_data_uris: List[str] = None):
 
     user_content = [{"type": "text", "text": prompt_text}]
     for uri in image_data_uris:
-        user_content.append({"type": "image_url", "image_url": {"url": uri, "detail": "low"}})
+        user_content.append({"type": "image_url", "image_url": {"url": uri, "detail": Config.IMAGE_DETAIL}})
     return user_content
 
 
+def load_result_cache():
+    """Load the persisted result cache once and save it again at exit, if RESULT_CACHE_PATH is set."""
+    global _result_cache_loaded
+    if _result_cache_loaded or not Config.RESULT_CACHE_PATH:
+        return
+    _result_cache_loaded = True
+    loaded = result_cache.load(Config.RESULT_CACHE_PATH)
+    logging.info(f"Loaded {loaded} cached classifier results from {Config.RESULT_CACHE_PATH}")
+    atexit.register(save_result_cache)
+
+
+def save_result_cache():
+    if not Config.RESULT_CACHE_PATH:
+        return
+    try:
+        result_cache.save(Config.RESULT_CACHE_PATH)
+    except Exception as e:
+        logging.error(f"Failed to save result cache to {Config.RESULT_CACHE_PATH}: {e}")
+
+
+def _normalize_text(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _cache_key(kind: str, model: str, prompts: List[str], texts: List[str], image_data_uris: List[str] = None) -> str:
+    """Hash the model, prompts, whitespace/case-normalized texts and image fingerprints into a cache key."""
+    digest = hashlib.sha256()
+    for part in [kind, model, *prompts, *(_normalize_text(text) for text in texts)]:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    for uri in image_data_uris or []:
+        digest.update(image_digest(uri).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _classifier_cache_key(message_text: str, image_data_uris: List[str] = None) -> str:
+    return _cache_key(
+        'classifier', Config.OPENAI_MODEL,
+        [Config.SYSTEM_PROMPT, Config.USER_PROMPT_TEMPLATE],
+        [message_text],
+        image_data_uris,
+    )
+
+
+def _judge_cache_key(message_text: str, classifier_reason: str, image_data_uris: List[str] = None) -> str:
+    if _consolidated_panel():
+        templates = [Config.JUDGE_PANEL_SYSTEM_PROMPT, Config.JUDGE_PANEL_USER_PROMPT_TEMPLATE]
+    else:
+        templates = [Config.JUDGE_USER_PROMPT_TEMPLATE]
+    return _cache_key(
+        'judge', Config.JUDGE_MODEL,
+        [judge['prompt'] for judge in Config.JUDGE_SYSTEM_PROMPTS] + templates,
+        [message_text, classifier_reason],
+        image_data_uris,
+    )
+
+
+def _cached_result(key: str):
+    cached = result_cache.get(key)
+    if cached is None:
+        return None
+    # Served from cache: no tokens were spent on this lookup
+    return {**cached, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached': True}
+
+
+def is_classifier_error(result: Dict) -> bool:
+    """Whether `result` stands for a failed call rather than an answer.
+
+    Errors and unparseable responses have no reason.
+    """
+    return result['decision'] not in ('yes', 'no') or not result.get('reason')
+
+
+def _store_classifier_result(key: str, result: Dict):
+    # Failed calls should be retried, not remembered
+    if not is_classifier_error(result):
+        result_cache.put(key, result)
+
+
+def _store_judge_result(key: str, result: Dict):
+    if not any(
+        vote['reason'] == 'judge_error' or vote['reason'].startswith('parse_error')
+        for vote in result['votes']
+    ):
+        result_cache.put(key, result)
+
+
 def _usage(response):
     usage = getattr(response, 'usage', None)
     return {
@@ -38,27 +151,92 @@ def _usage(response):
     }
 
 
+def _classifier_result(parsed: Dict, usage: Dict) -> Dict:
+    decision = str(parsed.get('decision', '')).strip().lower()
+    if decision not in ('yes', 'no'):
+        raise ValueError(f"unexpected decision {decision!r}")
+
+    total_certainty = int(parsed.get('certainty', parsed.get('total_certainty', 0)))
+    total_certainty = max(0, min(total_certainty, 100))
+    reason = str(parsed.get('reason', '')).strip().lower()
+    return {
+        'decision': decision,
+        'total_certainty': total_certainty,
+        'reason': reason,
+        **usage,
+    }
+
+
 def parse_classifier_response(raw_response: str, response=None) -> Dict:
     try:
-        parsed = json.loads(raw_response)
-        decision = str(parsed.get('decision', '')).strip().lower()
-        if decision not in ('yes', 'no'):
-            raise ValueError(f"unexpected decision {decision!r}")
-
-        total_certainty = int(parsed.get('certainty', parsed.get('total_certainty', 0)))
-        total_certainty = max(0, min(total_certainty, 100))
-        reason = str(parsed.get('reason', '')).strip().lower()
-        return {
-            'decision': decision,
-            'total_certainty': total_certainty,
-            'reason': reason,
-            **_usage(response),
-        }
+        return _classifier_result(json.loads(raw_response), _usage(response))
     except Exception as e:
         logging.error(f"Error parsing OpenAI response: {e}")
         return {'decision': 'no', 'total_certainty': 0, 'reason': '', 'prompt_tokens': 0, 'completion_tokens': 0}
 
 
+def _reported_tokens(response, estimate: int) -> int:
+    usage = _usage(response)
+    total = usage['prompt_tokens'] + usage['completion_tokens']
+    return total if isinstance(total, int) and total > 0 else estimate
+
+
+def _create(openai_client, request: Dict, kind: str):
+    """Call OpenAI through the model's rate limiter, retrying 429s after backing off."""
+    limiter = ratelimit.get_limiter(request['model'])
+    priority = ratelimit.JUDGE if kind == 'judge' else ratelimit.CLASSIFIER
+    estimate = ratelimit.estimate_tokens(request)
+    for _ in range(Config.OPENAI_RATE_LIMIT_RETRIES + 1):
+        limiter.acquire(estimate, priority, Config.OPENAI_QUEUE_TIMEOUT)
+        try:
+            response = openai_client.chat.completions.create(**request)
+        except Exception as e:
+            backoff = ratelimit.retry_after(e)
+            limiter.release(rate_limited=backoff is not None, retry_after=backoff)
+            metrics.record_openai_call(request['model'], kind, error=e)
+            if backoff is None:
+                raise
+            logging.warning(f"OPENAI_RATE_LIMITED | {request['model']} | {kind} | retry_after={backoff}")
+            continue
+        limiter.release(_reported_tokens(response, estimate) - estimate)
+        metrics.record_openai_call(request['model'], kind, response)
+        return response
+    raise ratelimit.RateLimitExceeded(f"{request['model']} still rate limited after {Config.OPENAI_RATE_LIMIT_RETRIES} retries")
+
+
+async def _async_create(openai_client, request: Dict, kind: str):
+    limiter = ratelimit.get_limiter(request['model'])
+    priority = ratelimit.JUDGE if kind == 'judge' else ratelimit.CLASSIFIER
+    estimate = ratelimit.estimate_tokens(request)
+    for _ in range(Config.OPENAI_RATE_LIMIT_RETRIES + 1):
+        await limiter.async_acquire(estimate, priority, Config.OPENAI_QUEUE_TIMEOUT)
+        try:
+            response = await openai_client.chat.completions.create(**request)
+        except Exception as e:
+            backoff = ratelimit.retry_after(e)
+            limiter.release(rate_limited=backoff is not None, retry_after=backoff)
+            metrics.record_openai_call(request['model'], kind, error=e)
+            if backoff is None:
+                raise
+            logging.warning(f"OPENAI_RATE_LIMITED | {request['model']} | {kind} | retry_after={backoff}")
+            continue
+        limiter.release(_reported_tokens(response, estimate) - estimate)
+        metrics.record_openai_call(request['model'], kind, response)
+        return response
+    raise ratelimit.RateLimitExceeded(f"{request['model']} still rate limited after {Config.OPENAI_RATE_LIMIT_RETRIES} retries")
+
+
+def _classifier_request(content) -> Dict:
+    return {
+        'model': Config.OPENAI_MODEL,
+        'messages': [
+            {"role": "system", "content": Config.SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ],
+        'response_format': {"type": "json_object"},
+    }
+
+
 def assess_certainty(
     openai_client,
     message_text: str,
@@ -66,101 +244,415 @@ def assess_certainty(
     image_data_uris: List[str] = None,
 ) -> Dict:
     """Assess the likelihood of the message being about offering something."""
+    key = _classifier_cache_key(message_text, image_data_uris)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
+
+    if Config.CLASSIFIER_BATCH_SIZE > 1 and not image_data_uris:
+        result = _get_batcher().classify(openai_client, message_text, notify_operational_error)
+    else:
+        result = _assess_certainty(openai_client, message_text, notify_operational_error, image_data_uris)
+    _store_classifier_result(key, result)
+    return result
+
+
+def _classifier_error(error: Exception, notify_operational_error, can_retry: bool) -> Optional[Dict]:
+    """Log and report a failed classifier call; return its result, or None to retry without images."""
+    if isinstance(error, ratelimit.RateLimitExceeded):
+        logging.error(f"OpenAI classifier rate limited, not evaluated: {error}")
+        return {'decision': 'error', 'total_certainty': 0, 'reason': 'rate_limited', 'prompt_tokens': 0, 'completion_tokens': 0}
+    notify_operational_error(error, 'classifier')
+    kind = openai_operational_error_kind(error)
+    if kind:
+        logging.error(f"OpenAI classifier operational error: {error}")
+        return {'decision': 'error', 'total_certainty': 0, 'reason': kind, 'prompt_tokens': 0, 'completion_tokens': 0}
+    if can_retry:
+        logging.warning(f"OpenAI image error, retrying without images: {error}")
+        return None
+    logging.error(f"Error assessing certainty: {error}")
+    return {'decision': 'no', 'total_certainty': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+
+def _classifier_retry_error(error: Exception, notify_operational_error) -> Dict:
+    notify_operational_error(error, 'classifier_retry_without_images')
+    logging.error(f"Error assessing certainty: {error}")
+    kind = openai_operational_error_kind(error)
+    return {'decision': 'error' if kind else 'no', 'total_certainty': 0, 'reason': kind, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+
+def _assess_certainty(openai_client, message_text: str, notify_operational_error, image_data_uris: List[str] = None) -> Dict:
     prompt_text = Config.USER_PROMPT_TEMPLATE.format(message_text=message_text)
     user_content = _user_content(prompt_text, image_data_uris)
 
-    def _call_openai(content):
-        return openai_client.chat.completions.create(
-            model=Config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": Config.SYSTEM_PROMPT},
-                {"role": "user", "content": content}
-            ],
-            response_format={"type": "json_object"},
-        )
+    try:
+        response = _create(openai_client, _classifier_request(user_content), 'classifier')
+    except Exception as e:
+        result = _classifier_error(e, notify_operational_error, bool(image_data_uris))
+        if result is not None:
+            return result
+        try:
+            response = _create(openai_client, _classifier_request(prompt_text), 'classifier')
+        except Exception as e2:
+            return _classifier_retry_error(e2, notify_operational_error)
 
+    return parse_classifier_response(response.choices[0].message.content, response)
+
+
+def _batch_classifier_request(message_texts: List[str]) -> Dict:
+    messages_json = json.dumps([{'id': str(index), 'text': text} for index, text in enumerate(message_texts)])
+    return _classifier_request(Config.BATCH_USER_PROMPT_TEMPLATE.format(messages_json=messages_json))
+
+
+def parse_batch_classifier_response(raw_response: str, count: int, response=None) -> Dict[str, Dict]:
+    """Map message ids to classifier results; ids missing or malformed in the response are left out."""
+    usage = _usage(response)
+    # Token usage is shared evenly between the messages of the batch
+    share = {name: value // count if isinstance(value, int) else 0 for name, value in usage.items()}
     try:
-        response = _call_openai(user_content)
+        entries = json.loads(raw_response).get('results', [])
     except Exception as e:
-        notify_operational_error(e, 'classifier')
-        if openai_operational_error_kind(e):
-            logging.error(f"OpenAI classifier operational error: {e}")
-            return {
-                'decision': 'error',
-                'total_certainty': 0,
-                'reason': openai_operational_error_kind(e),
-                'prompt_tokens': 0,
-                'completion_tokens': 0,
-            }
-        if image_data_uris:
-            logging.warning(f"OpenAI image error, retrying without images: {e}")
+        logging.error(f"Error parsing batched OpenAI response: {e}")
+        return {}
+
+    results = {}
+    for entry in entries if isinstance(entries, list) else []:
+        try:
+            message_id = str(entry['id'])
+            if message_id not in results and 0 <= int(message_id) < count:
+                results[message_id] = _classifier_result(entry, share)
+        except Exception as e:
+            logging.warning(f"Skipping malformed batched classifier entry {entry!r}: {e}")
+    return results
+
+
+class ClassifierBatcher:
+    """Collects text-only classifier calls for a short window and sends them as one request.
+
+    Callers block until their own result is available, or for at most
+    `timeout` seconds. Messages the batched response does not answer cleanly
+    and whole batches whose request fails are classified one by one with the
+    regular prompt, concurrently on the pool. A caller that times out cancels
+    its entry so the batch does not pay for it again, and classifies alone.
+    """
+
+    def __init__(self, max_size: int, window: float, workers: int = 4, timeout: float = 30.0):
+        self.max_size = max_size
+        self.window = window
+        self.timeout = timeout
+        self._pending = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cake-radar-classify')
+        self._thread = threading.Thread(target=self._collect, name='cake-radar-batcher', daemon=True)
+        self._thread.start()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def classify(self, openai_client, message_text: str, notify_operational_error) -> Dict:
+        future = Future()
+        self._pending.put((openai_client, message_text, notify_operational_error, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            if not future.cancel():
+                # Its own single call already started on the pool
+                return future.result()
+            self._count('timeouts')
+            logging.warning(f"Batched classifier result not ready after {self.timeout:.0f}s, classifying alone")
+            return _assess_certainty(openai_client, message_text, notify_operational_error)
+
+    def _collect(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Requests run on the pool so the next window starts collecting immediately
+            by_client = {}
+            for item in batch:
+                by_client.setdefault(id(item[0]), []).append(item)
+            for items in by_client.values():
+                self._executor.submit(self._classify_batch, items)
+
+    def _classify_batch(self, items: List[tuple]):
+        # Skip entries whose caller already gave up and classified alone
+        items = [item for item in items if not item[3].cancelled()]
+        if not items:
+            return
+        openai_client = items[0][0]
+        results = {}
+        if len(items) > 1:
+            self._count('batches')
             try:
-                response = _call_openai(prompt_text)
-            except Exception as e2:
-                notify_operational_error(e2, 'classifier_retry_without_images')
-                logging.error(f"Error assessing certainty: {e2}")
-                return {
-                    'decision': 'error' if openai_operational_error_kind(e2) else 'no',
-                    'total_certainty': 0,
-                    'reason': openai_operational_error_kind(e2),
-                    'prompt_tokens': 0,
-                    'completion_tokens': 0,
-                }
-        else:
-            logging.error(f"Error assessing certainty: {e}")
-            return {'decision': 'no', 'total_certainty': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+                response = _create(openai_client, _batch_classifier_request([item[1] for item in items]), 'classifier_batch')
+                results = parse_batch_classifier_response(response.choices[0].message.content, len(items), response)
+            except ratelimit.RateLimitExceeded as e:
+                # Fanning out one request per message would only hit the same limit
+                for _, _, notify_operational_error, future in items:
+                    if future.set_running_or_notify_cancel():
+                        future.set_result(_classifier_error(e, notify_operational_error, False))
+                return
+            except Exception as e:
+                logging.warning(f"Batched classifier request for {len(items)} messages failed, classifying one by one: {e}")
+
+        for index, item in enumerate(items):
+            result = results.get(str(index))
+            if result is None:
+                self._executor.submit(self._classify_one, item, len(items) > 1)
+            elif item[3].set_running_or_notify_cancel():
+                item[3].set_result(result)
+
+    def _classify_one(self, item: tuple, fallback: bool):
+        openai_client, message_text, notify_operational_error, future = item
+        if not future.set_running_or_notify_cancel():
+            return
+        if fallback:
+            self._count('fallbacks')
+        try:
+            future.set_result(_assess_certainty(openai_client, message_text, notify_operational_error))
+        except Exception as e:
+            future.set_exception(e)
 
-    return parse_classifier_response(response.choices[0].message.content, response)
+
+def _get_batcher() -> ClassifierBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = ClassifierBatcher(
+                Config.CLASSIFIER_BATCH_SIZE, Config.CLASSIFIER_BATCH_WINDOW_MS / 1000,
+                timeout=Config.CLASSIFIER_BATCH_TIMEOUT,
+            )
+        return _batcher
+
+
+def _judge_verdict(parsed: Dict, raw_response: str) -> Dict:
+    verdict = str(parsed.get('verdict', '')).strip().lower()
+    if verdict not in ('uphold', 'overturn'):
+        logging.warning(f"Judge returned unexpected verdict {verdict!r}, defaulting to uphold")
+        return {'verdict': 'uphold', 'reason': f'parse_error: {raw_response[:80]}'}
+    return {'verdict': verdict, 'reason': str(parsed.get('reason', '')).strip().lower()}
 
 
 def parse_judge_response(raw_response: str) -> Dict:
     try:
-        parsed = json.loads(raw_response)
-        verdict = str(parsed.get('verdict', '')).strip().lower()
-        if verdict not in ('uphold', 'overturn'):
-            logging.warning(f"Judge returned unexpected verdict {verdict!r}, defaulting to uphold")
-            return {'verdict': 'uphold', 'reason': f'parse_error: {raw_response[:80]}'}
-        return {'verdict': verdict, 'reason': str(parsed.get('reason', '')).strip().lower()}
+        return _judge_verdict(json.loads(raw_response), raw_response)
     except Exception as e:
         logging.error(f"Error parsing judge response, defaulting to uphold: {e}")
         return {'verdict': 'uphold', 'reason': 'parse_error'}
 
 
+def _judge_request(judge_config: Dict, content) -> Dict:
+    return {
+        'model': Config.JUDGE_MODEL,
+        'messages': [
+            {"role": "system", "content": judge_config['prompt']},
+            {"role": "user", "content": content},
+        ],
+        'response_format': {"type": "json_object"},
+    }
+
+
 def _run_judge(openai_client, judge_config: Dict, prompt_text: str, user_content, notify_operational_error) -> Dict:
+    with metrics.JUDGE_SECONDS.time(judge=judge_config['name']):
+        return _judge_vote(openai_client, judge_config, prompt_text, user_content, notify_operational_error)
+
+
+def _judge_error(error: Exception, label: str, context: str, notify_operational_error, can_retry: bool) -> bool:
+    """Log and report a failed judge call; True if it should be retried without images."""
+    if isinstance(error, ratelimit.RateLimitExceeded):
+        logging.error(f"{label} rate limited, defaulting to uphold: {error}")
+        return False
+    notify_operational_error(error, context)
+    if can_retry:
+        logging.warning(f"{label} image error, retrying without images: {error}")
+        return True
+    logging.error(f"{label} error, defaulting to uphold: {error}")
+    return False
+
+
+def _judge_retry_error(error: Exception, label: str, context: str, notify_operational_error):
+    notify_operational_error(error, f'{context}_retry_without_images')
+    logging.error(f"{label} error, defaulting to uphold: {error}")
+
+
+def _error_vote(judge_name: str) -> Dict:
+    return {'name': judge_name, 'verdict': 'uphold', 'reason': 'judge_error'}
+
+
+def _parse_judge_vote(judge_name: str, response) -> Dict:
+    try:
+        result = parse_judge_response(response.choices[0].message.content)
+        return {'name': judge_name, **result}
+    except Exception as e:
+        logging.error(f"Error parsing judge {judge_name} response, defaulting to uphold: {e}")
+        return {'name': judge_name, 'verdict': 'uphold', 'reason': 'parse_error'}
+
+
+def _judge_vote(openai_client, judge_config: Dict, prompt_text: str, user_content, notify_operational_error) -> Dict:
     judge_name = judge_config['name']
+    label, context = f"Judge {judge_name}", f'judge_{judge_name}'
 
-    def _call(content):
-        return openai_client.chat.completions.create(
-            model=Config.JUDGE_MODEL,
-            messages=[
-                {"role": "system", "content": judge_config['prompt']},
-                {"role": "user", "content": content},
-            ],
-            response_format={"type": "json_object"},
+    try:
+        response = _create(openai_client, _judge_request(judge_config, user_content), 'judge')
+    except Exception as e:
+        if not _judge_error(e, label, context, notify_operational_error, user_content != prompt_text):
+            return _error_vote(judge_name)
+        try:
+            response = _create(openai_client, _judge_request(judge_config, prompt_text), 'judge')
+        except Exception as e2:
+            _judge_retry_error(e2, label, context, notify_operational_error)
+            return _error_vote(judge_name)
+
+    return _parse_judge_vote(judge_name, response)
+
+
+_JUDGE_PANEL_MODES = ('separate', 'consolidated')
+_unknown_panel_modes = set()
+
+
+def _consolidated_panel() -> bool:
+    mode = Config.JUDGE_PANEL_MODE
+    if mode not in _JUDGE_PANEL_MODES and mode not in _unknown_panel_modes:
+        _unknown_panel_modes.add(mode)
+        logging.warning(f"Unknown JUDGE_PANEL_MODE {mode!r}, sending one request per judge")
+    return mode == 'consolidated'
+
+
+def _judge_prompt_text(message_text: str, classifier_reason: str) -> str:
+    if _consolidated_panel():
+        return Config.JUDGE_PANEL_USER_PROMPT_TEMPLATE.format(
+            message_text=message_text,
+            classifier_reason=classifier_reason,
+            judge_names=', '.join(judge['name'] for judge in Config.JUDGE_SYSTEM_PROMPTS),
         )
+    return Config.JUDGE_USER_PROMPT_TEMPLATE.format(message_text=message_text, classifier_reason=classifier_reason)
+
+
+def _panel_request(content) -> Dict:
+    system_prompt = Config.JUDGE_PANEL_SYSTEM_PROMPT + ''.join(
+        f"\n\n{judge['name']}: {judge['prompt']}" for judge in Config.JUDGE_SYSTEM_PROMPTS
+    )
+    return _judge_request({'prompt': system_prompt}, content)
+
 
+def _panel_error_votes(reason: str) -> List[Dict]:
+    return [{'name': judge['name'], 'verdict': 'uphold', 'reason': reason} for judge in Config.JUDGE_SYSTEM_PROMPTS]
+
+
+def parse_panel_response(raw_response: str) -> List[Dict]:
+    """Votes in panel order from a consolidated answer; a judge missing from it upholds."""
     try:
-        response = _call(user_content)
+        parsed = json.loads(raw_response)
     except Exception as e:
-        notify_operational_error(e, f'judge_{judge_name}')
-        if user_content != prompt_text:
-            logging.warning(f"Judge {judge_name} image error, retrying without images: {e}")
+        logging.error(f"Error parsing judge panel response, defaulting to uphold: {e}")
+        return _panel_error_votes('parse_error')
+
+    votes = []
+    for judge in Config.JUDGE_SYSTEM_PROMPTS:
+        entry = parsed.get(judge['name']) if isinstance(parsed, dict) else None
+        if isinstance(entry, dict):
+            votes.append({'name': judge['name'], **_judge_verdict(entry, json.dumps(entry))})
+        else:
+            logging.warning(f"Judge panel response has no verdict for {judge['name']}, defaulting to uphold")
+            votes.append({'name': judge['name'], 'verdict': 'uphold', 'reason': 'parse_error'})
+    return votes
+
+
+def _run_consolidated_panel(openai_client, prompt_text: str, user_content, notify_operational_error) -> List[Dict]:
+    """Ask for every judge's verdict in a single request."""
+    with metrics.JUDGE_SECONDS.time(judge='panel'):
+        try:
+            response = _create(openai_client, _panel_request(user_content), 'judge')
+        except Exception as e:
+            if not _judge_error(e, "Judge panel", 'judge_panel', notify_operational_error, user_content != prompt_text):
+                return _panel_error_votes('judge_error')
             try:
-                response = _call(prompt_text)
+                response = _create(openai_client, _panel_request(prompt_text), 'judge')
             except Exception as e2:
-                notify_operational_error(e2, f'judge_{judge_name}_retry_without_images')
-                logging.error(f"Judge {judge_name} error, defaulting to uphold: {e2}")
-                return {'name': judge_name, 'verdict': 'uphold', 'reason': 'judge_error'}
-        else:
+                _judge_retry_error(e2, "Judge panel", 'judge_panel', notify_operational_error)
+                return _panel_error_votes('judge_error')
+
+    return parse_panel_response(response.choices[0].message.content)
+
+
+def _get_judge_executor() -> ThreadPoolExecutor:
+    global _judge_executor
+    with _judge_executor_lock:
+        if _judge_executor is None:
+            _judge_executor = ThreadPoolExecutor(
+                max_workers=max(1, Config.JUDGE_MAX_WORKERS),
+                thread_name_prefix='cake-radar-judge',
+            )
+        return _judge_executor
+
+
+def _panel_decided(votes: List[Dict], panel_size: int) -> bool:
+    overturns = sum(1 for vote in votes if vote['verdict'] == 'overturn')
+    upholds = sum(1 for vote in votes if vote['verdict'] == 'uphold')
+    return overturns >= JUDGE_OVERTURN_QUORUM or upholds > panel_size - JUDGE_OVERTURN_QUORUM
+
+
+def _skipped_vote(judge_name: str) -> Dict:
+    return {'name': judge_name, 'verdict': 'skipped', 'reason': 'quorum_reached'}
+
+
+def _record_votes(done, indexes: Dict, results: Dict[int, Dict]) -> bool:
+    """Store the votes of finished judge futures or tasks; True once the outcome is settled.
+
+    A judge that raised upholds. The outcome only counts as settled with
+    `Config.JUDGE_EARLY_EXIT`, so without it every judge is waited for.
+    """
+    judges = Config.JUDGE_SYSTEM_PROMPTS
+    for future in done:
+        index = indexes[future]
+        try:
+            results[index] = future.result()
+        except Exception as e:
+            judge_name = judges[index]['name']
             logging.error(f"Judge {judge_name} error, defaulting to uphold: {e}")
-            return {'name': judge_name, 'verdict': 'uphold', 'reason': 'judge_error'}
+            results[index] = _error_vote(judge_name)
+    return Config.JUDGE_EARLY_EXIT and _panel_decided(list(results.values()), len(judges))
 
-    try:
-        result = parse_judge_response(response.choices[0].message.content)
-        return {'name': judge_name, **result}
-    except Exception as e:
-        logging.error(f"Error parsing judge {judge_name} response, defaulting to uphold: {e}")
-        return {'name': judge_name, 'verdict': 'uphold', 'reason': 'parse_error'}
+
+def _panel_votes(results: Dict[int, Dict]) -> List[Dict]:
+    return [
+        results.get(index) or _skipped_vote(judge_config['name'])
+        for index, judge_config in enumerate(Config.JUDGE_SYSTEM_PROMPTS)
+    ]
+
+
+def _run_panel(openai_client, prompt_text: str, user_content, notify_operational_error) -> List[Dict]:
+    """Run every judge concurrently and return votes in panel order.
+
+    With `Config.JUDGE_EARLY_EXIT`, judges still pending once the outcome is
+    settled are cancelled (or ignored if already running) and recorded as skipped.
+    """
+    executor = _get_judge_executor()
+    futures = {
+        executor.submit(_run_judge, openai_client, judge_config, prompt_text, user_content, notify_operational_error): index
+        for index, judge_config in enumerate(Config.JUDGE_SYSTEM_PROMPTS)
+    }
+
+    results: Dict[int, Dict] = {}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if _record_votes(done, futures, results) and pending:
+            for future in pending:
+                future.cancel()
+            break
+    return _panel_votes(results)
 
 
 def judge_decision(
@@ -171,23 +663,153 @@ def judge_decision(
     image_data_uris: List[str] = None,
 ) -> Dict:
     """Run a small judge panel over a classifier 'yes'."""
-    prompt_text = Config.JUDGE_USER_PROMPT_TEMPLATE.format(
-        message_text=message_text, classifier_reason=classifier_reason
-    )
+    key = _judge_cache_key(message_text, classifier_reason, image_data_uris)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
+
+    prompt_text = _judge_prompt_text(message_text, classifier_reason)
     user_content = _user_content(prompt_text, image_data_uris)
 
-    votes = [
-        _run_judge(openai_client, judge_config, prompt_text, user_content, notify_operational_error)
-        for judge_config in Config.JUDGE_SYSTEM_PROMPTS
-    ]
+    if _consolidated_panel():
+        votes = _run_consolidated_panel(openai_client, prompt_text, user_content, notify_operational_error)
+    else:
+        votes = _run_panel(openai_client, prompt_text, user_content, notify_operational_error)
+    result = _panel_result(votes)
+    _store_judge_result(key, result)
+    return result
+
+
+def _panel_result(votes: List[Dict]) -> Dict:
     overturns = sum(1 for vote in votes if vote['verdict'] == 'overturn')
-    verdict = 'overturn' if overturns >= 3 else 'uphold'
+    verdict = 'overturn' if overturns >= JUDGE_OVERTURN_QUORUM else 'uphold'
     reason = '; '.join(
         f"{vote['name']}={vote['verdict']}:{vote['reason']}" for vote in votes
     )
     return {'verdict': verdict, 'reason': reason, 'votes': votes}
 
 
+async def async_assess_certainty(
+    openai_client,
+    message_text: str,
+    notify_operational_error: Callable[[Exception, str], None],
+    image_data_uris: List[str] = None,
+) -> Dict:
+    """Async variant of `assess_certainty` for an `AsyncOpenAI` client."""
+    key = _classifier_cache_key(message_text, image_data_uris)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
+
+    result = await _async_assess_certainty(openai_client, message_text, notify_operational_error, image_data_uris)
+    _store_classifier_result(key, result)
+    return result
+
+
+async def _async_assess_certainty(openai_client, message_text: str, notify_operational_error, image_data_uris: List[str] = None) -> Dict:
+    prompt_text = Config.USER_PROMPT_TEMPLATE.format(message_text=message_text)
+    user_content = _user_content(prompt_text, image_data_uris)
+
+    try:
+        response = await _async_create(openai_client, _classifier_request(user_content), 'classifier')
+    except Exception as e:
+        result = _classifier_error(e, notify_operational_error, bool(image_data_uris))
+        if result is not None:
+            return result
+        try:
+            response = await _async_create(openai_client, _classifier_request(prompt_text), 'classifier')
+        except Exception as e2:
+            return _classifier_retry_error(e2, notify_operational_error)
+
+    return parse_classifier_response(response.choices[0].message.content, response)
+
+
+async def _async_run_judge(openai_client, judge_config: Dict, prompt_text: str, user_content, notify_operational_error) -> Dict:
+    with metrics.JUDGE_SECONDS.time(judge=judge_config['name']):
+        return await _async_judge_vote(openai_client, judge_config, prompt_text, user_content, notify_operational_error)
+
+
+async def _async_judge_vote(openai_client, judge_config: Dict, prompt_text: str, user_content, notify_operational_error) -> Dict:
+    judge_name = judge_config['name']
+    label, context = f"Judge {judge_name}", f'judge_{judge_name}'
+
+    try:
+        response = await _async_create(openai_client, _judge_request(judge_config, user_content), 'judge')
+    except Exception as e:
+        if not _judge_error(e, label, context, notify_operational_error, user_content != prompt_text):
+            return _error_vote(judge_name)
+        try:
+            response = await _async_create(openai_client, _judge_request(judge_config, prompt_text), 'judge')
+        except Exception as e2:
+            _judge_retry_error(e2, label, context, notify_operational_error)
+            return _error_vote(judge_name)
+
+    return _parse_judge_vote(judge_name, response)
+
+
+async def _async_run_consolidated_panel(openai_client, prompt_text: str, user_content, notify_operational_error) -> List[Dict]:
+    with metrics.JUDGE_SECONDS.time(judge='panel'):
+        try:
+            response = await _async_create(openai_client, _panel_request(user_content), 'judge')
+        except Exception as e:
+            if not _judge_error(e, "Judge panel", 'judge_panel', notify_operational_error, user_content != prompt_text):
+                return _panel_error_votes('judge_error')
+            try:
+                response = await _async_create(openai_client, _panel_request(prompt_text), 'judge')
+            except Exception as e2:
+                _judge_retry_error(e2, "Judge panel", 'judge_panel', notify_operational_error)
+                return _panel_error_votes('judge_error')
+
+    return parse_panel_response(response.choices[0].message.content)
+
+
+async def _async_run_panel(openai_client, prompt_text: str, user_content, notify_operational_error) -> List[Dict]:
+    """Async variant of `_run_panel`; judges run as concurrent tasks."""
+    semaphore = asyncio.Semaphore(max(1, Config.JUDGE_MAX_WORKERS))
+
+    async def _bounded(judge_config):
+        async with semaphore:
+            return await _async_run_judge(openai_client, judge_config, prompt_text, user_content, notify_operational_error)
+
+    tasks = {asyncio.ensure_future(_bounded(judge_config)): index for index, judge_config in enumerate(Config.JUDGE_SYSTEM_PROMPTS)}
+    results: Dict[int, Dict] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if _record_votes(done, tasks, results):
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+    return _panel_votes(results)
+
+
+async def async_judge_decision(
+    openai_client,
+    message_text: str,
+    classifier_reason: str,
+    notify_operational_error: Callable[[Exception, str], None],
+    image_data_uris: List[str] = None,
+) -> Dict:
+    """Async variant of `judge_decision`; judges run as concurrent tasks."""
+    key = _judge_cache_key(message_text, classifier_reason, image_data_uris)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
+
+    prompt_text = _judge_prompt_text(message_text, classifier_reason)
+    user_content = _user_content(prompt_text, image_data_uris)
+
+    if _consolidated_panel():
+        votes = await _async_run_consolidated_panel(openai_client, prompt_text, user_content, notify_operational_error)
+    else:
+        votes = await _async_run_panel(openai_client, prompt_text, user_content, notify_operational_error)
+    result = _panel_result(votes)
+    _store_judge_result(key, result)
+    return result
+
+
 def format_judge_votes(votes: List[Dict]) -> str:
     return '; '.join(
         f"{vote.get('name', 'unknown')}={vote.get('verdict', 'unknown')} ({vote.get('reason', '')})"
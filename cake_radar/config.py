@@ -30,13 +30,103 @@ class Config:
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5.4-nano")
     JUDGE_MODEL = os.getenv("JUDGE_MODEL", "gpt-5.4")
     CERTAINTY_THRESHOLD = int(os.getenv("CERTAINTY_THRESHOLD", "85"))
+    # OpenAI vision detail level ('low', 'high' or 'auto'); also decides which Slack thumbnail is fetched
+    IMAGE_DETAIL = os.getenv("IMAGE_DETAIL", "low")
+    IMAGE_MAX_DATA_URI_BYTES = int(os.getenv("IMAGE_MAX_DATA_URI_BYTES", "200000"))
+    # Processed images are reused by Slack file id; near-identical images (perceptual hash
+    # within this many bits, -1 disables) share classifier results
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(24 * 60 * 60)))
+    IMAGE_PHASH_MAX_DISTANCE = int(os.getenv("IMAGE_PHASH_MAX_DISTANCE", "4"))
+    # Decoding and re-encoding run in this many worker processes, each a full interpreter
+    # per gunicorn worker (0 keeps them in the request thread); JPEG/PNG/GIF/WEBP files up
+    # to IMAGE_INLINE_MAX_BYTES always stay in the request thread
+    IMAGE_TRANSCODE_WORKERS = int(os.getenv("IMAGE_TRANSCODE_WORKERS", "0"))
+    IMAGE_TRANSCODE_TIMEOUT = float(os.getenv("IMAGE_TRANSCODE_TIMEOUT", "10"))
+    IMAGE_INLINE_MAX_BYTES = int(os.getenv("IMAGE_INLINE_MAX_BYTES", str(512 * 1024)))
+    # Larger downloads, or images whose header declares more pixels, are skipped undecoded
+    IMAGE_MAX_SOURCE_BYTES = int(os.getenv("IMAGE_MAX_SOURCE_BYTES", str(25 * 1024 * 1024)))
+    IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "50000000"))
+    # Shared keep-alive pool for Slack file downloads
+    IMAGE_HTTP_POOL_SIZE = int(os.getenv("IMAGE_HTTP_POOL_SIZE", "10"))
+    IMAGE_HTTP_RETRIES = int(os.getenv("IMAGE_HTTP_RETRIES", "2"))
+    IMAGE_HTTP_BACKOFF = float(os.getenv("IMAGE_HTTP_BACKOFF", "0.5"))
+    IMAGE_HTTP_CONNECT_TIMEOUT = float(os.getenv("IMAGE_HTTP_CONNECT_TIMEOUT", "3.05"))
+    IMAGE_HTTP_READ_TIMEOUT = float(os.getenv("IMAGE_HTTP_READ_TIMEOUT", "10"))
+    JUDGE_MAX_WORKERS = int(os.getenv("JUDGE_MAX_WORKERS", "4"))
+    # Text-only classifier calls arriving within the window are sent as one request of up to
+    # CLASSIFIER_BATCH_SIZE messages (1 disables batching)
+    CLASSIFIER_BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "1"))
+    CLASSIFIER_BATCH_WINDOW_MS = float(os.getenv("CLASSIFIER_BATCH_WINDOW_MS", "200"))
+    # Callers waiting longer than this for their batch classify the message on their own
+    CLASSIFIER_BATCH_TIMEOUT = float(os.getenv("CLASSIFIER_BATCH_TIMEOUT", "30"))
+    # Client-side OpenAI limits per model (0 = unlimited); concurrency adapts to 429s and
+    # rate-limited calls are retried up to OPENAI_RATE_LIMIT_RETRIES times
+    OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", "0"))
+    OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", "0"))
+    JUDGE_RPM_LIMIT = float(os.getenv("JUDGE_RPM_LIMIT", "0"))
+    JUDGE_TPM_LIMIT = float(os.getenv("JUDGE_TPM_LIMIT", "0"))
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    OPENAI_RATE_LIMIT_RETRIES = int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "4"))
+    OPENAI_QUEUE_TIMEOUT = float(os.getenv("OPENAI_QUEUE_TIMEOUT", "60"))
+    # Stop waiting for the remaining judges once the panel outcome can no longer change
+    JUDGE_EARLY_EXIT = _env_bool("JUDGE_EARLY_EXIT", False)
+    # 'separate' sends one request per judge; 'consolidated' asks for every judge's verdict in one request.
+    # Any other value logs a warning and runs as 'separate'
+    JUDGE_PANEL_MODE = os.getenv("JUDGE_PANEL_MODE", "separate").strip().lower()
+    # Text-first cascade: classify text alone and only download/attach images when the text
+    # verdict's yes-certainty falls in [MIN, MAX] or the message has fewer than MIN_TEXT_WORDS words
+    CASCADE_ENABLED = _env_bool("CASCADE_ENABLED", False)
+    CASCADE_UNCERTAIN_MIN = int(os.getenv("CASCADE_UNCERTAIN_MIN", "25"))
+    CASCADE_UNCERTAIN_MAX = int(os.getenv("CASCADE_UNCERTAIN_MAX", "90"))
+    CASCADE_MIN_TEXT_WORDS = int(os.getenv("CASCADE_MIN_TEXT_WORDS", "4"))
+    # Local pre-classifier (see cake_radar.prefilter): skip keyword hits it scores below the
+    # threshold; in shadow mode only log what would have been skipped
+    PREFILTER_MODEL_PATH = os.getenv("PREFILTER_MODEL_PATH", "")
+    PREFILTER_THRESHOLD = float(os.getenv("PREFILTER_THRESHOLD", "0.05"))
+    PREFILTER_SHADOW = _env_bool("PREFILTER_SHADOW", False)
+    # Reuse classifier/judge results for repeated text+images; size 0 disables, empty path keeps it in memory only
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1000"))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(6 * 60 * 60)))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
 
     # App Settings
     PORT = int(os.getenv("PORT", 3000))
     SLACK_TOKEN_VERIFICATION_ENABLED = _env_bool("SLACK_TOKEN_VERIFICATION_ENABLED", True)
+    # Slack names for log lines are bulk-loaded and refreshed in the background (0 disables
+    # bulk loading; unknown names are then still looked up one by one);
+    # a snapshot path lets restarts skip the initial bulk load
+    SLACK_DIRECTORY_SIZE = int(os.getenv("SLACK_DIRECTORY_SIZE", "20000"))
+    SLACK_DIRECTORY_TTL = float(os.getenv("SLACK_DIRECTORY_TTL", str(24 * 60 * 60)))
+    SLACK_DIRECTORY_REFRESH_INTERVAL = float(os.getenv("SLACK_DIRECTORY_REFRESH_INTERVAL", str(6 * 60 * 60)))
+    SLACK_DIRECTORY_SNAPSHOT_PATH = os.getenv("SLACK_DIRECTORY_SNAPSHOT_PATH", "")
+    SLACK_DIRECTORY_MAX_BYTES = int(os.getenv("SLACK_DIRECTORY_MAX_BYTES", str(8 * 1024 * 1024)))
+    # Slack retries are deduplicated by (channel, ts) for DEDUP_TTL seconds; edits only
+    # re-evaluate a message seen within EVALUATED_TTL if they add new keywords
+    DEDUP_SIZE = int(os.getenv("DEDUP_SIZE", "10000"))
+    DEDUP_TTL = float(os.getenv("DEDUP_TTL", str(60 * 60)))
+    EVALUATED_TTL = float(os.getenv("EVALUATED_TTL", str(3 * 24 * 60 * 60)))
+    # Approximate byte budget for each in-memory dedup store, on top of DEDUP_SIZE (0 = no byte limit)
+    DEDUP_MAX_BYTES = int(os.getenv("DEDUP_MAX_BYTES", str(8 * 1024 * 1024)))
+    # 'memory' keeps that state per process; 'sqlite' shares it between workers on one host
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").strip().lower()
+    STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "cake-radar-state.db")
+    # Background event processing: 0 workers evaluates messages inline in the request
+    EVENT_QUEUE_WORKERS = int(os.getenv("EVENT_QUEUE_WORKERS", "0"))
+    EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "200"))
+    EVENT_QUEUE_PUT_TIMEOUT = float(os.getenv("EVENT_QUEUE_PUT_TIMEOUT", "0.5"))
+    EVENT_QUEUE_DRAIN_TIMEOUT = float(os.getenv("EVENT_QUEUE_DRAIN_TIMEOUT", "20"))
 
     SYSTEM_PROMPT = "You are a helpful assistant that evaluates whether a Slack message is about offering an edible treat that is currently available or being offered imminently (e.g. 'I brought cake', 'there are snacks in the kitchen'). Do NOT classify as yes if the message is about a future event, party invitation, or calendar announcement, even if food will be present. You may receive a text message, an image, or both. Respond only with a JSON object containing: decision ('yes' or 'no'), certainty (0-100), and reason (brief string)."
-    USER_PROMPT_TEMPLATE = "Respond only as JSON with keys decision, certainty, and reason. The offered item MUST be edible food or a drink — non-food items such as books, merchandise, swag, stickers, or any physical item that cannot be eaten do not qualify, even if they are free or described as a treat. If the message mentions a location or hub outside of Amsterdam, be more confident in 'no'. If the message is primarily about work topics and only tangentially mentions food (e.g. a meeting agenda that includes lunch), be more confident in 'no'. However, if the message clearly offers or announces available treats — even alongside work context like a milestone celebration — classify based on the treat offering. If the message is directed at someone else (e.g. wishing them happy birthday, congratulating them), it is not a treat offering — be very confident in 'no'. Only say 'yes' when the author themselves is offering or announcing available food. If an image is attached and it clearly shows an edible treat, increase your confidence in 'yes'. Message: '{message_text}'"
+    CLASSIFIER_RULES = "The offered item MUST be edible food or a drink — non-food items such as books, merchandise, swag, stickers, or any physical item that cannot be eaten do not qualify, even if they are free or described as a treat. If the message mentions a location or hub outside of Amsterdam, be more confident in 'no'. If the message is primarily about work topics and only tangentially mentions food (e.g. a meeting agenda that includes lunch), be more confident in 'no'. However, if the message clearly offers or announces available treats — even alongside work context like a milestone celebration — classify based on the treat offering. If the message is directed at someone else (e.g. wishing them happy birthday, congratulating them), it is not a treat offering — be very confident in 'no'. Only say 'yes' when the author themselves is offering or announcing available food. If an image is attached and it clearly shows an edible treat, increase your confidence in 'yes'."
+    USER_PROMPT_TEMPLATE = "Respond only as JSON with keys decision, certainty, and reason. " + CLASSIFIER_RULES + " Message: '{message_text}'"
+    # Micro-batched classification: several messages in one request, answered by id
+    BATCH_USER_PROMPT_TEMPLATE = (
+        "Classify each message in the JSON array below on its own. Respond only as JSON with key "
+        "results: a list with one object per message, each with keys id, decision, certainty, and reason. "
+        + CLASSIFIER_RULES + " Messages: {messages_json}"
+    )
 
     JUDGE_SYSTEM_PROMPTS = [
         {
@@ -91,6 +181,17 @@ class Config:
         "Message: '{message_text}'\n\n"
         "Respond only as JSON with keys verdict and reason. Verdict must be 'uphold' or 'overturn'."
     )
+    # Consolidated panel: the JUDGE_SYSTEM_PROMPTS perspectives are appended to this prompt by name
+    JUDGE_PANEL_SYSTEM_PROMPT = (
+        "You act as a panel of independent judges reviewing one Cake Radar alert. Give each judge's "
+        "verdict as that judge alone would, without letting the other perspectives influence it. The judges are:"
+    )
+    JUDGE_PANEL_USER_PROMPT_TEMPLATE = (
+        "The classifier said YES with reason: '{classifier_reason}'.\n\n"
+        "Message: '{message_text}'\n\n"
+        "Respond only as JSON with one key per judge name ({judge_names}), each an object with keys "
+        "verdict and reason. Verdict must be 'uphold' or 'overturn'."
+    )
 
     # Keywords
     KEYWORDS = []
@@ -0,0 +1,220 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from .cache import TTLCache, approximate_size
+
+USERS_PAGE_SIZE = 200
+CHANNELS_PAGE_SIZE = 1000
+# users.list and conversations.list are Tier 2 (20+ calls per minute)
+PAGE_INTERVAL = 3.0
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds Slack asked us to wait, if `error` is a rate-limit response."""
+    response = getattr(error, 'response', None)
+    if response is None or getattr(response, 'status_code', None) != 429:
+        return None
+    try:
+        return float(response.headers.get('Retry-After', 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _user_display_name(user: Dict) -> str:
+    profile = user.get('profile') or {}
+    return '@' + (profile.get('display_name') or profile.get('real_name') or user['id'])
+
+
+class SlackDirectory:
+    """Slack user and channel names for log lines, resolved without blocking the caller.
+
+    The whole workspace is loaded in bulk from `users.list` and `conversations.list`
+    on a background thread and refreshed every `refresh_interval` seconds (0 skips
+    bulk loading). Names that are not known yet are returned as their id and
+    looked up one by one on the same thread; failed lookups are retried after
+    `failure_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        refresh_interval: float,
+        failure_ttl: float = 300,
+        snapshot_path: str = '',
+        page_interval: float = PAGE_INTERVAL,
+        max_bytes: int = 0,
+    ):
+        self.names = TTLCache(maxsize, ttl, max_bytes=max_bytes, sizeof=approximate_size, key_sizeof=approximate_size)
+        self.refresh_interval = refresh_interval
+        self.snapshot_path = snapshot_path
+        self.page_interval = page_interval
+        self.client = None
+        self.refreshed_at = None
+        self._failures = TTLCache(maxsize, failure_ttl, max_bytes=max_bytes, key_sizeof=approximate_size)
+        self._misses = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._rate_limited = 0
+
+    def channel_name(self, channel_id: str) -> str:
+        return self._lookup('channel', channel_id) or channel_id
+
+    def user_name(self, user_id: str) -> str:
+        return self._lookup('user', user_id) or '@' + user_id
+
+    def _lookup(self, kind: str, object_id: str) -> Optional[str]:
+        key = f"{kind}:{object_id}"
+        name = self.names.get(key)
+        if name is not None or not object_id or self._failures.get(key) is not None:
+            return name
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self._misses.put((kind, object_id))
+        return None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _load_snapshot(self) -> int:
+        loaded = self.names.load(self.snapshot_path) if self.snapshot_path else 0
+        if loaded:
+            logging.info(f"Loaded {loaded} Slack names from {self.snapshot_path}")
+        return loaded
+
+    def prefetch(self, client) -> int:
+        """Fill the names now, from the snapshot or else from Slack, without starting a thread.
+
+        Used before gunicorn forks its workers, which then inherit the names.
+        """
+        self.client = client
+        return self._load_snapshot() or self.refresh()
+
+    def start(self, client):
+        """Load the snapshot, if any, and start refreshing from `client` in the background."""
+        self.client = client
+        if self._thread is not None:
+            return
+        warm = len(self.names) > 0 or self._load_snapshot()
+        if self.refresh_interval <= 0:
+            first_refresh_in = float('inf')
+        else:
+            first_refresh_in = self.refresh_interval if warm else 0
+        self._thread = threading.Thread(
+            target=self._run, args=(first_refresh_in,), name='cake-radar-directory', daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._misses.put(None)
+        if self.snapshot_path:
+            self.save_snapshot()
+
+    def _run(self, first_refresh_in: float):
+        next_refresh = time.monotonic() + first_refresh_in
+        while not self._stop.is_set():
+            if time.monotonic() >= next_refresh:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.warning(f"Slack directory refresh failed: {e}")
+                next_refresh = time.monotonic() + self.refresh_interval
+            wait = next_refresh - time.monotonic()
+            try:
+                item = self._misses.get(timeout=max(wait, 0) if wait != float('inf') else None)
+            except queue.Empty:
+                continue
+            if item is not None:
+                self._resolve(*item)
+
+    def refresh(self) -> int:
+        """Reload every user and public channel name. Returns the number of names stored."""
+        count = 0
+        for member in self._paginate('users_list', 'members', limit=USERS_PAGE_SIZE):
+            self.names.put(f"user:{member['id']}", _user_display_name(member))
+            count += 1
+        for channel in self._paginate(
+            'conversations_list', 'channels',
+            limit=CHANNELS_PAGE_SIZE, types='public_channel', exclude_archived=True,
+        ):
+            self.names.put(f"channel:{channel['id']}", '#' + channel['name'])
+            count += 1
+        self.refreshed_at = time.time()
+        logging.info(f"Slack directory refreshed | names={count}")
+        if self.snapshot_path:
+            self.save_snapshot()
+        return count
+
+    def resolve_pending(self):
+        """Look up every queued miss on the calling thread."""
+        while True:
+            try:
+                item = self._misses.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self._resolve(*item)
+
+    def _resolve(self, kind: str, object_id: str):
+        key = f"{kind}:{object_id}"
+        try:
+            if kind == 'user':
+                name = _user_display_name(self._call('users_info', user=object_id)['user'])
+            else:
+                name = '#' + self._call('conversations_info', channel=object_id)['channel']['name']
+            self.names.put(key, name)
+        except Exception as e:
+            logging.debug(f"Slack {kind} lookup failed for {object_id}: {e}")
+            self._failures.put(key, True)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _paginate(self, method: str, field: str, **kwargs):
+        cursor = None
+        fetched = 0
+        while fetched < self.names.maxsize:
+            response = self._call(method, cursor=cursor, **kwargs)
+            page = response.get(field) or []
+            yield from page
+            fetched += len(page)
+            cursor = (response.get('response_metadata') or {}).get('next_cursor')
+            if not page or not cursor or self._stop.wait(self.page_interval):
+                return
+
+    def _call(self, method: str, **kwargs):
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except Exception as e:
+                delay = _retry_after(e)
+                if delay is None or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                self._rate_limited += 1
+                logging.warning(f"SLACK_RATE_LIMITED | {method} | retry in {delay:.0f}s")
+                if self._stop.wait(delay):
+                    raise
+
+    def save_snapshot(self):
+        try:
+            self.names.save(self.snapshot_path)
+        except OSError as e:
+            logging.warning(f"Could not save Slack directory to {self.snapshot_path}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            **self.names.stats(),
+            'pending': len(self._pending),
+            'rate_limited': self._rate_limited,
+            'refreshed_at': self.refreshed_at,
+        }
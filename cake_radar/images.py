@@ -1,67 +1,640 @@
+import asyncio
+import atexit
 import base64
+import hashlib
+import http.cookiejar
 import io
 import logging
-from typing import List
+import mimetypes
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import requests
-from PIL import Image
-from pillow_heif import register_heif_opener
+from .cache import TTLCache, approximate_size
 
+# Pillow, pillow_heif, requests and httpx are imported where first needed, so importing
+# the app (CLI runs, tests, worker spawn) does not pay for them up front
+if TYPE_CHECKING:
+    import httpx
+    import requests
 
 _PILLOW_TO_OPENAI = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'GIF': 'image/gif', 'WEBP': 'image/webp'}
+# Longest side, in pixels, that the OpenAI vision model works with at each detail level
+DETAIL_TARGET_SIZES = {'low': 512, 'high': 2048, 'auto': 2048}
+_THUMB_SIZES = (64, 80, 160, 360, 480, 720, 800, 960, 1024)
+# Upper bound on the base64 payload of one image data URI
+DEFAULT_MAX_DATA_URI_BYTES = 200_000
+_JPEG_QUALITIES = (80, 65, 50, 35)
+_MAX_DOWNSCALE_STEPS = 3
+# (connect, read) timeouts in seconds for Slack file downloads
+DEFAULT_TIMEOUT = (3.05, 10)
+# Leading bytes of the formats OpenAI accepts, to recognise them without Pillow
+_MAGIC_NUMBERS = ((b'\xff\xd8\xff', 'JPEG'), (b'\x89PNG\r\n\x1a\n', 'PNG'), (b'GIF87a', 'GIF'), (b'GIF89a', 'GIF'))
 _heif_registered = False
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+class PerceptualIndex:
+    """Bounded set of 64-bit perceptual hashes that maps near-duplicates to one canonical hash."""
+
+    def __init__(self, max_distance: int = 4, maxsize: int = 2048):
+        self.max_distance = max_distance
+        self.maxsize = maxsize
+        self._hashes: List[int] = []
+        self._lock = threading.Lock()
+        self.matches = 0
+
+    def canonical(self, phash: int) -> int:
+        """Return a stored hash within `max_distance` bits of `phash`, storing `phash` if there is none."""
+        with self._lock:
+            if self.max_distance >= 0:
+                for known in self._hashes:
+                    if (known ^ phash).bit_count() <= self.max_distance:
+                        self.matches += 1
+                        return known
+            self._hashes.append(phash)
+            if len(self._hashes) > self.maxsize:
+                del self._hashes[0]
+            return phash
+
+
+# Processed data URIs keyed by Slack file id + update time + encoding settings
+image_cache = TTLCache(maxsize=10_000, ttl=24 * 60 * 60, max_bytes=32 * 1024 * 1024, sizeof=len)
+# sha256 of a data URI -> perceptual fingerprint, so re-encoded copies share classifier cache keys
+_fingerprints = TTLCache(
+    maxsize=10_000, ttl=24 * 60 * 60, max_bytes=4 * 1024 * 1024, sizeof=approximate_size, key_sizeof=approximate_size,
+)
+perceptual_index = PerceptualIndex()
+
+
+class Transcoder:
+    """Decodes and re-encodes images in worker processes, so a large HEIC photo does not
+    hold the GIL and stall the other request threads.
+
+    Small JPEG/PNG/GIF/WEBP files are cheap to process (most pass through
+    untouched) and stay in the calling thread, as does everything when
+    `workers` is 0. The pool is started on first use in each process (never in
+    a gunicorn master before fork) and at most `2 * workers` images are queued.
+    A task that exceeds `timeout` retires its pool: new images go to a fresh
+    one, and the stuck worker is stopped once the other images on the old pool
+    have finished. A crashed worker breaks the pool, which is replaced at once.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        timeout: float = 10.0,
+        max_source_bytes: int = 25 * 1024 * 1024,
+        max_pixels: int = 50_000_000,
+        inline_max_bytes: int = 512 * 1024,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_source_bytes = max_source_bytes
+        self.max_pixels = max_pixels
+        self.inline_max_bytes = inline_max_bytes
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._in_flight: Dict[ProcessPoolExecutor, set] = {}
+        self._lock = threading.Lock()
+        self.inline = 0
+        self.pooled = 0
+        self.passthrough = 0
+        self.timeouts = 0
+        self.crashes = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def runs_inline(self, content: bytes) -> bool:
+        return self.workers <= 0 or (len(content) <= self.inline_max_bytes and _sniff_format(content) is not None)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                import multiprocessing
+
+                # spawn: forking a process that runs threads can copy a held lock into the child
+                if self._pid != os.getpid():
+                    atexit.register(self.shutdown)
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+                self._slots = threading.BoundedSemaphore(self.workers * 2)
+            return self._executor, self._slots
+
+    def transcode(self, content: bytes, detail: str, max_bytes: int) -> Dict:
+        if self.runs_inline(content):
+            self._count('inline')
+            result = _transcode(content, detail, max_bytes, self.max_pixels)
+            if result.get('passthrough'):
+                self._count('passthrough')
+            return result
+
+        executor, slots = self._pool()
+        if not slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"image transcoding queue still full after {self.timeout:.0f}s")
+        future = None
+        try:
+            self._count('pooled')
+            future = executor.submit(_transcode, content, detail, max_bytes, self.max_pixels)
+            with self._lock:
+                self._in_flight.setdefault(executor, set()).add(future)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                self._count('timeouts')
+                self._retire(executor, future)
+                raise TimeoutError(f"image transcoding took longer than {self.timeout:.0f}s")
+            except BrokenProcessPool:
+                self._count('crashes')
+                self._retire(executor, future)
+                raise
+        finally:
+            with self._lock:
+                if future is not None and executor in self._in_flight:
+                    self._in_flight[executor].discard(future)
+            slots.release()
+
+    def _retire(self, executor, stuck):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            others = [future for future in self._in_flight.pop(executor, ()) if future is not stuck]
+        threading.Thread(target=self._stop, args=(executor, others), name='cake-radar-transcode-reaper', daemon=True).start()
+
+    def _stop(self, executor, others):
+        # Let the other images on the retired pool finish, each within its own timeout
+        wait(others, timeout=self.timeout)
+        # A running task cannot be cancelled, so its worker is stopped outright.
+        # `_processes` (pid -> Process) is private to CPython's ProcessPoolExecutor
+        # and present from 3.8 through 3.13; should it go, the kill is skipped and
+        # the worker exits on its own once the stuck task returns.
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'inline': self.inline,
+            'pooled': self.pooled,
+            'passthrough': self.passthrough,
+            'timeouts': self.timeouts,
+            'crashes': self.crashes,
+        }
+
+
+transcoder = Transcoder()
+
+
+def configure_transcoding(workers: int, timeout: float, max_source_bytes: int, max_pixels: int, inline_max_bytes: int):
+    transcoder.workers = workers
+    transcoder.timeout = timeout
+    transcoder.max_source_bytes = max_source_bytes
+    transcoder.max_pixels = max_pixels
+    transcoder.inline_max_bytes = inline_max_bytes
+
+
+def configure_image_cache(max_bytes: int, ttl: float, phash_max_distance: int):
+    image_cache.max_bytes = max_bytes
+    image_cache.ttl = ttl
+    _fingerprints.ttl = ttl
+    perceptual_index.max_distance = phash_max_distance
 
 
 def _ensure_heif_registered():
     global _heif_registered
     if not _heif_registered:
+        from pillow_heif import register_heif_opener
+
         register_heif_opener()
         _heif_registered = True
 
 
-def download_slack_images(files: list, slack_bot_token: str, max_images: int = 1) -> List[str]:
+def register_codecs():
+    """Register HEIF and load every Pillow format plugin up front instead of on the first image."""
+    from PIL import Image
+
+    _ensure_heif_registered()
+    Image.init()
+
+
+def create_http_session(pool_size: int = 10, retries: int = 2, backoff: float = 0.5) -> "requests.Session":
+    """Build a keep-alive session for Slack file downloads, safe to share across threads.
+
+    Connections to files.slack.com are pooled per host (`pool_size` per pool), and
+    connection errors and 429/5xx responses are retried with exponential backoff,
+    honouring Retry-After. Cookies are never stored, so the unauthenticated
+    fallback request stays unauthenticated.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def create_async_http_client(
+    pool_size: int = 10,
+    retries: int = 2,
+    connect_timeout: float = DEFAULT_TIMEOUT[0],
+    read_timeout: float = DEFAULT_TIMEOUT[1],
+) -> "httpx.AsyncClient":
+    """Async counterpart of `create_http_session` for the ASGI app.
+
+    At most `pool_size` connections are open and cookies are never stored. Unlike
+    the sync session, only connection errors are retried (httpx has no status
+    retry); a 429 or 5xx response fails the download.
+    """
+    import httpx
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        # Limits belong on the transport: httpx ignores the client's when a transport is given
+        transport=httpx.AsyncHTTPTransport(
+            retries=retries, limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        ),
+        cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+
+def get_default_session() -> "requests.Session":
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = create_http_session()
+        return _default_session
+
+
+def http_pool_stats(session: "requests.Session" = None) -> Dict[str, Dict]:
+    """Per-host connection pool stats: connections opened, requests sent, idle connections."""
+    session = session or get_default_session()
+    stats = {}
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats[f"{pool.scheme}://{pool.host}"] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool is not None else 0,
+                'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+            }
+    return stats
+
+
+def _image_url(f: dict, detail: str = 'low') -> Optional[str]:
+    """Pick the smallest Slack thumbnail that still covers `detail`, else the original."""
+    mimetype = f.get('mimetype', '')
+    original = f.get('url_private_download') or f.get('url_private')
+    if not mimetype.startswith('image/'):
+        return None
+
+    target = DETAIL_TARGET_SIZES.get(detail, DETAIL_TARGET_SIZES['high'])
+    original_size = max(f.get('original_w') or 0, f.get('original_h') or 0)
+    if original and original_size and original_size <= target:
+        return original
+
+    for size in _THUMB_SIZES:
+        thumb = f.get(f'thumb_{size}')
+        if size >= target and thumb:
+            return thumb
+    return original
+
+
+def dhash(img) -> int:
+    """64-bit difference hash: stable across re-encoding, resizing and small edits."""
+    from PIL import Image
+
+    small = img.convert('L').resize((9, 8), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def image_digest(data_uri: str) -> str:
+    """Digest used for result caching: the perceptual fingerprint if known, else a content hash."""
+    digest = hashlib.sha256(data_uri.encode('utf-8')).hexdigest()
+    return _fingerprints.get(digest) or digest
+
+
+def _register_fingerprint(data_uri: str, phash: Optional[int]):
+    if phash is None:
+        # image_digest falls back to the content hash
+        return
+    phash = perceptual_index.canonical(phash)
+    digest = hashlib.sha256(data_uri.encode('utf-8')).hexdigest()
+    _fingerprints.put(digest, f"phash:{phash:016x}")
+
+
+def _file_cache_key(f: dict, detail: str, max_bytes: int) -> Optional[str]:
+    file_id = f.get('id')
+    if not file_id:
+        return None
+    updated = f.get('updated') or f.get('timestamp') or f.get('created') or ''
+    return f"{file_id}:{updated}:{detail}:{max_bytes}"
+
+
+def _fits(data: bytes, max_bytes: int) -> bool:
+    # Size of the base64 payload, which is what ends up in the request body
+    return 4 * ((len(data) + 2) // 3) <= max_bytes
+
+
+def _save(img, out_format: str, **params) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, out_format, **params)
+    return buf.getvalue()
+
+
+def _encode_within_budget(img, source_format: str, max_bytes: int):
+    """Encode `img` so its base64 payload fits `max_bytes`; return (bytes, mimetype) or (None, None).
+
+    PNG/GIF/WEBP keep their format when they fit. Everything else, and anything
+    too large, becomes JPEG at decreasing quality, then at decreasing size.
+    """
+    from PIL import Image
+
+    if source_format in _PILLOW_TO_OPENAI and source_format != 'JPEG':
+        data = _save(img, source_format)
+        if _fits(data, max_bytes):
+            return data, _PILLOW_TO_OPENAI[source_format]
+
+    rgb = img if img.mode == 'RGB' else img.convert('RGB')
+    for _ in range(_MAX_DOWNSCALE_STEPS + 1):
+        for quality in _JPEG_QUALITIES:
+            data = _save(rgb, 'JPEG', quality=quality)
+            if _fits(data, max_bytes):
+                return data, 'image/jpeg'
+        width, height = rgb.size
+        rgb = rgb.resize((max(1, width * 3 // 4), max(1, height * 3 // 4)), Image.Resampling.LANCZOS)
+    return None, None
+
+
+def _sniff_format(content: bytes) -> Optional[str]:
+    for magic, image_format in _MAGIC_NUMBERS:
+        if content.startswith(magic):
+            return image_format
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def _passthrough_max_side(target: int) -> int:
+    # `_image_url` fetches the smallest thumbnail covering the target, so that one must
+    # pass; the API scales it down to the detail level itself
+    return next((size for size in _THUMB_SIZES if size >= target), target)
+
+
+def _passes_through(img, target: int) -> bool:
+    """Whether OpenAI can take the original file as is, judged from the header alone."""
+    if img.format not in _PILLOW_TO_OPENAI or max(img.size) > _passthrough_max_side(target):
+        return False
+    if img.format == 'JPEG' and img.mode not in ('L', 'RGB'):
+        # CMYK and YCCK JPEGs are not reliably decoded by the API
+        return False
+    # Only the first frame of an animation is kept by re-encoding
+    return not getattr(img, 'is_animated', False)
+
+
+def _transcode(content: bytes, detail: str, max_bytes: int, max_pixels: int = 0) -> Dict:
+    """Downscale image bytes to the detail level and encode them as a data URI.
+
+    Files already in an accepted format, size and byte budget are encoded as
+    they are, without being re-saved. Only JPEGs are decoded, at 1/8 scale, for
+    the perceptual hash; other formats keep their content hash as cache key.
+
+    Runs in a `Transcoder` worker process, so it returns plain data (including
+    the perceptual hash) and leaves logging and cache updates to the caller.
+    """
+    from PIL import Image
+
+    _ensure_heif_registered()
+    # Only the header is read here; pixels are decoded on first access
+    img = Image.open(io.BytesIO(content))
+    source_format = img.format
+    source_size = img.size
+    result = {'source_format': source_format, 'source_size': source_size}
+    if max_pixels and source_size[0] * source_size[1] > max_pixels:
+        return {**result, 'error': f"{source_size[0]}x{source_size[1]} exceeds {max_pixels} pixels"}
+    target = DETAIL_TARGET_SIZES.get(detail, DETAIL_TARGET_SIZES['high'])
+    if _passes_through(img, target) and _fits(content, max_bytes):
+        out_mimetype = _PILLOW_TO_OPENAI[source_format]
+        phash = None
+        if source_format == 'JPEG':
+            # The fingerprint only needs a 9x8 thumbnail, so decode at the smallest scale
+            img.draft('L', (64, 64))
+            phash = dhash(img)
+        return {
+            **result,
+            'size': source_size,
+            'encoded_bytes': len(content),
+            'data_uri': f"data:{out_mimetype};base64,{base64.b64encode(content).decode('ascii')}",
+            'mimetype': out_mimetype,
+            'phash': phash,
+            'passthrough': True,
+        }
+    if source_format == 'JPEG':
+        # Let libjpeg decode at a reduced scale instead of decoding every pixel
+        img.draft('RGB', (target, target))
+    if max(img.size) > target:
+        img.thumbnail((target, target), Image.Resampling.LANCZOS)
+
+    data, out_mimetype = _encode_within_budget(img, source_format, max_bytes)
+    if data is None:
+        return {**result, 'error': f"does not fit in {max_bytes} bytes"}
+    return {
+        **result,
+        'size': img.size,
+        'encoded_bytes': len(data),
+        'data_uri': f"data:{out_mimetype};base64,{base64.b64encode(data).decode('utf-8')}",
+        'mimetype': out_mimetype,
+        'phash': dhash(img),
+    }
+
+
+def _to_data_uri(
+    content: bytes,
+    mimetype: str,
+    content_type: str,
+    detail: str = 'low',
+    max_bytes: int = DEFAULT_MAX_DATA_URI_BYTES,
+) -> Optional[str]:
+    """Downscale downloaded image bytes to the detail level and encode them as a data URI."""
+    if transcoder.max_source_bytes and len(content) > transcoder.max_source_bytes:
+        logging.warning(f"Skipping {mimetype} image of {len(content)} bytes, over the {transcoder.max_source_bytes} byte limit")
+        return None
+    try:
+        result = transcoder.transcode(content, detail, max_bytes)
+    except Exception as conv_err:
+        logging.warning(f"Could not process {mimetype} image (Content-Type={content_type!r}, len={len(content)}), skipping: {conv_err}")
+        return None
+
+    source_size = result['source_size']
+    if 'error' in result:
+        logging.warning(f"Could not fit {mimetype} image ({source_size[0]}x{source_size[1]}): {result['error']}, skipping")
+        return None
+    data_uri = result['data_uri']
+    _register_fingerprint(data_uri, result['phash'])
+    if result.get('passthrough'):
+        logging.info(f"IMAGE_PASSTHROUGH | {result['source_format']} {source_size[0]}x{source_size[1]} | {len(content)} bytes")
+        return data_uri
+    logging.info(
+        f"IMAGE_ENCODED | {result['source_format']} {source_size[0]}x{source_size[1]} -> "
+        f"{result['mimetype']} {result['size'][0]}x{result['size'][1]} | {len(content)} -> {result['encoded_bytes']} bytes "
+        f"(saved {len(content) - result['encoded_bytes']})"
+    )
+    return data_uri
+
+
+def load_image_file(path: str, detail: str = 'low', max_bytes: int = DEFAULT_MAX_DATA_URI_BYTES) -> Optional[str]:
+    """Encode a local image file like a downloaded attachment, e.g. for offline backtests."""
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        logging.warning(f"Could not read image {path}: {e}")
+        return None
+    return _to_data_uri(content, mimetype, mimetype, detail, max_bytes)
+
+
+def download_slack_images(
+    files: list,
+    slack_bot_token: str,
+    max_images: int = 1,
+    detail: str = 'low',
+    max_bytes: int = DEFAULT_MAX_DATA_URI_BYTES,
+    session: "requests.Session" = None,
+    timeout=DEFAULT_TIMEOUT,
+) -> List[str]:
     """Download image attachments from a Slack message and return as base64 data URIs."""
+    session = session or get_default_session()
     data_uris = []
     for f in files:
         if len(data_uris) >= max_images:
             break
         mimetype = f.get('mimetype', '')
-        url = f.get('url_private_download') or f.get('url_private')
-        if not mimetype.startswith('image/') or not url:
+        url = _image_url(f, detail)
+        if not url:
+            continue
+        cache_key = _file_cache_key(f, detail, max_bytes)
+        cached = image_cache.get(cache_key) if cache_key else None
+        if cached:
+            data_uris.append(cached)
             continue
         try:
             headers = {'Authorization': f'Bearer {slack_bot_token}'}
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=False)
+            response = session.get(url, headers=headers, timeout=timeout, allow_redirects=False)
             logging.debug(f"Image fetch status={response.status_code} url={url[:80]}")
             if response.is_redirect or response.is_permanent_redirect:
                 redirect_url = response.headers.get('Location')
                 if redirect_url:
                     logging.debug(f"Image redirect -> {redirect_url[:80]}")
-                    response = requests.get(redirect_url, timeout=10)
+                    response = session.get(redirect_url, timeout=timeout)
             response.raise_for_status()
             content_type = response.headers.get('Content-Type', '')
             if not content_type.startswith('image/'):
                 logging.debug(f"Auth'd request returned HTML, retrying without auth: {response.content[:200]!r}")
-                response = requests.get(url, timeout=10, allow_redirects=True)
+                response = session.get(url, timeout=timeout, allow_redirects=True)
                 response.raise_for_status()
                 content_type = response.headers.get('Content-Type', '')
             if not content_type.startswith('image/'):
                 logging.warning(f"Slack returned {content_type!r} (len={len(response.content)}) instead of image, skipping")
                 continue
-            try:
-                _ensure_heif_registered()
-                img = Image.open(io.BytesIO(response.content))
-                out_mimetype = _PILLOW_TO_OPENAI.get(img.format, 'image/jpeg')
-                out_format = img.format if img.format in _PILLOW_TO_OPENAI else 'JPEG'
-                if out_format == 'JPEG':
-                    img = img.convert('RGB')
-                buf = io.BytesIO()
-                img.save(buf, out_format)
-                encoded = base64.b64encode(buf.getvalue()).decode('utf-8')
-                data_uris.append(f"data:{out_mimetype};base64,{encoded}")
-            except Exception as conv_err:
-                logging.warning(f"Could not process {mimetype} image (Content-Type={content_type!r}, len={len(response.content)}), skipping: {conv_err}")
+            data_uri = _to_data_uri(response.content, mimetype, content_type, detail, max_bytes)
+            if data_uri:
+                data_uris.append(data_uri)
+                if cache_key:
+                    image_cache.put(cache_key, data_uri)
         except Exception as e:
             logging.error(f"Failed to download Slack image: {e}")
     return data_uris
 
+
+async def async_download_slack_images(
+    files: list,
+    slack_bot_token: str,
+    max_images: int = 1,
+    http_client: "httpx.AsyncClient" = None,
+    detail: str = 'low',
+    max_bytes: int = DEFAULT_MAX_DATA_URI_BYTES,
+) -> List[str]:
+    """Async variant of `download_slack_images`; decoding runs in a worker thread."""
+    data_uris = []
+    owns_client = http_client is None
+    if owns_client:
+        http_client = create_async_http_client()
+    try:
+        for f in files:
+            if len(data_uris) >= max_images:
+                break
+            mimetype = f.get('mimetype', '')
+            url = _image_url(f, detail)
+            if not url:
+                continue
+            cache_key = _file_cache_key(f, detail, max_bytes)
+            cached = image_cache.get(cache_key) if cache_key else None
+            if cached:
+                data_uris.append(cached)
+                continue
+            try:
+                headers = {'Authorization': f'Bearer {slack_bot_token}'}
+                response = await http_client.get(url, headers=headers, follow_redirects=False)
+                logging.debug(f"Image fetch status={response.status_code} url={url[:80]}")
+                if response.is_redirect:
+                    redirect_url = response.headers.get('Location')
+                    if redirect_url:
+                        logging.debug(f"Image redirect -> {redirect_url[:80]}")
+                        response = await http_client.get(redirect_url)
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if not content_type.startswith('image/'):
+                    logging.debug(f"Auth'd request returned HTML, retrying without auth: {response.content[:200]!r}")
+                    response = await http_client.get(url, follow_redirects=True)
+                    response.raise_for_status()
+                    content_type = response.headers.get('Content-Type', '')
+                if not content_type.startswith('image/'):
+                    logging.warning(f"Slack returned {content_type!r} (len={len(response.content)}) instead of image, skipping")
+                    continue
+                data_uri = await asyncio.to_thread(
+                    _to_data_uri, response.content, mimetype, content_type, detail, max_bytes,
+                )
+                if data_uri:
+                    data_uris.append(data_uri)
+                    if cache_key:
+                        image_cache.put(cache_key, data_uri)
+            except Exception as e:
+                logging.error(f"Failed to download Slack image: {e}")
+    finally:
+        if owns_client:
+            await http_client.aclose()
+    return data_uris
@@ -1,15 +1,109 @@
 import re
-from typing import List
+from typing import Dict, List, Sequence
 
 from .config import Config
 
 
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """Build a regex alternation factored by common prefixes.
+
+    Python's `re` tries alternatives one by one, so a flat `a|b|c` of a few
+    hundred keywords costs a few hundred comparisons at every word start. A
+    prefix-factored pattern rejects a position after a character or two. Longer
+    continuations are tried first so the longest keyword wins at each position.
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def _emit(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + _emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if terminal else body
+
+    return _emit(trie)
+
+
+class KeywordMatcher:
+    """Match a fixed keyword list as standalone terms in a single regex scan.
+
+    All keywords are compiled into one prefix-factored alternation inside a
+    zero-width lookahead so that every word start is tried exactly once. Shorter
+    keywords that are whole-word prefixes of the longest match at the same
+    position (e.g. "banana" inside "banana bread") are added from a table built
+    up front, so results are identical to searching for each keyword separately.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = list(keywords)
+        self._order: Dict[str, int] = {}
+        for index, keyword in enumerate(self.keywords):
+            self._order.setdefault(keyword.lower(), index)
+
+        unique = sorted(self._order, key=len, reverse=True)
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [
+                other
+                for other in unique
+                if len(other) < len(keyword)
+                and keyword.startswith(other)
+                and not _WORD_CHAR.match(keyword[len(other)])
+            ]
+            for keyword in unique
+        }
+
+        if unique:
+            alternation = _trie_pattern(unique)
+            self._pattern = re.compile(rf"(?<!\w)(?=({alternation})(?!\w))", re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def match(self, text: str) -> List[str]:
+        if self._pattern is None:
+            return []
+
+        text = text.lower()
+        found = set()
+        for hit in self._pattern.finditer(text):
+            keyword = hit.group(1)
+            if keyword not in self._order:
+                continue
+            found.add(keyword)
+            found.update(self._prefixes[keyword])
+        if not found:
+            return []
+
+        return [
+            keyword
+            for keyword in self.keywords
+            if keyword.lower() in found
+        ]
+
+
+_matcher = None
+
+
+def get_matcher() -> KeywordMatcher:
+    """Return the matcher for the currently loaded `Config.KEYWORDS`, compiling it on change."""
+    global _matcher
+    keywords = Config.KEYWORDS
+    # Compared by value, so in-place edits of the list are picked up too
+    if _matcher is None or _matcher.keywords != keywords:
+        _matcher = KeywordMatcher(keywords)
+    return _matcher
+
+
 def match_keywords(text: str) -> List[str]:
     """Return configured keywords that appear as standalone terms."""
-    text = text.lower()
-    return [
-        keyword
-        for keyword in Config.KEYWORDS
-        if re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", text, re.IGNORECASE)
-    ]
-
+    return get_matcher().match(text)
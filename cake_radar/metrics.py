@@ -0,0 +1,229 @@
+"""Minimal Prometheus instrumentation for the evaluation pipeline.
+
+Metrics live in this process only; under gunicorn each worker reports its own
+values, so scrape every worker or aggregate with `sum by` in queries.
+"""
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """Overwrite with a running total kept elsewhere, such as a cache's hit count."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._listeners: List[Callable[[float, Dict[str, str]], None]] = []
+
+    def add_listener(self, listener: Callable[[float, Dict[str, str]], None]):
+        """Also pass every observation to `listener(value, labels)`, e.g. to keep raw samples."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[float, Dict[str, str]], None]):
+        self._listeners.remove(listener)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket (non-cumulative) counts followed by the sum
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-1] += value
+        for listener in self._listeners:
+            listener(value, labels)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+STAGE_SECONDS = Histogram(
+    'cake_radar_stage_seconds', "Time spent in each evaluation stage.", ['stage'],
+)
+JUDGE_SECONDS = Histogram(
+    'cake_radar_judge_seconds', "Time taken by each judge, including retries.", ['judge'],
+)
+OPENAI_CALLS = Counter(
+    'cake_radar_openai_calls_total', "OpenAI chat completion requests.", ['model', 'kind'],
+)
+OPENAI_ERRORS = Counter(
+    'cake_radar_openai_errors_total', "OpenAI chat completion requests that raised.", ['model', 'kind'],
+)
+OPENAI_TOKENS = Counter(
+    'cake_radar_openai_tokens_total', "Tokens reported by OpenAI.", ['model', 'type'],
+)
+CACHE_ENTRIES = Gauge('cake_radar_cache_entries', "Entries held by each cache.", ['cache'])
+CACHE_HITS = Counter('cake_radar_cache_hits_total', "Cache hits since start.", ['cache'])
+CACHE_MISSES = Counter('cake_radar_cache_misses_total', "Cache misses since start.", ['cache'])
+CACHE_EVICTIONS = Counter('cake_radar_cache_evictions_total', "Cache evictions since start.", ['cache'])
+CACHE_BYTES = Gauge('cake_radar_cache_bytes', "Approximate bytes held by each in-memory cache.", ['cache'])
+PROCESS_RSS = Gauge('cake_radar_process_resident_memory_bytes', "Resident set size of this process.")
+QUEUE_DEPTH = Gauge('cake_radar_event_queue_depth', "Slack events waiting for a worker.")
+QUEUE_IN_FLIGHT = Gauge('cake_radar_event_queue_in_flight', "Slack events being evaluated.")
+QUEUE_REJECTED = Counter(
+    'cake_radar_event_queue_rejected_total', "Slack events dropped because the queue was full or shutting down.",
+)
+
+
+def _tokens(usage, field: str) -> int:
+    value = getattr(usage, field, 0)
+    return value if isinstance(value, (int, float)) else 0
+
+
+def record_openai_call(model: str, kind: str, response=None, error: Exception = None):
+    OPENAI_CALLS.inc(model=model, kind=kind)
+    if error is not None:
+        OPENAI_ERRORS.inc(model=model, kind=kind)
+        return
+    usage = getattr(response, 'usage', None)
+    OPENAI_TOKENS.inc(_tokens(usage, 'prompt_tokens'), model=model, type='prompt')
+    OPENAI_TOKENS.inc(_tokens(usage, 'completion_tokens'), model=model, type='completion')
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size; the peak instead where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def process_pss_bytes() -> Optional[int]:
+    """Proportional set size: pages shared with the gunicorn master and other workers count
+    only their share, which shows what copy-on-write actually costs. None without /proc."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def set_cache_gauges(cache: str, stats: Dict):
+    CACHE_ENTRIES.set(stats.get('size', 0), cache=cache)
+    if stats.get('bytes') is not None:
+        CACHE_BYTES.set(stats['bytes'], cache=cache)
+    CACHE_HITS.set(stats.get('hits', 0), cache=cache)
+    CACHE_MISSES.set(stats.get('misses', 0), cache=cache)
+    CACHE_EVICTIONS.set(stats.get('evictions', 0), cache=cache)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
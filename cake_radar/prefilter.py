@@ -0,0 +1,168 @@
+"""Local pre-classifier that drops confident negatives before any OpenAI call.
+
+A logistic regression over hashed word, word-bigram and character n-gram
+features, trained offline from the `EVALUATED` lines Cake Radar already logs:
+
+    python -m cake_radar.prefilter train cake-radar.log --out prefilter.npz
+
+Point PREFILTER_MODEL_PATH at the result to enable it. Messages scoring below
+PREFILTER_THRESHOLD are skipped; with PREFILTER_SHADOW they are only logged.
+"""
+import argparse
+import logging
+import re
+import sys
+import zlib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+# numpy is imported on first use so the app does not pay for it unless a model is configured
+if TYPE_CHECKING:
+    import numpy as np
+
+
+DEFAULT_DIMENSIONS = 2 ** 18
+_WORD = re.compile(r"\w+")
+# EVALUATED | FORWARDED | AI=yes 95% ... | "message text"
+_EVALUATED_LINE = re.compile(r'EVALUATED(?: \(edit\))? \| (FORWARDED|NOT_FORWARDED) \|.*\| "(.*)"\s*$')
+
+
+def features(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> "np.ndarray":
+    """Return the sorted, de-duplicated hashed feature indices for `text`."""
+    import numpy as np
+
+    tokens = _WORD.findall(text.lower())
+    grams = [f"w:{token}" for token in tokens]
+    grams.extend(f"b:{left} {right}" for left, right in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f" {token} "
+        for n in (3, 4):
+            grams.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    mask = dimensions - 1
+    return np.unique(np.fromiter((zlib.crc32(gram.encode('utf-8')) & mask for gram in grams), dtype=np.int64))
+
+
+class PreFilter:
+    """Hashed-feature logistic regression scoring how likely a message is a treat alert."""
+
+    def __init__(self, weights: "np.ndarray", bias: float):
+        import numpy as np
+
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+
+    @property
+    def dimensions(self) -> int:
+        return len(self.weights)
+
+    def score(self, text: str) -> float:
+        """Probability that the full pipeline would forward `text`."""
+        import numpy as np
+
+        logit = self.bias + float(self.weights[features(text, self.dimensions)].sum())
+        return float(1.0 / (1.0 + np.exp(-logit)))
+
+    def save(self, path: str):
+        import numpy as np
+
+        np.savez_compressed(path, weights=self.weights, bias=np.array([self.bias]))
+
+    @classmethod
+    def load(cls, path: str) -> "PreFilter":
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(data['weights'], data['bias'][0])
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[int],
+        dimensions: int = DEFAULT_DIMENSIONS,
+        epochs: int = 200,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+    ) -> "PreFilter":
+        """Fit by full-batch gradient descent with classes weighted to equal total influence."""
+        import numpy as np
+
+        rows = [features(text, dimensions) for text in texts]
+        y = np.asarray(labels, dtype=np.float64)
+        lengths = np.array([len(row) for row in rows])
+        indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+
+        positives = max(y.sum(), 1.0)
+        negatives = max(len(y) - y.sum(), 1.0)
+        sample_weight = np.where(y > 0, len(y) / (2 * positives), len(y) / (2 * negatives))
+
+        weights = np.zeros(dimensions)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = bias + np.bincount(row_of, weights=weights[indices], minlength=len(rows))
+            error = (1.0 / (1.0 + np.exp(-logits)) - y) * sample_weight
+            grad = np.bincount(indices, weights=error[row_of], minlength=dimensions) / len(rows)
+            weights -= learning_rate * (grad + l2 * weights)
+            bias -= learning_rate * error.mean()
+        return cls(weights, bias)
+
+
+def parse_evaluation_log(lines: Iterable[str]) -> Tuple[List[str], List[int]]:
+    """Extract (text, forwarded) training pairs from Cake Radar `EVALUATED` log lines."""
+    texts, labels = [], []
+    for line in lines:
+        match = _EVALUATED_LINE.search(line)
+        if match:
+            texts.append(match.group(2))
+            labels.append(1 if match.group(1) == 'FORWARDED' else 0)
+    return texts, labels
+
+
+model: Optional[PreFilter] = None
+
+
+def load_model(path: str):
+    global model
+    model = PreFilter.load(path) if path else None
+    if model is not None:
+        logging.info(f"Loaded pre-classifier from {path} ({model.dimensions} features)")
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(description="Train or evaluate the Cake Radar pre-classifier")
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help="Train from Cake Radar logs")
+    train.add_argument('logs', nargs='+', help="Log files containing EVALUATED lines")
+    train.add_argument('--out', required=True, help="Output .npz model path")
+    train.add_argument('--epochs', type=int, default=200)
+    evaluate = commands.add_parser('evaluate', help="Report how many messages a threshold would skip")
+    evaluate.add_argument('model')
+    evaluate.add_argument('logs', nargs='+')
+    evaluate.add_argument('--threshold', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    texts, labels = [], []
+    for log_path in args.logs:
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            file_texts, file_labels = parse_evaluation_log(f)
+        texts += file_texts
+        labels += file_labels
+    if not texts:
+        print("No EVALUATED lines found", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'train':
+        PreFilter.train(texts, labels, epochs=args.epochs).save(args.out)
+        print(f"Trained on {len(texts)} messages ({sum(labels)} forwarded), saved to {args.out}")
+        return
+
+    prefilter = PreFilter.load(args.model)
+    skipped = [label for text, label in zip(texts, labels) if prefilter.score(text) < args.threshold]
+    print(
+        f"threshold={args.threshold}: would skip {len(skipped)}/{len(texts)} messages "
+        f"({sum(skipped)} of them forwarded by the full pipeline)"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Client-side rate limiting for OpenAI chat completions.
+
+Each model gets a `ModelLimiter`: token buckets for requests and tokens per
+minute, and an AIMD concurrency window that halves on every 429 and grows back
+by roughly one slot per window of successful calls. Judge calls are admitted
+before classifier calls so messages already past the classifier finish first.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .config import Config
+
+JUDGE = 0
+CLASSIFIER = 1
+
+# Buckets hold at most this many seconds of budget, so an idle period does not allow a huge burst
+BURST_SECONDS = 10
+# Backoff after a 429 without Retry-After: 1s, 2s, 4s ... capped at MAX_BACKOFF
+MAX_BACKOFF = 30.0
+# Rough token cost of a low-detail image and of the JSON answer, for pre-call estimates
+IMAGE_TOKENS = 85
+COMPLETION_TOKENS = 100
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call waited too long for capacity or kept getting 429s."""
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+
+    def refill(self, elapsed: float):
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` (capped at capacity) is available."""
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0) / self.rate
+
+
+class ModelLimiter:
+    """Admission control for one model; safe to share between threads and event loops."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests = _Bucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = _Bucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency = float(self.max_concurrency)
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiting = {JUDGE: 0, CLASSIFIER: 0}
+        self._consecutive_limited = 0
+        self._rate_limited = 0
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.refill(elapsed)
+
+    def _try_acquire(self, tokens: int, priority: int) -> Optional[float]:
+        """Take capacity and return 0, or return how long to wait (None: until a release)."""
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if priority == CLASSIFIER and self._waiting[JUDGE]:
+            return None
+        if self._in_flight >= int(self.concurrency):
+            return None
+        wait = max(
+            self.requests.wait_time(1) if self.requests else 0,
+            self.tokens.wait_time(tokens) if self.tokens else 0,
+        )
+        if wait > 0:
+            return wait
+        if self.requests:
+            self.requests.level -= 1
+        if self.tokens:
+            self.tokens.level -= tokens
+        self._in_flight += 1
+        return 0
+
+    def acquire(self, tokens: int, priority: int = CLASSIFIER, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    wait = self._try_acquire(tokens, priority)
+                    if wait == 0:
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitExceeded(f"no OpenAI capacity within {timeout:.0f}s")
+                    self._condition.wait(min(remaining, wait if wait is not None else remaining, 1.0))
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    async def async_acquire(self, tokens: int, priority: int = CLASSIFIER, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(tokens, priority)
+                if wait == 0:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitExceeded(f"no OpenAI capacity within {timeout:.0f}s")
+                await asyncio.sleep(min(remaining, wait if wait is not None else 0.05, 1.0))
+        finally:
+            with self._condition:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def release(self, extra_tokens: int = 0, rate_limited: bool = False, retry_after: float = None):
+        """Return a slot; `extra_tokens` reconciles the estimate with reported usage."""
+        with self._condition:
+            self._in_flight -= 1
+            if self.tokens and extra_tokens:
+                self.tokens.level -= extra_tokens
+            if rate_limited:
+                self._rate_limited += 1
+                self._consecutive_limited += 1
+                self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+                backoff = retry_after if retry_after else min(2.0 ** (self._consecutive_limited - 1), MAX_BACKOFF)
+                self._paused_until = max(self._paused_until, self._clock() + backoff)
+            else:
+                self._consecutive_limited = 0
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'concurrency': round(self.concurrency, 2),
+                'in_flight': self._in_flight,
+                'waiting_judge': self._waiting[JUDGE],
+                'waiting_classifier': self._waiting[CLASSIFIER],
+                'rate_limited': self._rate_limited,
+                'paused_for': round(max(self._paused_until - self._clock(), 0), 2),
+            }
+
+
+_limiters: Dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    """Shared limiter for `model`, configured from the classifier or judge settings."""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            if model == Config.OPENAI_MODEL:
+                rpm, tpm = Config.OPENAI_RPM_LIMIT, Config.OPENAI_TPM_LIMIT
+            else:
+                rpm, tpm = Config.JUDGE_RPM_LIMIT, Config.JUDGE_TPM_LIMIT
+            limiter = _limiters[model] = ModelLimiter(rpm, tpm, Config.OPENAI_MAX_CONCURRENCY)
+        return limiter
+
+
+def limiter_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        return {model: limiter.stats() for model, limiter in _limiters.items()}
+
+
+def estimate_tokens(request: Dict) -> int:
+    """Approximate prompt plus completion tokens for a chat completion request."""
+    tokens = COMPLETION_TOKENS
+    for message in request['messages']:
+        content = message['content']
+        parts = content if isinstance(content, list) else [{'type': 'text', 'text': content}]
+        for part in parts:
+            tokens += len(part.get('text', '')) // 4 if part.get('type') == 'text' else IMAGE_TOKENS
+    return tokens
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Back-off hint for a retryable 429 (0 when OpenAI sent none), or None for any other error.
+
+    A 429 for an exhausted quota is not retryable and returns None.
+    """
+    response = getattr(error, 'response', None)
+    status_code = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status_code != 429 or 'insufficient_quota' in str(error).lower():
+        return None
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        return float(headers.get('retry-after') or 0)
+    except (TypeError, ValueError):
+        return 0.0
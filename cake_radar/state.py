@@ -0,0 +1,141 @@
+"""Dedup and evaluation state shared by several worker processes on one host.
+
+`SQLiteStore` offers the subset of the `TTLCache` interface the Slack handlers
+use, keyed by `(channel, ts)`, so gunicorn workers can share one SQLite file in
+WAL mode instead of each keeping its own in-memory state.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Expired and excess rows are purged once every this many writes per process
+_MAINTENANCE_INTERVAL = 256
+
+
+class SQLiteStore:
+    """Process-safe TTL store for `(channel, ts)` keys with JSON values.
+
+    Sets are stored as sorted lists. `maxsize` is enforced on every 256th write,
+    so the table may briefly hold a few hundred rows more than that.
+    """
+
+    def __init__(self, path: str, table: str, maxsize: int, ttl: float, clock: Callable[[], float] = time.time):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and must not survive a fork into gunicorn workers
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "channel TEXT NOT NULL, ts TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (channel, ts)) WITHOUT ROWID"
+        )
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table} (expires_at)")
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def __len__(self) -> int:
+        row = self._connection().execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE expires_at > ?", (self._clock(),)
+        ).fetchone()
+        return row[0]
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        row = self._connection().execute(
+            f"SELECT 1 FROM {self.table} WHERE channel = ? AND ts = ? AND expires_at > ?", (*key, self._clock())
+        ).fetchone()
+        return row is not None
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        row = self._connection().execute(
+            f"SELECT value FROM {self.table} WHERE channel = ? AND ts = ? AND expires_at > ?", (*key, self._clock())
+        ).fetchone()
+        self._count(row is not None)
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: Tuple[str, str], value: Any):
+        if self.maxsize <= 0:
+            return
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.table} (channel, ts, expires_at, value) VALUES (?, ?, ?, ?)",
+            (*key, self._clock() + self.ttl, json.dumps(value, default=sorted)),
+        )
+        self._maintain()
+
+    def add(self, key: Tuple[str, str], value: Any = True) -> bool:
+        """Insert `key` unless another thread or process already holds an unexpired entry."""
+        if self.maxsize <= 0:
+            self._count(False)
+            return True
+        now = self._clock()
+        cursor = self._connection().execute(
+            f"INSERT INTO {self.table} (channel, ts, expires_at, value) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT (channel, ts) DO UPDATE SET expires_at = excluded.expires_at, value = excluded.value "
+            f"WHERE {self.table}.expires_at <= ?",
+            (*key, now + self.ttl, json.dumps(value, default=sorted), now),
+        )
+        inserted = cursor.rowcount == 1
+        self._count(not inserted)
+        if inserted:
+            self._maintain()
+        return inserted
+
+    def _maintain(self):
+        with self._lock:
+            self._writes += 1
+            if self._writes % _MAINTENANCE_INTERVAL:
+                return
+        connection = self._connection()
+        connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (self._clock(),))
+        cursor = connection.execute(
+            f"DELETE FROM {self.table} WHERE (channel, ts) IN ("
+            f"SELECT channel, ts FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+        with self._lock:
+            self._evictions += max(cursor.rowcount, 0)
+
+    def clear(self):
+        self._connection().execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict:
+        size = len(self)
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': 'sqlite',
+                'size': size,
+                'maxsize': self.maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+            }
@@ -0,0 +1,132 @@
+import logging
+import queue
+import signal
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+class EventQueue:
+    """Bounded in-process queue drained by a fixed pool of worker threads.
+
+    Slack events are acknowledged as soon as they are queued; the slow work
+    (image download, classifier, judges, alert) runs on the workers.
+    """
+
+    def __init__(self, workers: int, maxsize: int, put_timeout: float = 0.0):
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._lock = threading.Lock()
+        self._accepting = True
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._threads: List[threading.Thread] = []
+        for index in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker, name=f'cake-radar-event-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        """Queue `func(*args, **kwargs)`; return False if the queue stays full or is shut down."""
+        if not self._accepting:
+            with self._lock:
+                self._rejected += 1
+            return False
+        try:
+            item = (time.monotonic(), func, args, kwargs)
+            self._queue.put(item, block=self.put_timeout > 0, timeout=self.put_timeout or None)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logging.warning(f"EVENT_QUEUE_FULL | depth={self._queue.qsize()} | dropped {getattr(func, '__name__', func)}")
+            return False
+        with self._lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            enqueued_at, func, args, kwargs = item
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                func(*args, **kwargs)
+                with self._lock:
+                    self._completed += 1
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logging.exception(f"Error processing queued event: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            started = self._completed + self._failed
+            return {
+                'depth': self._queue.qsize(),
+                'capacity': self._queue.maxsize,
+                'workers': len(self._threads),
+                'max_depth': self._max_depth,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'wait_avg_ms': round(1000 * self._wait_total / started, 2) if started else 0.0,
+                'wait_max_ms': round(1000 * self._wait_max, 2),
+            }
+
+    def shutdown(self, timeout: float = None) -> bool:
+        """Stop accepting work and wait up to `timeout` seconds for queued events to finish.
+
+        Returns True if every queued event was processed.
+        """
+        if not self._accepting:
+            return not any(thread.is_alive() for thread in self._threads)
+        self._accepting = False
+        logging.info(f"Draining event queue ({self._queue.qsize()} pending)")
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        drained = not any(thread.is_alive() for thread in self._threads)
+        if not drained:
+            logging.warning(f"Event queue drain timed out with {self._queue.qsize()} events pending")
+        return drained
+
+
+def install_sigterm_drain(event_queue: EventQueue, timeout: float):
+    """Drain `event_queue` on SIGTERM before handing over to the previous handler.
+
+    Gunicorn installs its own SIGTERM handler in each worker after the app is
+    loaded, replacing this one; there only the atexit drain applies.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def _handle_sigterm(signum, frame):
+        event_queue.shutdown(timeout)
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, _handle_sigterm)
@@ -0,0 +1,8 @@
+class FakeClock:
+    """Stand-in for `time.monotonic`/`time.time`: returns `now`, which tests advance by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
+os.environ.setdefault('OPENAI_API_KEY', 'dummy')
+os.environ.setdefault('SLACK_TOKEN_VERIFICATION_ENABLED', 'false')
+
+from cake_radar import app as cake_radar
+from cake_radar import asgi
+
+
+def _decorator(*args, **kwargs):
+    def wrapper(func):
+        return func
+    return wrapper
+
+
+def _response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def setUp(self):
+        cake_radar.processed_messages.clear()
+        cake_radar.evaluated_messages.clear()
+        cake_radar.classifier.result_cache.clear()
+        slack_app = MagicMock()
+        slack_app.message.side_effect = _decorator
+        slack_app.event.side_effect = _decorator
+        slack_app.client.users_info = AsyncMock(return_value={'user': {'profile': {'display_name': 'baker'}}})
+        slack_app.client.conversations_info = AsyncMock(return_value={'channel': {'name': 'general'}})
+        self.openai_client = MagicMock()
+        self.openai_client.chat.completions.create = AsyncMock()
+        asgi.initialize(slack_app=slack_app, openai_client=self.openai_client, validate_config=False)
+
+    def tearDown(self):
+        cake_radar.processed_messages.clear()
+        cake_radar.evaluated_messages.clear()
+
+    def test_async_assess_certainty_parses_response(self):
+        self.openai_client.chat.completions.create.return_value = _response(
+            '{"decision": "yes", "certainty": 95, "reason": "cake offered"}'
+        )
+
+        result = asyncio.run(asgi.assess_certainty("There is cake"))
+
+        self.assertEqual(result['decision'], 'yes')
+        self.assertEqual(result['total_certainty'], 95)
+
+    def test_async_judge_panel_requires_three_overturns(self):
+        self.openai_client.chat.completions.create.side_effect = [
+            _response('{"verdict": "overturn", "reason": "future event"}'),
+            _response('{"verdict": "overturn", "reason": "party invite"}'),
+            _response('{"verdict": "uphold", "reason": "mentions food"}'),
+            _response('{"verdict": "uphold", "reason": "worth knowing"}'),
+        ]
+
+        result = asyncio.run(asgi.judge_decision("Cake next Friday", "cake mentioned"))
+
+        self.assertEqual(result['verdict'], 'uphold')
+        self.assertEqual([vote['name'] for vote in result['votes']],
+                         ['availability', 'false_positive', 'social_context', 'hungry'])
+
+    def test_async_consolidated_judge_panel(self):
+        self.openai_client.chat.completions.create.return_value = _response(
+            '{"availability": {"verdict": "overturn", "reason": "future event"},'
+            ' "false_positive": {"verdict": "overturn", "reason": "party invite"},'
+            ' "social_context": {"verdict": "overturn", "reason": "calendar mention"},'
+            ' "hungry": {"verdict": "uphold", "reason": "worth knowing"}}'
+        )
+
+        with patch.object(cake_radar.Config, 'JUDGE_PANEL_MODE', 'consolidated'):
+            result = asyncio.run(asgi.judge_decision("Cake next Friday", "cake mentioned"))
+
+        self.assertEqual(result['verdict'], 'overturn')
+        self.assertEqual(self.openai_client.chat.completions.create.call_count, 1)
+        self.assertEqual(result['votes'][3], {'name': 'hungry', 'verdict': 'uphold', 'reason': 'worth knowing'})
+
+    def test_async_and_sync_errors_map_to_the_same_results(self):
+        classifier = cake_radar.classifier
+        sync_client = MagicMock()
+        for error in (RuntimeError('bad request'), cake_radar.ratelimit.RateLimitExceeded('busy')):
+            self.openai_client.chat.completions.create.side_effect = error
+            sync_client.chat.completions.create.side_effect = error
+            classifier.result_cache.clear()
+
+            with self.assertLogs(level='ERROR'):
+                async_certainty = asyncio.run(classifier.async_assess_certainty(self.openai_client, "cake", MagicMock()))
+                async_judge = asyncio.run(classifier.async_judge_decision(self.openai_client, "cake", "r", MagicMock()))
+                sync_certainty = classifier.assess_certainty(sync_client, "cake", MagicMock())
+                sync_judge = classifier.judge_decision(sync_client, "cake", "r", MagicMock())
+
+            self.assertEqual(async_certainty, sync_certainty)
+            self.assertEqual(async_judge, sync_judge)
+            self.assertEqual(sync_judge['verdict'], 'uphold')
+
+    def test_async_message_is_forwarded_and_deduplicated(self):
+        self.openai_client.chat.completions.create.side_effect = [
+            _response('{"decision": "yes", "certainty": 95, "reason": "cake offered"}'),
+        ] + [_response('{"verdict": "uphold", "reason": "available"}')] * 4
+        say = AsyncMock()
+        message = {'text': 'cake in the kitchen', 'channel': 'C1', 'ts': '1000.00', 'user': 'U1'}
+
+        async def deliver_twice():
+            await asgi.handle_message(message, say)
+            await asgi.handle_message(message, say)
+
+        with self.assertLogs(level='INFO') as logs:
+            asyncio.run(deliver_twice())
+
+        say.assert_awaited_once()
+        self.assertIn('/p100000', say.call_args.kwargs['text'])
+        self.assertEqual(self.openai_client.chat.completions.create.await_count, 5)
+        self.assertIn('EVALUATED | FORWARDED', '\n'.join(logs.output))
+        self.assertIn(('C1', '1000.00'), cake_radar.evaluated_messages)
+
+    @patch('cake_radar.asgi.assess_certainty', new_callable=AsyncMock)
+    def test_async_edit_without_new_keywords_is_skipped(self, mock_assess):
+        mock_assess.return_value = {'decision': 'no', 'total_certainty': 10, 'prompt_tokens': 0, 'completion_tokens': 0}
+        say = AsyncMock()
+        edit_event = {
+            'subtype': 'message_changed',
+            'channel': 'C1',
+            'message': {'text': 'there is cake in the kitchen!', 'ts': '2000.00', 'files': []},
+        }
+
+        async def edit_twice():
+            await asgi.handle_message_events(edit_event, say)
+            await asgi.handle_message_events(edit_event, say)
+
+        asyncio.run(edit_twice())
+
+        self.assertEqual(mock_assess.await_count, 1)
+        say.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
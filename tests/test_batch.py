@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
+os.environ.setdefault('OPENAI_API_KEY', 'dummy')
+os.environ.setdefault('SLACK_TOKEN_VERIFICATION_ENABLED', 'false')
+
+from PIL import Image
+
+from cake_radar import app as cake_radar
+from cake_radar import batch
+
+MESSAGES = [
+    {'channel': 'C1', 'ts': '1.0', 'text': 'cake in the kitchen', 'label': True},
+    {'channel': 'C1', 'ts': '2.0', 'text': 'cake meeting tomorrow', 'label': 'no'},
+    {'channel': 'C1', 'ts': '3.0', 'text': 'brownies by reception', 'label': 'yes'},
+    {'channel': 'C2', 'ts': '4.0', 'text': 'standup moved', 'label': False},
+]
+
+
+def _classify(text, image_data_uris=None):
+    decision = 'yes' if 'kitchen' in text or 'meeting' in text else 'no'
+    return {'decision': decision, 'total_certainty': 95, 'reason': 'r', 'prompt_tokens': 10, 'completion_tokens': 2}
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        slack_app = MagicMock()
+        slack_app.message.side_effect = lambda *args, **kwargs: (lambda func: func)
+        slack_app.event.side_effect = lambda *args, **kwargs: (lambda func: func)
+        cake_radar.initialize(slack_app=slack_app, openai_client=MagicMock(), validate_config=False)
+        cake_radar.classifier.result_cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'messages.jsonl')
+        self.output_path = os.path.join(self.tmp.name, 'results.jsonl')
+        with open(self.input_path, 'w') as f:
+            f.write('\n'.join(json.dumps(message) for message in MESSAGES) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('cake_radar.app.judge_decision', return_value={'verdict': 'uphold', 'reason': 'ok', 'votes': []})
+    @patch('cake_radar.app.assess_certainty', side_effect=_classify)
+    def test_batch_scores_against_labels(self, mock_assess, mock_judge):
+        summary = batch.run_batch(self.input_path, self.output_path, concurrency=2)
+
+        self.assertEqual((summary['tp'], summary['fp'], summary['fn'], summary['tn']), (1, 1, 1, 1))
+        self.assertEqual((summary['precision'], summary['recall']), (0.5, 0.5))
+        self.assertEqual(mock_assess.call_count, 3)
+        with open(self.output_path) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+    @patch('cake_radar.app.judge_decision', return_value={'verdict': 'uphold', 'reason': 'ok', 'votes': []})
+    @patch('cake_radar.app.assess_certainty', side_effect=_classify)
+    def test_batch_resumes_from_existing_output(self, mock_assess, mock_judge):
+        with open(self.output_path, 'w') as f:
+            f.write(json.dumps({'channel': 'C1', 'ts': '1.0', 'label': True, 'forwarded': True}) + '\n')
+
+        summary = batch.run_batch(self.input_path, self.output_path, concurrency=2)
+
+        self.assertEqual(summary['skipped'], 1)
+        self.assertEqual(summary['evaluated'], 3)
+        self.assertEqual(mock_assess.call_count, 2)
+        self.assertEqual(summary['results'], 4)
+
+    @patch('cake_radar.app.judge_decision', return_value={'verdict': 'uphold', 'reason': 'ok', 'votes': []})
+    @patch('cake_radar.app.assess_certainty')
+    def test_classifier_errors_are_retried_and_not_scored(self, mock_assess, mock_judge):
+        error = {'decision': 'error', 'total_certainty': 0, 'reason': 'quota', 'prompt_tokens': 0, 'completion_tokens': 0}
+        mock_assess.side_effect = lambda text, images=None: error if 'kitchen' in text else _classify(text)
+        with open(self.output_path, 'w') as f:
+            f.write(json.dumps({'channel': 'C1', 'ts': '3.0', 'label': True, 'forwarded': False, **error}) + '\n')
+
+        with self.assertLogs(level='ERROR'):
+            summary = batch.run_batch(self.input_path, self.output_path, concurrency=2)
+
+        self.assertEqual((summary['evaluated'], summary['failed'], summary['skipped']), (3, 1, 0))
+        # The stale error row for 3.0 is superseded by its retried result
+        self.assertEqual((summary['results'], summary['errors']), (3, 0))
+        self.assertEqual((summary['tp'], summary['fp'], summary['fn'], summary['tn']), (0, 1, 1, 1))
+        mock_assess.side_effect = _classify
+        summary = batch.run_batch(self.input_path, self.output_path, concurrency=2)
+
+        self.assertEqual((summary['evaluated'], summary['skipped']), (1, 3))
+        self.assertEqual((summary['results'], summary['tp']), (4, 1))
+        self.assertEqual(batch.score(self.output_path)['results'], 4)
+
+    @patch('cake_radar.app.assess_certainty', side_effect=_classify)
+    def test_local_images_are_attached(self, mock_assess):
+        buffer = io.BytesIO()
+        Image.new('RGB', (900, 600), 'orange').save(buffer, format='PNG')
+        with open(os.path.join(self.tmp.name, 'cake.png'), 'wb') as f:
+            f.write(buffer.getvalue())
+
+        result = batch.evaluate({'channel': 'C1', 'ts': '9.0', 'text': 'cake?', 'images': ['cake.png']}, self.tmp.name)
+
+        self.assertEqual(result['stage'], 'classifier')
+        image_data_uris = mock_assess.call_args.args[1]
+        self.assertEqual(len(image_data_uris), 1)
+        self.assertTrue(image_data_uris[0].startswith('data:image/'))
+
+    @patch('cake_radar.app.assess_certainty', side_effect=_classify)
+    def test_backtest_follows_the_cascade(self, mock_assess):
+        message = {'channel': 'C1', 'ts': '9.1', 'text': 'cake moved to the big room today', 'images': ['cake.png']}
+
+        with patch.object(cake_radar.Config, 'CASCADE_ENABLED', True), \
+                patch.object(batch.images, 'load_image_file') as load_image_file:
+            result = batch.evaluate(message, self.tmp.name)
+
+        load_image_file.assert_not_called()
+        self.assertEqual(result['path'], 'text')
+        self.assertEqual(mock_assess.call_args.args, ('cake moved to the big room today',))
+
+    def test_parse_label(self):
+        self.assertTrue(batch.parse_label('Forwarded'))
+        self.assertFalse(batch.parse_label(0))
+        self.assertIsNone(batch.parse_label(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
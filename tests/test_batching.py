@@ -0,0 +1,162 @@
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cake_radar import classifier, ratelimit
+from cake_radar.classifier import ClassifierBatcher, parse_batch_classifier_response
+
+
+def _response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = 90
+    response.usage.completion_tokens = 30
+    return response
+
+
+def _batch_answer(request):
+    messages = json.loads(request['messages'][1]['content'].split(' Messages: ', 1)[1])
+    return _response(json.dumps({'results': [
+        {'id': message['id'], 'decision': 'yes' if 'cake' in message['text'] else 'no', 'certainty': 90, 'reason': message['text']}
+        for message in messages
+    ]}))
+
+
+class TestParseBatchClassifierResponse(unittest.TestCase):
+
+    def test_results_are_keyed_by_id_with_shared_usage(self):
+        raw = json.dumps({'results': [
+            {'id': '1', 'decision': 'no', 'certainty': 10, 'reason': 'b'},
+            {'id': 0, 'decision': 'YES', 'certainty': 120, 'reason': 'A'},
+        ]})
+
+        results = parse_batch_classifier_response(raw, 2, _response(raw))
+
+        self.assertEqual(results['0'], {
+            'decision': 'yes', 'total_certainty': 100, 'reason': 'a', 'prompt_tokens': 45, 'completion_tokens': 15,
+        })
+        self.assertEqual(results['1']['decision'], 'no')
+
+    def test_malformed_and_unknown_entries_are_left_out(self):
+        raw = json.dumps({'results': [
+            {'id': '0', 'decision': 'maybe'},
+            {'id': '7', 'decision': 'yes', 'certainty': 50},
+            {'decision': 'yes'},
+            {'id': '1', 'decision': 'yes', 'certainty': 80, 'reason': 'cake'},
+        ]})
+
+        self.assertEqual(list(parse_batch_classifier_response(raw, 2)), ['1'])
+        self.assertEqual(parse_batch_classifier_response('not json', 2), {})
+
+
+class TestClassifierBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.chat.completions.create.side_effect = lambda **request: _batch_answer(request)
+
+    def _classify_concurrently(self, batcher, texts):
+        results = {}
+        threads = [
+            threading.Thread(target=lambda text=text: results.__setitem__(text, batcher.classify(self.client, text, MagicMock())))
+            for text in texts
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_messages_share_one_request(self):
+        batcher = ClassifierBatcher(max_size=4, window=0.5)
+
+        results = self._classify_concurrently(batcher, ['cake here', 'meeting at 3', 'more cake', 'lunch?'])
+
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+        self.assertEqual(results['cake here']['decision'], 'yes')
+        self.assertEqual(results['cake here']['reason'], 'cake here')
+        self.assertEqual(results['meeting at 3']['decision'], 'no')
+        self.assertEqual(results['lunch?']['reason'], 'lunch?')
+        self.assertEqual(batcher.fallbacks, 0)
+
+    def test_messages_missing_from_the_answer_are_classified_alone(self):
+        def _answer(**request):
+            if 'Messages: ' not in request['messages'][1]['content']:
+                return _response('{"decision": "yes", "certainty": 70, "reason": "single"}')
+            response = _batch_answer(request)
+            answer = json.loads(response.choices[0].message.content)
+            answer['results'] = answer['results'][:1]
+            response.choices[0].message.content = json.dumps(answer)
+            return response
+
+        self.client.chat.completions.create.side_effect = _answer
+        batcher = ClassifierBatcher(max_size=2, window=0.5)
+
+        results = self._classify_concurrently(batcher, ['cake one', 'cake two'])
+
+        self.assertEqual(self.client.chat.completions.create.call_count, 2)
+        self.assertEqual(sorted(result['reason'] for result in results.values()), ['cake one', 'single'])
+        self.assertEqual(batcher.fallbacks, 1)
+
+    def test_failed_batch_request_falls_back_per_message(self):
+        def _answer(**request):
+            if 'Messages: ' in request['messages'][1]['content']:
+                raise RuntimeError('bad request')
+            return _response('{"decision": "no", "certainty": 5, "reason": "single"}')
+
+        self.client.chat.completions.create.side_effect = _answer
+        batcher = ClassifierBatcher(max_size=3, window=0.5)
+
+        results = self._classify_concurrently(batcher, ['a', 'b', 'c'])
+
+        self.assertEqual(self.client.chat.completions.create.call_count, 4)
+        self.assertEqual({result['reason'] for result in results.values()}, {'single'})
+
+    def test_stalled_batch_falls_back_to_a_single_call(self):
+        release = threading.Event()
+
+        def _answer(**request):
+            if 'Messages: ' in request['messages'][1]['content']:
+                release.wait(5)
+                raise RuntimeError('stalled')
+            return _response('{"decision": "no", "certainty": 5, "reason": "single"}')
+
+        self.client.chat.completions.create.side_effect = _answer
+        batcher = ClassifierBatcher(max_size=2, window=0.5, timeout=0.8)
+
+        with self.assertLogs(level='WARNING'):
+            results = self._classify_concurrently(batcher, ['a', 'b'])
+        release.set()
+        batcher._executor.shutdown(wait=True)
+
+        self.assertEqual({result['reason'] for result in results.values()}, {'single'})
+        self.assertEqual(batcher.timeouts, 2)
+        # One stalled batch plus each caller's own call; the abandoned entries are not retried
+        self.assertEqual(self.client.chat.completions.create.call_count, 3)
+        self.assertEqual(batcher.fallbacks, 0)
+
+    def test_rate_limited_batch_is_not_fanned_out(self):
+        self.client.chat.completions.create.side_effect = ratelimit.RateLimitExceeded('no capacity')
+        batcher = ClassifierBatcher(max_size=3, window=0.5)
+
+        with self.assertLogs(level='ERROR'):
+            results = self._classify_concurrently(batcher, ['a', 'b', 'c'])
+
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+        self.assertEqual({result['reason'] for result in results.values()}, {'rate_limited'})
+        self.assertEqual(batcher.fallbacks, 0)
+
+    def test_batching_disabled_by_default(self):
+        with patch.object(classifier, '_get_batcher') as get_batcher, \
+                patch.object(classifier, '_cached_result', return_value=None):
+            self.client.chat.completions.create.side_effect = None
+            self.client.chat.completions.create.return_value = _response('{"decision": "no", "certainty": 1}')
+
+            classifier.assess_certainty(self.client, 'unbatched message', MagicMock())
+
+        get_batcher.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
+os.environ.setdefault('OPENAI_API_KEY', 'dummy')
+os.environ.setdefault('SLACK_TOKEN_VERIFICATION_ENABLED', 'false')
+
+from cake_radar import bench
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_percentile_uses_nearest_rank(self):
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(bench.percentile(values, 0.50), 50.0)
+        self.assertEqual(bench.percentile(values, 0.99), 99.0)
+        self.assertEqual(bench.percentile([], 0.5), 0.0)
+
+    def test_fake_openai_answers_classifier_and_judge(self):
+        client = bench.FakeOpenAI(latency_ms=0, positive_rate=1.0)
+
+        classifier_response = client.chat.completions.create(
+            model='m', messages=[{'role': 'system', 'content': bench.Config.SYSTEM_PROMPT}, {'role': 'user', 'content': 'cake'}],
+        )
+        judge_response = client.chat.completions.create(
+            model='m', messages=[{'role': 'system', 'content': 'judge'}, {'role': 'user', 'content': 'cake'}],
+        )
+
+        self.assertEqual(json.loads(classifier_response.choices[0].message.content)['decision'], 'yes')
+        self.assertEqual(json.loads(judge_response.choices[0].message.content)['verdict'], 'uphold')
+
+    def test_small_run_reports_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            bench.main([
+                '--events', '30', '--concurrency', '4', '--latency-ms', '0', '--slack-latency-ms', '0',
+                '--positive-rate', '1', '--image-rate', '0.5', '--output', path,
+            ])
+            with open(path) as f:
+                result = json.load(f)
+
+        self.assertEqual(result['events'], 30)
+        self.assertGreater(result['alerts'], 0)
+        for stage in ('keyword_match', 'classifier', 'judge_panel', 'image_download', 'slack_post'):
+            self.assertIn('p95_ms', result['stages'][stage])
+        self.assertIn('p99_ms', result['end_to_end'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from cake_radar.cache import TTLCache, approximate_size
+
+from helpers import FakeClock
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.put('a', 1)
+
+        clock.now += 59
+        self.assertEqual(cache.get('a'), 1)
+        clock.now += 2
+        self.assertIsNone(cache.get('a'))
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 1, 1))
+
+    def test_add_inserts_each_key_once_until_it_expires(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+
+        self.assertTrue(cache.add(('C1', '1.0')))
+        self.assertFalse(cache.add(('C1', '1.0')))
+        self.assertIn(('C1', '1.0'), cache)
+        clock.now += 61
+        self.assertNotIn(('C1', '1.0'), cache)
+        self.assertTrue(cache.add(('C1', '1.0')))
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 2, 1))
+
+    def test_concurrent_add_admits_one_caller(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.add('key'))) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 1)
+
+    def test_save_and_load_keep_unexpired_entries(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.put('a', {'decision': 'yes'})
+        clock.now += 30
+        cache.put('b', {'decision': 'no'})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.json')
+            cache.save(path)
+            clock.now += 40
+            restored = TTLCache(maxsize=10, ttl=60, clock=clock)
+
+            self.assertEqual(restored.load(path), 1)
+
+        self.assertIsNone(restored.get('a'))
+        self.assertEqual(restored.get('b'), {'decision': 'no'})
+
+    def test_save_leaves_no_temp_files(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.put('a', 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.json')
+            cache.save(path)
+            cache.save(path)
+
+            self.assertEqual(os.listdir(tmp), ['cache.json'])
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=10, ttl=60, max_bytes=10, sizeof=len)
+        cache.put('a', 'xxxx')
+        cache.put('b', 'yyyy')
+        cache.put('c', 'zzzz')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 'zzzz')
+        self.assertEqual(cache.stats()['bytes'], 8)
+
+    def test_byte_budget_counts_keys_and_nested_values(self):
+        cache = TTLCache(maxsize=100, ttl=60, max_bytes=2000, sizeof=approximate_size, key_sizeof=approximate_size)
+        for index in range(50):
+            cache.put(('C1', f'{index}.0'), {'cake', 'cookies'})
+
+        stats = cache.stats()
+        self.assertLess(stats['size'], 50)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertLessEqual(stats['bytes'], 2000)
+        cache.clear()
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_zero_size_disables_caching(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.put('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import os
+import threading
 from unittest.mock import MagicMock, patch
 
 os.environ['SLACK_BOT_TOKEN'] = 'xoxb-dummy'
@@ -26,6 +27,7 @@ class TestDeduplication(unittest.TestCase):
         """Clear state before each test."""
         cake_radar.processed_messages.clear()
         cake_radar.evaluated_messages.clear()
+        cake_radar.classifier.result_cache.clear()
         cake_radar.initialize(
             slack_app=_fake_slack_app(),
             openai_client=MagicMock(),
@@ -189,6 +191,92 @@ class TestDeduplication(unittest.TestCase):
         self.assertIn('/p1784732573261519', alert_text)
         self.assertNotIn('/p1784733038575069', alert_text)
 
+    @patch('cake_radar.app.assess_certainty')
+    def test_queued_message_is_evaluated_on_worker(self, mock_assess):
+        """Queued events should run the normal handler, including retry dedup."""
+        mock_say = MagicMock()
+        mock_assess.return_value = {'decision': 'no', 'total_certainty': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        event_queue = cake_radar.EventQueue(workers=1, maxsize=10)
+
+        msg = {'text': 'cake', 'channel': 'C1', 'ts': '4000.00'}
+        with patch.object(cake_radar, 'event_queue', event_queue):
+            cake_radar.enqueue_message(msg, mock_say)
+            cake_radar.enqueue_message(msg, mock_say)
+            self.assertTrue(event_queue.shutdown(timeout=5))
+
+        self.assertEqual(mock_assess.call_count, 1)
+        self.assertEqual(event_queue.stats()['completed'], 2)
+
+    def test_event_that_cannot_be_queued_is_logged(self):
+        event_queue = cake_radar.EventQueue(workers=1, maxsize=10)
+        event_queue.shutdown(timeout=5)
+
+        with patch.object(cake_radar, 'event_queue', event_queue), self.assertLogs(level='WARNING') as logs:
+            cake_radar.enqueue_message({'text': 'cake', 'channel': 'C1', 'ts': '4100.00'}, MagicMock())
+
+        self.assertIn('EVENT_DROPPED | channel=C1 | ts=4100.00', logs.output[0])
+        self.assertEqual(event_queue.stats()['rejected'], 1)
+
+    @patch('cake_radar.app.download_slack_images')
+    @patch('cake_radar.app.assess_certainty')
+    def test_cascade_skips_images_when_text_is_decisive(self, mock_assess, mock_download):
+        mock_assess.return_value = {'decision': 'no', 'total_certainty': 95, 'reason': 'meeting', 'prompt_tokens': 1, 'completion_tokens': 1}
+        files = [{'mimetype': 'image/jpeg', 'url_private': 'https://files.slack.com/x.jpg'}]
+
+        with patch.object(cake_radar.Config, 'CASCADE_ENABLED', True), self.assertLogs(level='INFO') as logs:
+            cake_radar.evaluate_message("birthday planning meeting moved to friday", "C1", "5000.00", files, MagicMock())
+
+        mock_download.assert_not_called()
+        mock_assess.assert_called_once_with("birthday planning meeting moved to friday")
+        self.assertIn("path=text", '\n'.join(logs.output))
+
+    @patch('cake_radar.app.download_slack_images')
+    @patch('cake_radar.app.assess_certainty')
+    def test_cascade_adds_images_when_text_is_uncertain(self, mock_assess, mock_download):
+        mock_download.return_value = ['data:image/jpeg;base64,AAAA']
+        mock_assess.side_effect = [
+            {'decision': 'yes', 'total_certainty': 60, 'reason': 'maybe cake', 'prompt_tokens': 1, 'completion_tokens': 1},
+            {'decision': 'no', 'total_certainty': 80, 'reason': 'photo of a cat', 'prompt_tokens': 1, 'completion_tokens': 1},
+        ]
+        files = [{'mimetype': 'image/jpeg', 'url_private': 'https://files.slack.com/x.jpg'}]
+
+        with patch.object(cake_radar.Config, 'CASCADE_ENABLED', True), self.assertLogs(level='INFO') as logs:
+            cake_radar.evaluate_message("look what is on the cake table", "C1", "5001.00", files, MagicMock())
+
+        self.assertEqual(mock_assess.call_count, 2)
+        self.assertEqual(mock_assess.call_args.args, ("look what is on the cake table", ['data:image/jpeg;base64,AAAA']))
+        self.assertIn("path=text+image", '\n'.join(logs.output))
+
+    @patch('cake_radar.app.download_slack_images')
+    @patch('cake_radar.app.assess_certainty')
+    def test_cascade_goes_straight_to_images_for_short_text(self, mock_assess, mock_download):
+        mock_download.return_value = ['data:image/jpeg;base64,AAAA']
+        mock_assess.return_value = {'decision': 'no', 'total_certainty': 90, 'reason': 'not food', 'prompt_tokens': 1, 'completion_tokens': 1}
+        files = [{'mimetype': 'image/heic', 'url_private': 'https://files.slack.com/x.heic'}]
+
+        with patch.object(cake_radar.Config, 'CASCADE_ENABLED', True), self.assertLogs(level='INFO') as logs:
+            cake_radar.evaluate_message("cake!", "C1", "5002.00", files, MagicMock())
+
+        mock_assess.assert_called_once_with("cake!", ['data:image/jpeg;base64,AAAA'])
+        self.assertIn("path=image", '\n'.join(logs.output))
+
+    @patch('cake_radar.app.assess_certainty')
+    def test_prefilter_skips_confident_negatives(self, mock_assess):
+        model = MagicMock()
+        model.score.return_value = 0.01
+
+        with patch.object(cake_radar.prefilter, 'model', model), self.assertLogs(level='INFO') as logs:
+            cake_radar.evaluate_message("cake rota meeting", "C1", "6000.00", [], MagicMock())
+            with patch.object(cake_radar.Config, 'PREFILTER_SHADOW', True):
+                mock_assess.return_value = {'decision': 'no', 'total_certainty': 90, 'reason': 'meeting', 'prompt_tokens': 1, 'completion_tokens': 1}
+                cake_radar.evaluate_message("cake rota meeting", "C1", "6001.00", [], MagicMock())
+
+        output = '\n'.join(logs.output)
+        self.assertIn("PREFILTERED | NOT_FORWARDED | local=0.010", output)
+        self.assertIn("PREFILTER_SHADOW | would skip", output)
+        mock_assess.assert_called_once_with("cake rota meeting", [])
+        self.assertIn(("C1", "6000.00"), cake_radar.evaluated_messages)
+
     @patch('cake_radar.app.assess_certainty')
     def test_thread_replies_ignored(self, mock_assess):
         """Verify that thread replies are ignored."""
@@ -347,6 +435,109 @@ class TestDeduplication(unittest.TestCase):
         self.assertEqual(result['verdict'], 'overturn')
         self.assertEqual(len(result['votes']), 4)
 
+    @patch('cake_radar.app.client')
+    def test_judge_panel_runs_judges_concurrently(self, mock_client):
+        """All four judges should be in flight at the same time."""
+        barrier = threading.Barrier(4, timeout=5)
+
+        def create(**kwargs):
+            barrier.wait()
+            response = MagicMock()
+            response.choices[0].message.content = '{"verdict": "uphold", "reason": "ok"}'
+            return response
+
+        mock_client.chat.completions.create.side_effect = create
+
+        result = cake_radar.judge_decision("Cake at the entrance", "cake offered")
+
+        self.assertEqual(result['verdict'], 'uphold')
+        self.assertEqual([vote['name'] for vote in result['votes']],
+                         ['availability', 'false_positive', 'social_context', 'hungry'])
+        self.assertTrue(all(vote['reason'] == 'ok' for vote in result['votes']))
+
+    @patch('cake_radar.app.client')
+    def test_judge_panel_early_exit_skips_undecided_judges(self, mock_client):
+        """Two upholds make three overturns impossible, so slow judges are skipped."""
+        release = threading.Event()
+        fast_judges = {'availability', 'hungry'}
+        prompts = {judge['prompt']: judge['name'] for judge in cake_radar.Config.JUDGE_SYSTEM_PROMPTS}
+
+        def create(**kwargs):
+            name = prompts[kwargs['messages'][0]['content']]
+            if name not in fast_judges:
+                release.wait(5)
+            response = MagicMock()
+            response.choices[0].message.content = '{"verdict": "uphold", "reason": "available"}'
+            return response
+
+        mock_client.chat.completions.create.side_effect = create
+        with patch.object(cake_radar.Config, 'JUDGE_EARLY_EXIT', True):
+            try:
+                result = cake_radar.judge_decision("Cake at the entrance", "cake offered")
+            finally:
+                release.set()
+
+        self.assertEqual(result['verdict'], 'uphold')
+        votes = {vote['name']: vote for vote in result['votes']}
+        self.assertEqual(len(result['votes']), 4)
+        self.assertEqual(votes['availability']['verdict'], 'uphold')
+        self.assertEqual(votes['hungry']['verdict'], 'uphold')
+        self.assertEqual(votes['false_positive'], {'name': 'false_positive', 'verdict': 'skipped', 'reason': 'quorum_reached'})
+        self.assertEqual(votes['social_context']['verdict'], 'skipped')
+
+    @patch('cake_radar.app.client')
+    def test_consolidated_judge_panel_uses_one_request(self, mock_client):
+        """All four verdicts come back from a single request and feed the same overturn rule."""
+        response = MagicMock()
+        response.choices[0].message.content = (
+            '{"availability": {"verdict": "overturn", "reason": "future event"},'
+            ' "false_positive": {"verdict": "overturn", "reason": "party invite"},'
+            ' "social_context": {"verdict": "overturn", "reason": "calendar mention"},'
+            ' "hungry": {"verdict": "uphold", "reason": "mentions food"}}'
+        )
+        mock_client.chat.completions.create.return_value = response
+
+        with patch.object(cake_radar.Config, 'JUDGE_PANEL_MODE', 'consolidated'):
+            result = cake_radar.judge_decision("Cake next Friday at the party", "cake mentioned")
+
+        self.assertEqual(result['verdict'], 'overturn')
+        self.assertEqual(mock_client.chat.completions.create.call_count, 1)
+        request = mock_client.chat.completions.create.call_args.kwargs
+        for judge in cake_radar.Config.JUDGE_SYSTEM_PROMPTS:
+            self.assertIn(judge['prompt'], request['messages'][0]['content'])
+            self.assertIn(judge['name'], request['messages'][1]['content'])
+        self.assertEqual([vote['name'] for vote in result['votes']],
+                         ['availability', 'false_positive', 'social_context', 'hungry'])
+        self.assertEqual(result['votes'][0]['reason'], 'future event')
+
+    @patch('cake_radar.app.client')
+    def test_consolidated_judge_panel_missing_judge_upholds(self, mock_client):
+        response = MagicMock()
+        response.choices[0].message.content = (
+            '{"availability": {"verdict": "overturn", "reason": "future event"},'
+            ' "false_positive": {"verdict": "overturn", "reason": "party invite"},'
+            ' "social_context": "overturn"}'
+        )
+        mock_client.chat.completions.create.return_value = response
+
+        with patch.object(cake_radar.Config, 'JUDGE_PANEL_MODE', 'consolidated'):
+            result = cake_radar.judge_decision("Cake next Friday at the party", "cake mentioned")
+
+        self.assertEqual(result['verdict'], 'uphold')
+        votes = {vote['name']: vote for vote in result['votes']}
+        self.assertEqual(votes['social_context'], {'name': 'social_context', 'verdict': 'uphold', 'reason': 'parse_error'})
+        self.assertEqual(votes['hungry']['reason'], 'parse_error')
+
+    def test_unknown_judge_panel_mode_warns_once_and_runs_separately(self):
+        with patch.object(cake_radar.Config, 'JUDGE_PANEL_MODE', 'consolidate'), \
+                patch.object(cake_radar.classifier, '_unknown_panel_modes', set()):
+            with self.assertLogs(level='WARNING') as logs:
+                self.assertFalse(cake_radar.classifier._consolidated_panel())
+            self.assertIn("Unknown JUDGE_PANEL_MODE 'consolidate'", logs.output[0])
+
+            with self.assertNoLogs(level='WARNING'):
+                self.assertFalse(cake_radar.classifier._consolidated_panel())
+
     def test_format_judge_votes_includes_each_outcome_and_reason(self):
         votes = [
             {'name': 'availability', 'verdict': 'uphold', 'reason': 'available now'},
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from cake_radar.directory import SlackDirectory
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("ratelimited")
+        self.response = MagicMock(status_code=429, headers={'Retry-After': str(retry_after)})
+
+
+def _fake_client():
+    client = MagicMock()
+    client.users_list.side_effect = [
+        {'members': [{'id': 'U1', 'profile': {'display_name': 'baker'}}], 'response_metadata': {'next_cursor': 'next'}},
+        {'members': [{'id': 'U2', 'profile': {'display_name': '', 'real_name': 'Ann Cook'}}], 'response_metadata': {'next_cursor': ''}},
+    ]
+    client.conversations_list.return_value = {'channels': [{'id': 'C1', 'name': 'general'}]}
+    return client
+
+
+class TestSlackDirectory(unittest.TestCase):
+
+    def _directory(self, **kwargs):
+        directory = SlackDirectory(maxsize=100, ttl=60, refresh_interval=60, page_interval=0, **kwargs)
+        directory.client = _fake_client()
+        return directory
+
+    def test_refresh_loads_all_pages(self):
+        directory = self._directory()
+
+        self.assertEqual(directory.refresh(), 3)
+
+        self.assertEqual(directory.user_name('U1'), '@baker')
+        self.assertEqual(directory.user_name('U2'), '@Ann Cook')
+        self.assertEqual(directory.channel_name('C1'), '#general')
+        self.assertEqual(directory.client.users_list.call_args.kwargs['cursor'], 'next')
+
+    def test_unknown_names_fall_back_and_resolve_in_background(self):
+        directory = self._directory()
+        directory.client.users_info.return_value = {'user': {'id': 'U9', 'profile': {'display_name': 'late'}}}
+
+        self.assertEqual(directory.user_name('U9'), '@U9')
+        self.assertEqual(directory.user_name('U9'), '@U9')
+        directory.resolve_pending()
+
+        directory.client.users_info.assert_called_once_with(user='U9')
+        self.assertEqual(directory.user_name('U9'), '@late')
+
+    def test_misses_are_resolved_when_bulk_refresh_is_disabled(self):
+        directory = SlackDirectory(maxsize=100, ttl=60, refresh_interval=0, page_interval=0)
+        client = _fake_client()
+        client.users_info.return_value = {'user': {'id': 'U9', 'profile': {'display_name': 'late'}}}
+        directory.start(client)
+        try:
+            self.assertEqual(directory.user_name('U9'), '@U9')
+            for _ in range(100):
+                if directory.user_name('U9') == '@late':
+                    break
+                time.sleep(0.01)
+        finally:
+            directory.stop()
+
+        self.assertEqual(directory.user_name('U9'), '@late')
+        client.users_list.assert_not_called()
+
+    def test_failed_lookups_are_not_retried_immediately(self):
+        directory = self._directory()
+        directory.client.conversations_info.side_effect = Exception("channel_not_found")
+
+        self.assertEqual(directory.channel_name('C9'), 'C9')
+        directory.resolve_pending()
+        self.assertEqual(directory.channel_name('C9'), 'C9')
+        directory.resolve_pending()
+
+        directory.client.conversations_info.assert_called_once()
+
+    def test_rate_limited_calls_are_retried(self):
+        directory = self._directory()
+        directory.client.users_info.side_effect = [RateLimited(0), {'user': {'id': 'U9', 'profile': {'display_name': 'late'}}}]
+
+        directory.user_name('U9')
+        directory.resolve_pending()
+
+        self.assertEqual(directory.user_name('U9'), '@late')
+        self.assertEqual(directory.stats()['rate_limited'], 1)
+
+    def test_snapshot_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'directory.json')
+            self._directory(snapshot_path=path).refresh()
+
+            restored = SlackDirectory(maxsize=100, ttl=60, refresh_interval=60, snapshot_path=path)
+            restored.start(MagicMock())
+            restored.stop()
+
+        self.assertEqual(restored.channel_name('C1'), '#general')
+        restored.client.users_list.assert_not_called()
+
+    def test_concurrent_snapshot_saves_do_not_clobber_each_other(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'directory.json')
+            directories = [self._directory(snapshot_path=path) for _ in range(4)]
+            for directory in directories:
+                directory.refresh()
+
+            def save_repeatedly(directory):
+                for _ in range(25):
+                    directory.save_snapshot()
+
+            threads = [threading.Thread(target=save_repeatedly, args=(d,)) for d in directories]
+            with self.assertNoLogs(level='WARNING'):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            restored = SlackDirectory(maxsize=100, ttl=60, refresh_interval=60, snapshot_path=path)
+            self.assertEqual(restored.names.load(path), 3)
+            self.assertEqual(os.listdir(tmp), ['directory.json'])
+
+    def test_prefetch_fills_names_without_a_thread_and_delays_the_first_refresh(self):
+        directory = SlackDirectory(maxsize=100, ttl=60, refresh_interval=60, page_interval=0)
+        client = _fake_client()
+
+        self.assertEqual(directory.prefetch(client), 3)
+        self.assertFalse(directory.running)
+        self.assertEqual(directory.user_name('U1'), '@baker')
+
+        directory.start(client)
+        directory.stop()
+        self.assertTrue(directory.running)
+        self.assertEqual(client.users_list.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
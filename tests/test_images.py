@@ -0,0 +1,321 @@
+import base64
+import io
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+from PIL import Image, ImageDraw
+
+from cake_radar import images
+
+
+def _png_bytes(size=(32, 24)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def _noise_image(size, mode='RGB'):
+    return Image.frombytes(mode, size, os.urandom(size[0] * size[1] * len(mode)))
+
+
+def _encoded(img, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def _decode_uri(uri):
+    return Image.open(io.BytesIO(base64.b64decode(uri.split(',', 1)[1])))
+
+
+def _response(content, content_type='image/png'):
+    response = MagicMock()
+    response.is_redirect = False
+    response.is_permanent_redirect = False
+    response.status_code = 200
+    response.headers = {'Content-Type': content_type}
+    response.content = content
+    return response
+
+
+PHOTO = {
+    'mimetype': 'image/jpeg',
+    'url_private_download': 'https://files.slack.com/original.jpg',
+    'original_w': 4032,
+    'original_h': 3024,
+    'thumb_360': 'https://files.slack.com/thumb_360.jpg',
+    'thumb_480': 'https://files.slack.com/thumb_480.jpg',
+    'thumb_720': 'https://files.slack.com/thumb_720.jpg',
+    'thumb_1024': 'https://files.slack.com/thumb_1024.jpg',
+}
+
+
+class TestImageSelection(unittest.TestCase):
+
+    def test_low_detail_uses_smallest_thumbnail_covering_512px(self):
+        self.assertEqual(images._image_url(PHOTO, 'low'), PHOTO['thumb_720'])
+
+    def test_high_detail_falls_back_to_original_when_thumbnails_are_too_small(self):
+        self.assertEqual(images._image_url(PHOTO, 'high'), PHOTO['url_private_download'])
+
+    def test_small_original_is_used_as_is(self):
+        small = {**PHOTO, 'original_w': 400, 'original_h': 300}
+        self.assertEqual(images._image_url(small, 'low'), PHOTO['url_private_download'])
+
+    def test_original_is_used_when_no_thumbnails_exist(self):
+        bare = {'mimetype': 'image/png', 'url_private': 'https://files.slack.com/x.png'}
+        self.assertEqual(images._image_url(bare, 'low'), 'https://files.slack.com/x.png')
+
+    def test_non_images_are_ignored(self):
+        self.assertIsNone(images._image_url({'mimetype': 'application/pdf', 'url_private': 'u'}, 'low'))
+
+    def test_download_fetches_thumbnail_and_returns_data_uri(self):
+        session = MagicMock()
+        session.get.return_value = _response(_png_bytes())
+
+        uris = images.download_slack_images([PHOTO], 'xoxb-dummy', detail='low', session=session)
+
+        self.assertEqual(session.get.call_args_list[0].args[0], PHOTO['thumb_720'])
+        self.assertEqual(session.get.call_args_list[0].kwargs['timeout'], images.DEFAULT_TIMEOUT)
+        self.assertEqual(len(uris), 1)
+        self.assertTrue(uris[0].startswith('data:image/png;base64,'))
+        decoded = Image.open(io.BytesIO(base64.b64decode(uris[0].split(',', 1)[1])))
+        self.assertEqual(decoded.size, (32, 24))
+
+
+
+class TestImageReuse(unittest.TestCase):
+
+    def setUp(self):
+        images.image_cache.clear()
+
+    def test_same_slack_file_is_downloaded_once(self):
+        session = MagicMock()
+        session.get.return_value = _response(_png_bytes())
+        photo = {**PHOTO, 'id': 'F123', 'timestamp': 1700000000}
+
+        first = images.download_slack_images([photo], 'xoxb-dummy', session=session)
+        second = images.download_slack_images([photo], 'xoxb-dummy', session=session)
+
+        self.assertEqual(first, second)
+        self.assertEqual(session.get.call_count, 1)
+
+    def test_updated_slack_file_is_downloaded_again(self):
+        session = MagicMock()
+        session.get.return_value = _response(_png_bytes())
+        photo = {**PHOTO, 'id': 'F123', 'timestamp': 1700000000}
+
+        images.download_slack_images([photo], 'xoxb-dummy', session=session)
+        images.download_slack_images([{**photo, 'updated': 1700000100}], 'xoxb-dummy', session=session)
+
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_reencoded_copies_share_a_digest(self):
+        gradient = Image.linear_gradient('L').rotate(90).resize((600, 400)).convert('RGB')
+        ImageDraw.Draw(gradient).ellipse((80, 60, 260, 300), fill=(250, 250, 250))
+        fine = images._to_data_uri(_encoded(gradient, 'JPEG', quality=95), 'image/jpeg', 'image/jpeg')
+        coarse = images._to_data_uri(
+            _encoded(gradient.resize((300, 200)), 'JPEG', quality=40), 'image/jpeg', 'image/jpeg',
+        )
+        other = images._to_data_uri(
+            _encoded(gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), 'JPEG'), 'image/jpeg', 'image/jpeg',
+        )
+
+        self.assertNotEqual(fine, coarse)
+        self.assertEqual(images.image_digest(fine), images.image_digest(coarse))
+        self.assertTrue(images.image_digest(fine).startswith('phash:'))
+        self.assertNotEqual(images.image_digest(fine), images.image_digest(other))
+
+    def test_unknown_data_uri_falls_back_to_content_hash(self):
+        self.assertEqual(len(images.image_digest('data:image/png;base64,AAAA')), 64)
+
+
+class TestHttpSession(unittest.TestCase):
+
+    def test_session_pools_connections_and_retries(self):
+        session = images.create_http_session(pool_size=7, retries=3, backoff=0.1)
+        adapter = session.get_adapter('https://files.slack.com/x.png')
+
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertEqual(images.http_pool_stats(session), {})
+
+    def test_async_client_limits_connections_and_drops_cookies(self):
+        import httpx
+
+        client = images.create_async_http_client(pool_size=7)
+        response = httpx.Response(
+            200, headers={'Set-Cookie': 'd=1; Domain=files.slack.com'},
+            request=httpx.Request('GET', 'https://files.slack.com/x.png'),
+        )
+        client.cookies.extract_cookies(response)
+
+        self.assertEqual(client._transport._pool._max_connections, 7)
+        self.assertEqual(len(client.cookies), 0)
+
+
+class TestImageEncoding(unittest.TestCase):
+
+    def test_large_png_is_downscaled_to_detail_size(self):
+        content = _encoded(Image.new('RGB', (3000, 2000), (10, 200, 30)), 'PNG')
+
+        with self.assertLogs(level='INFO') as logs:
+            uri = images._to_data_uri(content, 'image/png', 'image/png', detail='low')
+
+        self.assertTrue(uri.startswith('data:image/png;base64,'))
+        self.assertEqual(_decode_uri(uri).size, (512, 341))
+        self.assertIn('IMAGE_ENCODED | PNG 3000x2000', logs.output[0])
+
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        content = _encoded(Image.new('RGB', (4000, 3000), (200, 100, 50)), 'JPEG')
+
+        uri = images._to_data_uri(content, 'image/jpeg', 'image/jpeg', detail='low')
+
+        self.assertTrue(uri.startswith('data:image/jpeg;base64,'))
+        self.assertEqual(_decode_uri(uri).size, (512, 384))
+
+    def test_data_uri_stays_within_byte_budget(self):
+        content = _encoded(_noise_image((1024, 1024)), 'PNG')
+
+        uri = images._to_data_uri(content, 'image/png', 'image/png', detail='high', max_bytes=60_000)
+
+        payload = uri.split(',', 1)[1]
+        self.assertLessEqual(len(payload), 60_000)
+        self.assertTrue(uri.startswith('data:image/jpeg;base64,'))
+
+    def test_api_ready_image_is_passed_through_unchanged(self):
+        content = _encoded(_noise_image((400, 300)), 'JPEG', quality=80)
+
+        with patch.object(images, '_encode_within_budget') as encode, self.assertLogs(level='INFO') as logs:
+            uri = images._to_data_uri(content, 'image/jpeg', 'image/jpeg', detail='low')
+
+        encode.assert_not_called()
+        self.assertEqual(uri, 'data:image/jpeg;base64,' + base64.b64encode(content).decode('ascii'))
+        self.assertIn('IMAGE_PASSTHROUGH | JPEG 400x300', logs.output[0])
+
+    def test_low_detail_slack_thumbnail_is_passed_through(self):
+        thumbnail = _encoded(Image.linear_gradient('L').resize((720, 540)).convert('RGB'), 'JPEG')
+        session = MagicMock()
+        session.get.return_value = _response(thumbnail, 'image/jpeg')
+
+        with patch.object(images, '_encode_within_budget') as encode:
+            uris = images.download_slack_images([PHOTO], 'xoxb-dummy', detail='low', session=session)
+
+        self.assertEqual(session.get.call_args_list[0].args[0], PHOTO['thumb_720'])
+        encode.assert_not_called()
+        self.assertEqual(uris, ['data:image/jpeg;base64,' + base64.b64encode(thumbnail).decode('ascii')])
+        self.assertTrue(images.image_digest(uris[0]).startswith('phash:'))
+
+    def test_non_jpeg_passthrough_is_not_decoded(self):
+        content = _encoded(Image.linear_gradient('L').resize((300, 200)), 'PNG')
+
+        with patch.object(images, 'dhash') as phash:
+            uri = images._to_data_uri(content, 'image/png', 'image/png')
+
+        phash.assert_not_called()
+        self.assertEqual(uri, 'data:image/png;base64,' + base64.b64encode(content).decode('ascii'))
+        self.assertEqual(len(images.image_digest(uri)), 64)
+
+    def test_images_over_budget_or_animated_are_reencoded(self):
+        small = _encoded(_noise_image((400, 300)), 'PNG')
+        frames = [Image.new('RGB', (64, 64), color) for color in ('red', 'blue')]
+        buf = io.BytesIO()
+        frames[0].save(buf, 'GIF', save_all=True, append_images=frames[1:])
+
+        for content, max_bytes in ((small, 60_000), (buf.getvalue(), images.DEFAULT_MAX_DATA_URI_BYTES)):
+            result = images._transcode(content, 'low', max_bytes)
+            self.assertNotIn('passthrough', result)
+            self.assertNotEqual(result['data_uri'].split(',', 1)[1], base64.b64encode(content).decode('ascii'))
+
+
+class TestTranscoder(unittest.TestCase):
+
+    def test_pool_result_matches_inline_result(self):
+        content = _encoded(Image.new('RGB', (3000, 2000), (10, 200, 30)), 'PNG')
+        transcoder = images.Transcoder(workers=1, inline_max_bytes=0)
+        try:
+            pooled = transcoder.transcode(content, 'low', images.DEFAULT_MAX_DATA_URI_BYTES)
+        finally:
+            transcoder.shutdown()
+
+        self.assertEqual(pooled, images._transcode(content, 'low', images.DEFAULT_MAX_DATA_URI_BYTES))
+        self.assertEqual(transcoder.stats()['pooled'], 1)
+
+    def test_small_known_formats_stay_in_the_calling_thread(self):
+        transcoder = images.Transcoder(workers=2)
+
+        with patch.object(images, 'ProcessPoolExecutor') as executor:
+            result = transcoder.transcode(_png_bytes(), 'low', images.DEFAULT_MAX_DATA_URI_BYTES)
+
+        executor.assert_not_called()
+        self.assertEqual(result['size'], (32, 24))
+        self.assertEqual(transcoder.stats()['inline'], 1)
+        self.assertFalse(transcoder.runs_inline(b'\x00\x00\x00\x1cftypheic' + b'\x00' * 64))
+
+    def test_timed_out_task_retires_the_pool_after_other_images_finish(self):
+        transcoder = images.Transcoder(workers=2, timeout=1.0, inline_max_bytes=0)
+        stuck, other = Future(), Future()
+        worker = MagicMock()
+        executor = MagicMock(_processes={1: worker})
+        executor.submit.side_effect = [stuck, other]
+        results = []
+
+        with patch.object(images, 'ProcessPoolExecutor', return_value=executor):
+            timer = threading.Timer(0.3, lambda: results.append(
+                transcoder.transcode(_png_bytes(), 'low', images.DEFAULT_MAX_DATA_URI_BYTES)
+            ))
+            timer.start()
+            with self.assertRaises(TimeoutError):
+                transcoder.transcode(_png_bytes(), 'low', images.DEFAULT_MAX_DATA_URI_BYTES)
+
+            self.assertIsNone(transcoder._executor)
+            worker.terminate.assert_not_called()
+            other.set_result({'size': (32, 24)})
+            timer.join(5)
+            for _ in range(50):
+                if executor.shutdown.called:
+                    break
+                time.sleep(0.02)
+
+        self.assertEqual(results, [{'size': (32, 24)}])
+        worker.terminate.assert_called_once()
+        executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertEqual(transcoder.stats()['timeouts'], 1)
+
+    def test_retired_pool_shuts_down_without_private_process_map(self):
+        transcoder = images.Transcoder(workers=1)
+        executor = MagicMock(spec=['shutdown'])
+
+        transcoder._stop(executor, [])
+
+        executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    def test_concurrent_counts_are_not_lost(self):
+        transcoder = images.Transcoder()
+        threads = [threading.Thread(target=lambda: [transcoder._count('inline') for _ in range(1000)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(transcoder.stats()['inline'], 8000)
+
+    def test_oversized_sources_are_skipped_before_decoding(self):
+        content = _encoded(Image.new('RGB', (3000, 2000)), 'PNG')
+
+        with patch.object(images.transcoder, 'max_source_bytes', 1000), \
+                patch.object(images.transcoder, 'transcode') as transcode:
+            self.assertIsNone(images._to_data_uri(content, 'image/png', 'image/png'))
+        transcode.assert_not_called()
+
+        with patch.object(images.transcoder, 'max_pixels', 1_000_000):
+            self.assertIsNone(images._to_data_uri(content, 'image/png', 'image/png'))
+
+
+if __name__ == '__main__':
+    unittest.main()
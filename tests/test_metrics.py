@@ -0,0 +1,80 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
+os.environ.setdefault('OPENAI_API_KEY', 'dummy')
+os.environ.setdefault('SLACK_TOKEN_VERIFICATION_ENABLED', 'false')
+
+from cake_radar import app as cake_radar
+from cake_radar import metrics
+
+
+def _fake_slack_app():
+    slack_app = MagicMock()
+    slack_app.message.side_effect = lambda *args, **kwargs: (lambda func: func)
+    slack_app.event.side_effect = lambda *args, **kwargs: (lambda func: func)
+    return slack_app
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        cake_radar.classifier.result_cache.clear()
+        cake_radar.initialize(slack_app=_fake_slack_app(), openai_client=MagicMock(), validate_config=False)
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram('test_seconds', "Test histogram.", ['stage'], buckets=(0.1, 1))
+        metrics.REGISTRY.remove(histogram)
+        histogram.observe(0.05, stage='a')
+        histogram.observe(0.5, stage='a')
+        histogram.observe(5, stage='a')
+
+        lines = histogram.render()
+
+        self.assertIn('test_seconds_bucket{stage="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{stage="a",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{stage="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{stage="a"} 5.55', lines)
+        self.assertIn('test_seconds_count{stage="a"} 3', lines)
+
+    def test_labels_must_match(self):
+        counter = metrics.Counter('test_total', "Test counter.", ['model'])
+        metrics.REGISTRY.remove(counter)
+
+        with self.assertRaises(ValueError):
+            counter.inc(kind='judge')
+
+    @patch('cake_radar.app.client')
+    def test_openai_calls_and_tokens_are_counted(self, mock_client):
+        response = MagicMock()
+        response.choices[0].message.content = '{"decision": "no", "certainty": 80, "reason": "meeting"}'
+        response.usage.prompt_tokens = 120
+        response.usage.completion_tokens = 9
+        mock_client.chat.completions.create.return_value = response
+        model = cake_radar.Config.OPENAI_MODEL
+        calls = metrics.OPENAI_CALLS.value(model=model, kind='classifier')
+        tokens = metrics.OPENAI_TOKENS.value(model=model, type='prompt')
+        stage_count = metrics.STAGE_SECONDS.count(stage='classifier')
+
+        cake_radar.assess_certainty("cake meeting at three, bring a mug")
+
+        self.assertEqual(metrics.OPENAI_CALLS.value(model=model, kind='classifier'), calls + 1)
+        self.assertEqual(metrics.OPENAI_TOKENS.value(model=model, type='prompt'), tokens + 120)
+        self.assertEqual(metrics.STAGE_SECONDS.count(stage='classifier'), stage_count + 1)
+
+    def test_metrics_endpoint_serves_prometheus_text(self):
+        response = cake_radar.flask_app.test_client().get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE cake_radar_stage_seconds histogram', body)
+        self.assertIn('cake_radar_cache_entries{cache="result"}', body)
+        self.assertIn('# TYPE cake_radar_cache_hits_total counter', body)
+        self.assertIn('cake_radar_cache_evictions_total{cache="result"}', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
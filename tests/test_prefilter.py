@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from cake_radar.prefilter import PreFilter, parse_evaluation_log
+
+
+POSITIVE = [
+    "cake in the kitchen on the 3rd floor",
+    "leftover cupcakes by the coffee machine, help yourselves",
+    "brought brownies, they are in the pantry",
+    "free pizza in the lunch area",
+]
+NEGATIVE = [
+    "birthday planning meeting moved to friday",
+    "who wants to organise the cake rota next month?",
+    "the cake is a lie",
+    "reminder: pizza order form closes tomorrow",
+]
+
+
+class TestPreFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.model = PreFilter.train(POSITIVE + NEGATIVE, [1] * len(POSITIVE) + [0] * len(NEGATIVE), dimensions=2 ** 12)
+
+    def test_training_separates_the_classes(self):
+        positive = min(self.model.score(text) for text in POSITIVE)
+        negative = max(self.model.score(text) for text in NEGATIVE)
+        self.assertGreater(positive, 0.5)
+        self.assertLess(negative, 0.5)
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'prefilter.npz')
+            self.model.save(path)
+            loaded = PreFilter.load(path)
+
+        self.assertEqual(loaded.dimensions, 2 ** 12)
+        self.assertAlmostEqual(loaded.score(POSITIVE[0]), self.model.score(POSITIVE[0]), places=5)
+
+    def test_parse_evaluation_log(self):
+        lines = [
+            'INFO EVALUATED | FORWARDED | AI=yes 95% | keywords=[\'cake\'] | 12:00 | #general | @ann | "Cake in the kitchen"\n',
+            'INFO EVALUATED (edit) | NOT_FORWARDED | AI=no 80% | keywords=[\'cake\'] | 12:01 | #general | @bob | "cake meeting"\n',
+            'INFO Loaded 12 keywords\n',
+        ]
+
+        texts, labels = parse_evaluation_log(lines)
+
+        self.assertEqual(texts, ["Cake in the kitchen", "cake meeting"])
+        self.assertEqual(labels, [1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
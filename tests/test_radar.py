@@ -1,7 +1,10 @@
 import os
+import re
 import logging
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
 os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
 os.environ.setdefault('OPENAI_API_KEY', 'dummy')
@@ -23,6 +26,10 @@ cake_radar.initialize(
     validate_config=False,
 )
 
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    cake_radar.classifier.result_cache.clear()
+
 def test_keywords_loaded():
     """Verify keywords are loaded correctly."""
     assert len(cake_radar.Config.KEYWORDS) > 0
@@ -58,7 +65,7 @@ def test_slack_events_access_log_filter_keeps_non_success_logs():
 
     assert cake_radar.SlackEventsAccessLogFilter().filter(record)
 
-def test_logging_is_configured_when_app_is_imported():
+def test_logging_is_configured_when_app_is_initialized():
     assert cake_radar._logging_configured
     assert logging.getLogger().level <= logging.INFO
 
@@ -78,6 +85,30 @@ def test_keyword_matching():
         found = bool(cake_radar.match_keywords(text))
         assert found == expected, f"Failed for text: '{text}'"
 
+def test_keyword_matching_returns_every_overlapping_keyword_in_config_order():
+    """The single-pass matcher should agree with a per-keyword search."""
+    text = "Carrot cake, BROWNIES and banana bread near 2.1"
+    expected = [
+        keyword
+        for keyword in cake_radar.Config.KEYWORDS
+        if re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", text.lower())
+    ]
+
+    assert cake_radar.match_keywords(text) == expected
+    assert "carrot cake" in expected and "cake" in expected
+    assert "brownies" in expected and "brownie" not in expected
+
+def test_keyword_matcher_recompiles_when_keywords_change():
+    original = cake_radar.Config.KEYWORDS
+    try:
+        cake_radar.Config.KEYWORDS = ["pie", "apple pie"]
+        assert cake_radar.match_keywords("apple pie here") == ["pie", "apple pie"]
+        assert cake_radar.match_keywords("pies") == []
+        cake_radar.Config.KEYWORDS[0] = "tart"
+        assert cake_radar.match_keywords("a tart and a pie") == ["tart"]
+    finally:
+        cake_radar.Config.KEYWORDS = original
+
 @patch('cake_radar.app.client')
 def test_assess_certainty_positive(mock_client):
     """Verify assess_certainty handles positive AI response."""
@@ -116,3 +147,27 @@ def test_assess_certainty_garbage_response(mock_client):
     result = cake_radar.assess_certainty("Weird text")
     
     assert result['total_certainty'] == 0
+
+@patch('cake_radar.app.client')
+def test_assess_certainty_reuses_cached_result_for_normalized_text(mock_client):
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"decision": "yes", "certainty": 95, "reason": "cake offered"}'
+    mock_client.chat.completions.create.return_value = mock_response
+
+    first = cake_radar.assess_certainty("There is  cake in the kitchen")
+    second = cake_radar.assess_certainty("there is cake in the kitchen ")
+
+    assert mock_client.chat.completions.create.call_count == 1
+    assert second['decision'] == first['decision'] == 'yes'
+    assert second['cached'] is True
+    assert second['prompt_tokens'] == 0
+    assert cake_radar.classifier.result_cache.stats()['hits'] >= 1
+
+@patch('cake_radar.app.client')
+def test_assess_certainty_does_not_cache_errors(mock_client):
+    mock_client.chat.completions.create.side_effect = Exception("boom")
+
+    cake_radar.assess_certainty("Cake for everyone")
+    cake_radar.assess_certainty("Cake for everyone")
+
+    assert mock_client.chat.completions.create.call_count == 2
@@ -0,0 +1,121 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cake_radar import classifier, ratelimit
+from cake_radar.ratelimit import CLASSIFIER, JUDGE, ModelLimiter, RateLimitExceeded
+
+from helpers import FakeClock
+
+
+class RateLimitError(Exception):
+    def __init__(self, message='rate_limit_exceeded', retry_after_ms='1'):
+        super().__init__(message)
+        self.status_code = 429
+        self.response = MagicMock(status_code=429, headers={'retry-after-ms': retry_after_ms})
+
+
+def _response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = 50
+    response.usage.completion_tokens = 5
+    return response
+
+
+class TestModelLimiter(unittest.TestCase):
+
+    def test_request_bucket_refills_over_time(self):
+        clock = FakeClock()
+        limiter = ModelLimiter(requests_per_minute=6, clock=clock)
+
+        self.assertEqual(limiter._try_acquire(10, CLASSIFIER), 0)
+        self.assertAlmostEqual(limiter._try_acquire(10, CLASSIFIER), 10.0)
+        clock.now += 10
+        self.assertEqual(limiter._try_acquire(10, CLASSIFIER), 0)
+
+    def test_rate_limit_halves_concurrency_and_pauses(self):
+        clock = FakeClock()
+        limiter = ModelLimiter(max_concurrency=8, clock=clock)
+        limiter._try_acquire(10, CLASSIFIER)
+
+        limiter.release(rate_limited=True, retry_after=5)
+
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertAlmostEqual(limiter._try_acquire(10, JUDGE), 5.0)
+        clock.now += 5
+        self.assertEqual(limiter._try_acquire(10, JUDGE), 0)
+        limiter.release()
+        self.assertEqual(limiter.concurrency, 4.25)
+
+    def test_judges_are_admitted_before_classifiers(self):
+        limiter = ModelLimiter(max_concurrency=1)
+        limiter.acquire(10, CLASSIFIER)
+        order = []
+
+        def call(priority, name):
+            limiter.acquire(10, priority, timeout=5)
+            order.append(name)
+            limiter.release()
+
+        classifier_thread = threading.Thread(target=call, args=(CLASSIFIER, 'classifier'))
+        classifier_thread.start()
+        time.sleep(0.05)
+        judge_thread = threading.Thread(target=call, args=(JUDGE, 'judge'))
+        judge_thread.start()
+        time.sleep(0.05)
+        limiter.release()
+        classifier_thread.join()
+        judge_thread.join()
+
+        self.assertEqual(order, ['judge', 'classifier'])
+
+    def test_acquire_times_out(self):
+        limiter = ModelLimiter(max_concurrency=1)
+        limiter.acquire(10)
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(10, timeout=0.05)
+
+
+class TestRateLimitedCalls(unittest.TestCase):
+
+    def setUp(self):
+        classifier.result_cache.clear()
+        ratelimit._limiters.clear()
+
+    def tearDown(self):
+        ratelimit._limiters.clear()
+
+    def test_classifier_retries_after_429(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            RateLimitError(),
+            _response('{"decision": "yes", "certainty": 95, "reason": "cake offered"}'),
+        ]
+
+        result = classifier.assess_certainty(client, "There is cake", MagicMock())
+
+        self.assertEqual(result['decision'], 'yes')
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        self.assertEqual(ratelimit.limiter_stats()[classifier.Config.OPENAI_MODEL]['rate_limited'], 1)
+
+    def test_persistent_429_is_reported_not_dropped_as_no(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = RateLimitError()
+
+        with patch.object(classifier.Config, 'OPENAI_RATE_LIMIT_RETRIES', 1):
+            result = classifier.assess_certainty(client, "There is cake", MagicMock())
+
+        self.assertEqual((result['decision'], result['reason']), ('error', 'rate_limited'))
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+
+    def test_quota_errors_are_not_retried(self):
+        self.assertIsNone(ratelimit.retry_after(RateLimitError('insufficient_quota')))
+        self.assertEqual(ratelimit.retry_after(RateLimitError(retry_after_ms='250')), 0.25)
+        self.assertIsNone(ratelimit.retry_after(Exception("boom")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from cake_radar.state import SQLiteStore
+
+from helpers import FakeClock
+
+
+def _claim(path, results):
+    results.put(SQLiteStore(path, 'processed_messages', 100, 60).add(('C1', '1000.00')))
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'state.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_add_is_shared_between_stores(self):
+        first = SQLiteStore(self.path, 'processed_messages', 100, 60)
+        second = SQLiteStore(self.path, 'processed_messages', 100, 60)
+
+        self.assertTrue(first.add(('C1', '1000.00')))
+        self.assertFalse(second.add(('C1', '1000.00')))
+        self.assertIn(('C1', '1000.00'), second)
+        self.assertEqual(second.stats()['hits'], 1)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        store = SQLiteStore(self.path, 'evaluated_messages', 100, 60, clock=clock)
+        store.put(('C1', '1000.00'), {'cake', 'taart'})
+
+        self.assertEqual(store.get(('C1', '1000.00')), ['cake', 'taart'])
+        clock.now += 61
+        self.assertIsNone(store.get(('C1', '1000.00')))
+        self.assertTrue(store.add(('C1', '1000.00')))
+
+    def test_only_one_process_claims_a_message(self):
+        SQLiteStore(self.path, 'processed_messages', 100, 60).clear()
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        processes = [context.Process(target=_claim, args=(self.path, results)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        claims = [results.get(timeout=5) for _ in processes]
+        self.assertEqual(claims.count(True), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
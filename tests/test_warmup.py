@@ -0,0 +1,117 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault('SLACK_BOT_TOKEN', 'xoxb-dummy')
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'dummy')
+os.environ.setdefault('OPENAI_API_KEY', 'dummy')
+os.environ.setdefault('SLACK_TOKEN_VERIFICATION_ENABLED', 'false')
+
+from cake_radar import app as cake_radar
+
+
+def _decorator(*args, **kwargs):
+    def wrapper(func):
+        return func
+    return wrapper
+
+
+def _fake_slack_app():
+    slack_app = MagicMock()
+    slack_app.message.side_effect = _decorator
+    slack_app.event.side_effect = _decorator
+    return slack_app
+
+
+class TestWarmup(unittest.TestCase):
+
+    def setUp(self):
+        cake_radar.initialize(slack_app=_fake_slack_app(), openai_client=MagicMock(), validate_config=False)
+        self.http = cake_radar.flask_app.test_client()
+
+    def test_health_reports_ready_once_initialized(self):
+        response = self.http.get('/health')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['ready'])
+
+    def test_health_is_not_ready_before_worker_threads_start(self):
+        with patch.object(cake_radar, '_background_pid', None):
+            response = self.http.get('/health')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['ready'])
+
+    def test_health_warms_up_a_lazily_loaded_worker(self):
+        def _warmup():
+            cake_radar.initialize(slack_app=_fake_slack_app(), openai_client=MagicMock(), validate_config=False)
+
+        with patch.object(cake_radar, 'app', None), \
+                patch.object(cake_radar, '_background_pid', None), \
+                patch.object(cake_radar, 'warmup', side_effect=_warmup) as warmup:
+            response = self.http.get('/health')
+
+        warmup.assert_called_once_with()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['ready'])
+
+    def test_health_stays_unready_when_warmup_fails(self):
+        with patch.object(cake_radar, 'app', None), \
+                patch.object(cake_radar, 'warmup', side_effect=ValueError('missing token')), \
+                self.assertLogs(level='WARNING'):
+            response = self.http.get('/health')
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_warmup_compiles_matcher_and_registers_codecs(self):
+        with patch.object(cake_radar, 'get_matcher') as get_matcher, \
+                patch.object(cake_radar.images, 'register_codecs') as register_codecs, \
+                patch.object(cake_radar.directory, 'prefetch') as prefetch:
+            cake_radar.warmup(slack_app=_fake_slack_app(), openai_client=MagicMock())
+
+        get_matcher.assert_called_once()
+        register_codecs.assert_called_once()
+        # Injected test apps never talk to Slack
+        prefetch.assert_not_called()
+        self.assertTrue(self.http.get('/health').get_json()['warmed_up'])
+
+    def test_preload_starts_worker_threads_only_after_fork(self):
+        with patch.object(cake_radar, 'warmup') as warmup, \
+                patch.object(cake_radar, '_start_background') as start_background, \
+                patch.object(cake_radar, 'gc') as gc, \
+                patch('os.register_at_fork') as register_at_fork:
+            cake_radar.create_app(preload=True)
+            warmup.assert_called_once_with(start_background=False)
+            gc.disable.assert_called_once()
+            gc.freeze.assert_called_once()
+            after_fork = register_at_fork.call_args.kwargs['after_in_child']
+
+            with patch('os.getppid', return_value=os.getpid()):
+                after_fork()
+            with patch('os.getppid', return_value=-1):
+                after_fork()
+
+        start_background.assert_called_once_with(cake_radar.app.client)
+        gc.enable.assert_called_once()
+
+    def test_stats_report_memory_per_worker(self):
+        cake_radar.processed_messages.put(('C1', '1.0'), True)
+
+        memory = self.http.get('/stats').get_json()['memory']
+
+        self.assertEqual(memory['pid'], os.getpid())
+        self.assertGreater(memory['rss_bytes'], 0)
+        self.assertGreater(memory['cache_bytes']['processed_messages'], 0)
+        self.assertIn('cake_radar_process_resident_memory_bytes', self.http.get('/metrics').get_data(as_text=True))
+
+    def test_cli_runs_do_not_start_background_work(self):
+        with patch.object(cake_radar, 'initialize') as initialize, \
+                patch('sys.argv', ['cake-radar', '--test', 'standup moved']), \
+                patch('builtins.print'), self.assertRaises(SystemExit):
+            cake_radar.main()
+
+        initialize.assert_called_once_with(start_background=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import unittest
+
+from cake_radar.workers import EventQueue
+
+
+class TestEventQueue(unittest.TestCase):
+
+    def test_queued_events_run_on_workers_and_are_counted(self):
+        seen = []
+        event_queue = EventQueue(workers=2, maxsize=10)
+
+        for i in range(5):
+            self.assertTrue(event_queue.submit(seen.append, i))
+        self.assertTrue(event_queue.shutdown(timeout=5))
+
+        self.assertEqual(sorted(seen), [0, 1, 2, 3, 4])
+        stats = event_queue.stats()
+        self.assertEqual(stats['submitted'], 5)
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['depth'], 0)
+
+    def test_full_queue_rejects_new_events(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        event_queue = EventQueue(workers=1, maxsize=1)
+        try:
+            event_queue.submit(block)
+            started.wait(5)
+            self.assertTrue(event_queue.submit(lambda: None))
+            self.assertTrue(event_queue.full())
+            self.assertFalse(event_queue.submit(lambda: None))
+            self.assertEqual(event_queue.stats()['rejected'], 1)
+        finally:
+            release.set()
+            event_queue.shutdown(timeout=5)
+
+    def test_failing_event_does_not_stop_the_worker(self):
+        seen = []
+        event_queue = EventQueue(workers=1, maxsize=10)
+
+        with self.assertLogs(level='ERROR'):
+            event_queue.submit(lambda: 1 / 0)
+            event_queue.submit(seen.append, 'after')
+            event_queue.shutdown(timeout=5)
+
+        self.assertEqual(seen, ['after'])
+        self.assertEqual(event_queue.stats()['failed'], 1)
+
+    def test_shutdown_stops_accepting_events(self):
+        event_queue = EventQueue(workers=1, maxsize=10)
+        event_queue.shutdown(timeout=5)
+
+        self.assertFalse(event_queue.submit(lambda: None))
+        self.assertEqual(event_queue.stats()['rejected'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()